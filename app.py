@@ -1,5 +1,4 @@
 from flask import Flask, request, jsonify, render_template
-from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
 from dotenv import load_dotenv
 import os
@@ -15,26 +14,31 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///dup
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string')
 
+# Background jobs (set CELERY_BROKER_URL=memory:// and CELERY_TASK_ALWAYS_EAGER=true for tests)
+app.config['CELERY_BROKER_URL'] = os.getenv('CELERY_BROKER_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+app.config['CELERY_RESULT_BACKEND'] = os.getenv('CELERY_RESULT_BACKEND', 'cache+memory://' if app.config['CELERY_BROKER_URL'].startswith('memory://') else app.config['CELERY_BROKER_URL'])
+app.config['CELERY_TASK_ALWAYS_EAGER'] = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+
 # Initialize extensions
-db = SQLAlchemy(app)
+from models import db, User, Channel, Video, BlogPost, Job
+db.init_app(app)
 jwt = JWTManager(app)
 
-# Update database reference in models
-import models
-models.db = db
+from celery_app import init_celery
+celery = init_celery(app)
 
-# Import models and routes after db initialization
-from models import User, Channel, Video, BlogPost
 from routes.auth import auth_bp
 from routes.channels import channels_bp
 from routes.videos import videos_bp
 from routes.blog import blog_bp
+from routes.jobs import jobs_bp
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(channels_bp, url_prefix='/api/channels')
 app.register_blueprint(videos_bp, url_prefix='/api/videos')
 app.register_blueprint(blog_bp, url_prefix='/api/blog')
+app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
 
 @app.route('/')
 def index():
@@ -42,9 +46,31 @@ def index():
 
 @app.route('/api/health')
 def health_check():
-    return jsonify({'status': 'healthy', 'message': 'DupeTube API is running'})
+    from services.response_cache import get_response_cache
+    from services.llm_cache import get_llm_cache
+    llm_cache = get_llm_cache()
+    return jsonify({
+        'status': 'healthy',
+        'message': 'DupeTube API is running',
+        'caches': {
+            'youtube': get_response_cache().stats(),
+            'llm': llm_cache.stats() if llm_cache else None
+        }
+    })
+
+def init_db():
+    """Create tables, apply migrations and install the full-text search index"""
+    from migrations import run_migrations
+    from services.search_service import SearchService
+    db.create_all()
+    run_migrations()
+    SearchService.install()
+
+@app.cli.command('init-db')
+def init_db_command():
+    init_db()
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_db()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
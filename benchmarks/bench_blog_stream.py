@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to first visible text, blocking vs streamed blog generation.
+
+Starts benchmarks/fake_openai_server.py (about 5 ms per token) and requests
+the same blog post both ways: once without streaming, as POST
+/api/blog/generate does, and once with "stream": true, decoding the
+chunks with services.json_stream.JsonFieldStream as POST
+/api/blog/generate/stream does. Reports when the first piece of the title
+could be shown and when the full post was available.
+
+    python3 benchmarks/bench_blog_stream.py [token_delay_ms]
+"""
+
+import os
+import sys
+import json
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.json_stream import JsonFieldStream
+import fake_openai_server
+
+def request(base, stream):
+    body = json.dumps({'model': 'gpt-3.5-turbo', 'stream': stream,
+                       'messages': [{'role': 'user', 'content': 'Write a blog post'}]}).encode()
+    return urllib.request.urlopen(urllib.request.Request(
+        f"{base}/chat/completions", data=body, headers={'Content-Type': 'application/json'}
+    ))
+
+def blocking(base):
+    start = time.perf_counter()
+    with request(base, False) as response:
+        reply = json.load(response)['choices'][0]['message']['content']
+    fields = json.loads(reply)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, fields
+
+def streamed(base):
+    start = time.perf_counter()
+    first = None
+    parser = JsonFieldStream()
+    with request(base, True) as response:
+        for line in response:
+            line = line.decode().strip()
+            if not line.startswith('data: ') or line == 'data: [DONE]':
+                continue
+            delta = json.loads(line[6:])['choices'][0]['delta'].get('content')
+            if delta and parser.feed(delta) and first is None:
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start, parser.fields
+
+if __name__ == '__main__':
+    delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.005
+    server = fake_openai_server.start(token_delay=delay)
+    base = f"http://127.0.0.1:{server.server_port}/v1"
+
+    tokens = len(fake_openai_server.tokens(fake_openai_server.REPLY))
+    print(f"reply: {tokens} tokens at {delay * 1000:.1f} ms/token")
+    results = {}
+    for name, run in (('blocking', blocking), ('streamed', streamed)):
+        first, total, fields = run(base)
+        results[name] = fields
+        print(f"{name:9} first text {first * 1000:7.0f} ms   complete {total * 1000:7.0f} ms")
+    assert results['blocking'] == results['streamed']
+    server.shutdown()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: offline extractive summarization time vs transcript length.
+
+Runs services.extractive_summarizer.ExtractiveSummarizer (TF-IDF + TextRank,
+the fallback summary when no OpenAI key is set) over synthetic transcripts
+of 10 minutes to three hours at about 150 spoken words per minute, both
+punctuated and as unpunctuated auto-generated captions, and reports the
+median time of several runs. An hour-long transcript should take well
+under 100 ms.
+
+    python3 benchmarks/bench_extractive_summary.py [runs]
+"""
+
+import os
+import sys
+import random
+import statistics
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.extractive_summarizer import ExtractiveSummarizer, split_sentences
+
+FILLER = "so the thing is we want to you know look at how this works and what it does".split()
+WORDS_PER_MINUTE = 150
+
+def transcript(minutes, punctuated, seed=42):
+    """Filler speech with a few recurring topics and a long tail of rarer terms"""
+    rng = random.Random(seed)
+    topics = [[f"topic{t}term{i}" for i in range(40)] for t in range(12)]
+    rare = [f"rare{i}" for i in range(20000)]
+    words = []
+    topic = topics[0]
+    for count in range(minutes * WORDS_PER_MINUTE):
+        if count % 400 == 0:
+            topic = rng.choice(topics)
+        roll = rng.random()
+        if roll < 0.25:
+            words.append(rng.choice(topic))
+        elif roll < 0.35:
+            words.append(rng.choice(rare))
+        else:
+            words.append(rng.choice(FILLER))
+        if punctuated and rng.random() < 0.06:
+            words[-1] += '.'
+    return ' '.join(words)
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    summarizer = ExtractiveSummarizer()
+
+    print(f"{'minutes':>7} {'words':>7} {'captions':>9} {'sentences':>9} {'median':>9}")
+    for minutes in (10, 30, 60, 120, 180):
+        for punctuated in (True, False):
+            text = transcript(minutes, punctuated)
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                summarizer.summarize(text)
+                times.append(time.perf_counter() - start)
+            print(f"{minutes:>7} {len(text.split()):>7} {'no' if punctuated else 'yes':>9} "
+                  f"{len(split_sentences(text)):>9} {statistics.median(times) * 1000:>7.1f}ms")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk generation wall time, sequential vs services.llm_executor.
+
+Sends one call per video (default 50) to a fake chat model with
+variable latency that answers about 10% of calls with HTTP 429, first one
+after another as bulk-generate used to, then through LLMExecutor with
+rate limits and retries. The executor run should finish close to the
+slowest call plus retry delays.
+
+    python3 benchmarks/bench_llm_executor.py [videos] [concurrency]
+"""
+
+import os
+import sys
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.llm_executor import LLMExecutor
+
+class RateLimited(Exception):
+    http_status = 429
+
+class FakeLLM:
+    def __init__(self, seed=42, rate_limit_share=0.1):
+        self.rng = random.Random(seed)
+        self.rate_limit_share = rate_limit_share
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.rejected = 0
+        self.slowest = 0.0
+
+    def __call__(self, messages, max_tokens=1000, temperature=0.7):
+        with self.lock:
+            self.calls += 1
+            latency = self.rng.uniform(0.3, 1.2)
+            rejected = self.rng.random() < self.rate_limit_share
+            if rejected:
+                self.rejected += 1
+            else:
+                self.slowest = max(self.slowest, latency)
+        if rejected:
+            time.sleep(0.02)
+            raise RateLimited('429 Too Many Requests')
+        time.sleep(latency)
+        return '{"title": "t", "content": "c", "excerpt": "e"}'
+
+def prompt(i):
+    return [{"role": "user", "content": f"Write a blog post about video {i}. " * 50}]
+
+if __name__ == '__main__':
+    videos = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    llm = FakeLLM()
+    sequential = LLMExecutor(concurrency=1, max_retries=10, backoff=0.2)
+    start = time.perf_counter()
+    for i in range(videos):
+        sequential.call(llm, prompt(i), max_tokens=2000)
+    sequential_s = time.perf_counter() - start
+    print(f"sequential:  {sequential_s:6.2f}s  ({llm.calls} calls, {llm.rejected} 429s)")
+
+    llm = FakeLLM()
+    executor = LLMExecutor(concurrency=concurrency, requests_per_minute=3500,
+                           tokens_per_minute=500000, max_retries=10, backoff=0.2)
+    start = time.perf_counter()
+    first = None
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(executor.call, llm, prompt(i), max_tokens=2000) for i in range(videos)]
+        for future in as_completed(futures):
+            future.result()
+            if first is None:
+                first = time.perf_counter() - start
+    executor_s = time.perf_counter() - start
+    print(f"executor:    {executor_s:6.2f}s  ({llm.calls} calls, {llm.rejected} 429s, "
+          f"first result after {first:.2f}s, slowest call {llm.slowest:.2f}s)")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: near-duplicate detection with services.minhash, LSH vs a full scan.
+
+Builds a synthetic library of transcripts (default 10000, ~10 minutes of
+speech each) where one in ten is a re-upload of another: trimmed at the
+start and end, with a few caption words changed. Reports signature time,
+per-video lookup time through the LSH bands vs comparing against every
+stored signature, and precision/recall of the LSH matches against the
+exact shingle Jaccard similarity of the planted pairs, i.e. how many
+generations a bulk run would skip.
+
+    python3 benchmarks/bench_minhash.py [videos]
+"""
+
+import os
+import sys
+import random
+import statistics
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.minhash import MinHashLSH, DUPLICATE_THRESHOLD, signature, shingles
+
+WORDS_PER_VIDEO = 1500
+
+def reupload(rng, words, vocab):
+    """Trim up to 3% at each end and change about 1 word in 100"""
+    begin = rng.randint(0, len(words) * 3 // 100)
+    end = len(words) - rng.randint(0, len(words) * 3 // 100)
+    copy = words[begin:end]
+    for _ in range(len(copy) // 100):
+        copy[rng.randrange(len(copy))] = rng.choice(vocab)
+    return copy
+
+def exact_jaccard(a, b):
+    a, b = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(a & b) / len(a | b)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(42)
+    vocab = [f"w{i}" for i in range(20000)]
+
+    texts = []
+    planted = {}  # re-upload index -> original index
+    for i in range(count):
+        if texts and rng.random() < 0.1:
+            original = rng.randrange(len(texts))
+            planted[i] = original
+            texts.append(' '.join(reupload(rng, texts[original].split(), vocab)))
+        else:
+            texts.append(' '.join(rng.choice(vocab) for _ in range(WORDS_PER_VIDEO)))
+
+    start = time.perf_counter()
+    signatures = [signature(text) for text in texts]
+    signature_s = time.perf_counter() - start
+    hour = ' '.join(rng.choice(vocab) for _ in range(9000))
+    start = time.perf_counter()
+    signature(hour)
+    hour_s = time.perf_counter() - start
+    print(f"{count} videos: signatures {signature_s / count * 1000:.2f} ms each "
+          f"({hour_s * 1000:.1f} ms for an hour-long transcript)")
+
+    # Claim every video in order, as bulk generation does
+    index = MinHashLSH()
+    lookups = []
+    found = {}
+    for i, sig in enumerate(signatures):
+        start = time.perf_counter()
+        match = index.claim(i, sig)
+        lookups.append(time.perf_counter() - start)
+        if match is not None:
+            found[i] = match
+
+    stacked = np.vstack(signatures)
+    scans = []
+    for i in rng.sample(range(count), 200):
+        start = time.perf_counter()
+        scores = (stacked[:i] == signatures[i]).mean(axis=1)
+        np.flatnonzero(scores >= DUPLICATE_THRESHOLD)
+        scans.append(time.perf_counter() - start)
+
+    print(f"lookup: LSH p50 {statistics.median(lookups) * 1000:.3f} ms, "
+          f"full scan p50 {statistics.median(scans) * 1000:.3f} ms")
+
+    similar = {i: exact_jaccard(texts[i], texts[j]) for i, j in planted.items()}
+    expected = {i for i, score in similar.items() if score >= DUPLICATE_THRESHOLD}
+    correct = {i for i in found if i in planted}
+    print(f"planted re-uploads: {len(planted)}, with exact Jaccard >= {DUPLICATE_THRESHOLD}: {len(expected)} "
+          f"(median {statistics.median(similar.values()):.2f})")
+    print(f"flagged: {len(found)}; precision {len(correct) / max(len(found), 1):.3f}, "
+          f"recall {len(expected & set(found)) / max(len(expected), 1):.3f}; "
+          f"generations skipped {len(found) / count:.1%}")
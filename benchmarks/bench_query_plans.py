@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query plans and latency of the list endpoints before and after the
+composite indexes from migrations.query_indexes.
+
+Seeds a large SQLite database (default 2,000 users, 10,000 channels,
+500,000 videos, 250,000 blog posts), prints EXPLAIN QUERY PLAN for the
+queries behind /api/videos/ and /api/blog/posts, and reports p50/p99 over
+random users, first without and then with the indexes.
+
+    python3 benchmarks/bench_query_plans.py [videos]
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE user (id INTEGER PRIMARY KEY);
+CREATE TABLE channel (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, channel_id VARCHAR(50) NOT NULL);
+CREATE TABLE video (
+    id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    video_id VARCHAR(50) NOT NULL UNIQUE,
+    title VARCHAR(200) NOT NULL,
+    published_at DATETIME
+);
+CREATE TABLE blog_post (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    video_id INTEGER NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    status VARCHAR(20),
+    created_at DATETIME
+);
+"""
+
+# Same statements as migrations.query_indexes
+INDEXES = [
+    'CREATE INDEX ix_channel_user_id_channel_id ON channel (user_id, channel_id)',
+    'CREATE INDEX ix_video_channel_id_published_at ON video (channel_id, published_at)',
+    'CREATE INDEX ix_blog_post_user_id_status_created_at ON blog_post (user_id, status, created_at)',
+    'CREATE INDEX ix_blog_post_user_id_created_at ON blog_post (user_id, created_at)',
+    'CREATE INDEX ix_blog_post_video_id_user_id ON blog_post (video_id, user_id)',
+]
+
+# SQL equivalent to the ORM queries in routes/videos.py and routes/blog.py
+QUERIES = {
+    'GET /api/videos/': (
+        'SELECT video.* FROM video JOIN channel ON channel.id = video.channel_id '
+        'WHERE channel.user_id = :user_id ORDER BY video.published_at DESC LIMIT 20'
+    ),
+    'GET /api/videos/?channel_id=': (
+        'SELECT video.* FROM video JOIN channel ON channel.id = video.channel_id '
+        'WHERE channel.user_id = :user_id AND video.channel_id = :channel_id '
+        'ORDER BY video.published_at DESC LIMIT 20'
+    ),
+    'GET /api/blog/posts': (
+        'SELECT * FROM blog_post WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 20'
+    ),
+    'GET /api/blog/posts?status=': (
+        "SELECT * FROM blog_post WHERE user_id = :user_id AND status = 'published' "
+        'ORDER BY created_at DESC LIMIT 20'
+    ),
+    'existing post check': (
+        'SELECT * FROM blog_post WHERE video_id = :video_id AND user_id = :user_id LIMIT 1'
+    ),
+    'channel already added check': (
+        'SELECT * FROM channel WHERE user_id = :user_id AND channel_id = :youtube_channel_id LIMIT 1'
+    ),
+}
+
+def seed(conn, users, videos):
+    rng = random.Random(42)
+    channels = users * 5
+    start = datetime(2015, 1, 1)
+
+    conn.executemany('INSERT INTO user (id) VALUES (?)', [(i,) for i in range(1, users + 1)])
+    conn.executemany(
+        'INSERT INTO channel (id, user_id, channel_id) VALUES (?, ?, ?)',
+        [(i, (i - 1) // 5 + 1, f'UC{i:020d}') for i in range(1, channels + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO video (id, channel_id, video_id, title, published_at) VALUES (?, ?, ?, ?, ?)',
+        (
+            (i, rng.randint(1, channels), f'v{i:010d}', f'Video {i}',
+             (start + timedelta(minutes=rng.randint(0, 5_000_000))).isoformat(' '))
+            for i in range(1, videos + 1)
+        )
+    )
+    conn.executemany(
+        'INSERT INTO blog_post (id, user_id, video_id, title, status, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+        (
+            (i, rng.randint(1, users), rng.randint(1, videos), f'Post {i}',
+             rng.choice(['draft', 'draft', 'published', 'scheduled']),
+             (start + timedelta(minutes=rng.randint(0, 5_000_000))).isoformat(' '))
+            for i in range(1, videos // 2 + 1)
+        )
+    )
+    conn.commit()
+    conn.execute('ANALYZE')
+
+def params_for(rng, users, videos):
+    user_id = rng.randint(1, users)
+    channel = (user_id - 1) * 5 + rng.randint(1, 5)
+    return {
+        'user_id': user_id,
+        'channel_id': channel,
+        'youtube_channel_id': f'UC{channel:020d}',
+        'video_id': rng.randint(1, videos)
+    }
+
+def measure(conn, users, videos, samples=300):
+    for label, sql in QUERIES.items():
+        rng = random.Random(1)
+        plan = conn.execute('EXPLAIN QUERY PLAN ' + sql, params_for(rng, users, videos)).fetchall()
+        timings = []
+        for _ in range(samples):
+            params = params_for(rng, users, videos)
+            began = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - began) * 1000)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        print(f"  {label:<30} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+        for row in plan:
+            print(f"      {row[-1]}")
+
+if __name__ == '__main__':
+    videos = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    users = max(videos // 250, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        conn.executescript(SCHEMA)
+        seed(conn, users, videos)
+        print(f"seeded {users} users, {users * 5} channels, {videos} videos, {videos // 2} blog posts")
+
+        print("\nwithout composite indexes")
+        measure(conn, users, videos)
+
+        for statement in INDEXES:
+            conn.execute(statement)
+        conn.execute('ANALYZE')
+
+        print("\nwith composite indexes")
+        measure(conn, users, videos)
+        conn.close()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/videos/search on SQLite, leading-wildcard LIKE vs FTS5.
+
+Seeds a synthetic corpus (default 100k videos for one user) into a temporary
+database created from the models, with the full-text tables and triggers
+installed by services.search_service.SearchService.install (SQLITE_SCHEMA),
+then times SearchService's FTS5 search and its LIKE fallback for a set of
+common, medium and rare terms.
+
+    python3 benchmarks/bench_search.py [videos]
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+from sqlalchemy import text
+from models import db
+from services.search_service import SearchService
+
+def make_vocabulary(size=20000, seed=7):
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+
+def seed(videos, vocabulary):
+    rng = random.Random(42)
+    # Zipf-like word frequencies, as in natural text
+    cum_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def words(n):
+        return ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=n))
+
+    db.session.execute(text(
+        "INSERT INTO user (id, username, email, password_hash) VALUES (1, 'bench', 'bench@example.com', '')"
+    ))
+    db.session.execute(text(
+        "INSERT INTO channel (id, user_id, channel_id, channel_url, title) "
+        "VALUES (:id, 1, :channel_id, '', :channel_id)"
+    ), [{'id': i, 'channel_id': f'UC{i}'} for i in range(1, 11)])
+    db.session.execute(text(
+        'INSERT INTO video (id, channel_id, video_id, title, description, tags, published_at) '
+        'VALUES (:id, :channel_id, :video_id, :title, :description, :tags, :published_at)'
+    ), [
+        {
+            'id': i,
+            'channel_id': rng.randint(1, 10),
+            'video_id': f'v{i}',
+            'title': words(8),
+            'description': words(120),
+            'tags': json.dumps(rng.choices(vocabulary[:2000], k=6)),
+            'published_at': datetime(2020, 1, 1) + timedelta(minutes=i)
+        }
+        for i in range(1, videos + 1)
+    ])
+    db.session.commit()
+
+def timed(search, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        search()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+if __name__ == '__main__':
+    videos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    vocabulary = make_vocabulary()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            SearchService.install()
+
+            start = time.perf_counter()
+            seed(videos, vocabulary)
+            print(f"seeded {videos} videos in {time.perf_counter() - start:.1f}s")
+
+            # The first page of /api/videos/search without a total, through
+            # the FTS5 path and the LIKE fallback used by other databases
+            service = SearchService()
+            print(f"{'term':<12} {'frequency':<10} {'LIKE ms':>10} {'FTS5 ms':>10}")
+            for label, term in (('common', vocabulary[0]), ('medium', vocabulary[500]), ('rare', vocabulary[15000])):
+                like_ms = timed(lambda: service._search_fallback(1, term, 0, 20, include_total=False))
+                fts_ms = timed(lambda: service.search_videos(1, term, limit=20, include_total=False))
+                print(f"{term:<12} {label:<10} {like_ms:>10.2f} {fts_ms:>10.2f}")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: related-video and text queries over a 100k-video similarity index.
+
+Builds services.similarity_index.SimilarityIndex from synthetic videos
+(titles, tags and transcripts drawn from a few hundred overlapping topics),
+then reports build time, p50/p99 latency of top-10 queries by video and by
+short text, the cost of incremental updates, and recall@10 of the pruned
+query against exact TF-IDF cosine over all terms.
+
+    python3 benchmarks/bench_similarity.py [videos] [queries]
+"""
+
+import os
+import sys
+import random
+import statistics
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.similarity_index import SimilarityIndex, FEATURES, idf, term_vector
+
+FILLER = "so the thing is we want to look at how this works and what it does".split()
+
+def make_video(rng, topics, rare):
+    main, side = rng.sample(topics, 2)
+    title = ' '.join(rng.choice(main) for _ in range(6))
+    tags = ' '.join(rng.choice(main) for _ in range(4))
+    words = []
+    for _ in range(300):
+        roll = rng.random()
+        words.append(rng.choice(main) if roll < 0.25 else rng.choice(side) if roll < 0.35
+                     else rng.choice(rare) if roll < 0.45 else rng.choice(FILLER))
+    return [(title, 3), (tags, 2), (' '.join(words), 1)]
+
+def percentile(values, share):
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))]
+
+def exact_top(index, terms, weights, exclude, limit=10):
+    """Brute-force cosine over every term, for recall"""
+    n = len(index)
+    main = index.main
+    df = np.bincount(main.terms, minlength=FEATURES)
+    query = weights * idf(df[terms], n)
+    lookup = np.zeros(FEATURES)
+    lookup[terms] = query
+    scores = np.bincount(main.rows, weights=lookup[main.terms] * main.weights * idf(df[main.terms], n),
+                         minlength=main.count)
+    scores /= main.norms * np.linalg.norm(query)
+    order = [int(index.video_ids[row]) for row in np.argsort(-scores) if index.video_ids[row] != exclude]
+    return order[:limit]
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+    topics = [[f"t{t}w{i}" for i in range(30)] for t in range(400)]
+    rare = [f"rare{i}" for i in range(200000)]
+
+    start = time.perf_counter()
+    vectors = [term_vector(make_video(rng, topics, rare)) for _ in range(count)]
+    vectorize_s = time.perf_counter() - start
+
+    index = SimilarityIndex()
+    start = time.perf_counter()
+    for video_id, (terms, weights) in enumerate(vectors, 1):
+        index.update(video_id, terms, weights, merge=False)
+    index.flush()
+    build_s = time.perf_counter() - start
+    print(f"{count} videos, {len(index.main.terms)} postings: vectorize {vectorize_s:.1f}s, build {build_s:.2f}s")
+
+    samples = rng.sample(range(1, count + 1), queries)
+    by_video = []
+    for video_id in samples:
+        start = time.perf_counter()
+        index.query(*vectors[video_id - 1], limit=10, exclude=video_id)
+        by_video.append(time.perf_counter() - start)
+
+    by_text = []
+    for _ in range(queries):
+        text = ' '.join(rng.choice(rng.choice(topics)) for _ in range(3))
+        start = time.perf_counter()
+        index.query(*term_vector([(text, 1)]), limit=10)
+        by_text.append(time.perf_counter() - start)
+
+    for name, times in (('by video', by_video), ('by text', by_text)):
+        print(f"query {name:9} p50 {statistics.median(times) * 1000:6.2f} ms   "
+              f"p99 {percentile(times, 0.99) * 1000:6.2f} ms")
+
+    # Incremental updates land in the pending set; queries still see them
+    updates = rng.sample(range(1, count + 1), 500)
+    start = time.perf_counter()
+    for video_id in updates:
+        index.update(video_id, *term_vector(make_video(rng, topics, rare)))
+    update_s = (time.perf_counter() - start) / len(updates)
+    pending_times = []
+    for video_id in samples[:50]:
+        start = time.perf_counter()
+        index.query(*vectors[video_id - 1], limit=10, exclude=video_id)
+        pending_times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    index.flush()
+    merge_s = time.perf_counter() - start
+    print(f"update {update_s * 1000:.2f} ms each; query with {len(updates)} pending "
+          f"p50 {statistics.median(pending_times) * 1000:.2f} ms; merge {merge_s:.2f}s")
+
+    hits = 0
+    checked = samples[:20]
+    for video_id in checked:
+        terms, weights = vectors[video_id - 1]
+        found = {result for result, _ in index.query(terms, weights, limit=10, exclude=video_id)}
+        hits += len(found & set(exact_top(index, terms, weights, video_id)))
+    print(f"recall@10 vs exact cosine: {hits / (10 * len(checked)):.2f}")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: map-reduce summarization throughput vs concurrency.
+
+Runs services.summarizer.MapReduceSummarizer over a synthetic three-hour
+transcript against a fake chat model that sleeps like a remote API (fixed
+latency plus time per prompt token), and reports wall time and chunk calls
+per second for each concurrency limit.
+
+    python3 benchmarks/bench_summarizer.py [minutes] [latency_ms]
+"""
+
+import os
+import sys
+import random
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.summarizer import MapReduceSummarizer, estimate_tokens
+from services.transcript_segments import TranscriptSegments
+
+WORDS = "so the next thing we want to do is look at how this works when you run it again".split()
+
+class FakeLLM:
+    """Stands in for the chat API: sleeps, counts calls and tracks peak concurrency"""
+
+    def __init__(self, latency, per_token=0.00005):
+        self.latency = latency
+        self.per_token = per_token
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, messages, max_tokens=1000, temperature=0.7):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        prompt = messages[-1]['content']
+        time.sleep(self.latency + estimate_tokens(prompt) * self.per_token)
+        with self.lock:
+            self.active -= 1
+        return ' '.join(WORDS[:12]) * 8
+
+def make_segments(minutes, seed=42):
+    rng = random.Random(seed)
+    entries = []
+    start = 0.0
+    while start < minutes * 60:
+        duration = rng.uniform(2.0, 4.5)
+        entries.append({
+            'text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))),
+            'start': start,
+            'duration': duration
+        })
+        start += duration
+    return TranscriptSegments.from_entries(entries)
+
+if __name__ == '__main__':
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 180
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 500) / 1000
+    segments = make_segments(minutes)
+    print(f"{minutes}-minute transcript, {estimate_tokens(segments.text)} tokens, "
+          f"{latency * 1000:.0f} ms per call")
+    print(f"{'concurrency':>11} {'calls':>6} {'peak':>5} {'wall s':>8} {'calls/s':>8}")
+
+    for concurrency in (1, 2, 4, 8, 16):
+        llm = FakeLLM(latency)
+        summarizer = MapReduceSummarizer(llm, chunk_tokens=3000, concurrency=concurrency)
+        start = time.perf_counter()
+        summarizer.condense(segments.text, 'Benchmark', segments)
+        elapsed = time.perf_counter() - start
+        print(f"{concurrency:>11} {llm.calls:>6} {llm.peak:>5} {elapsed:>8.2f} {llm.calls / elapsed:>8.2f}")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-segment dicts vs TranscriptSegments for caption storage.
+
+Builds the same synthetic captions (default 2,000 one-hour videos, a caption
+every ~3 seconds) both as lists of {'text', 'start', 'duration'} dicts and
+as services.transcript_segments.TranscriptSegments, then compares memory,
+serialization size and the cost of cutting every transcript into
+five-minute windows. Build times include parsing the JSON; the
+from_entries row is the conversion from parsed dicts alone.
+
+    python3 benchmarks/bench_transcript_segments.py [videos]
+"""
+
+import os
+import sys
+import json
+import random
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.transcript_segments import TranscriptSegments
+
+WORDS = "so the next thing we want to do is look at how this works when you run it again".split()
+WINDOW = 300.0
+
+def make_captions(rng, seconds=3600):
+    captions = []
+    start = 0.0
+    while start < seconds:
+        duration = rng.uniform(2.0, 4.5)
+        captions.append({
+            'text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))),
+            'start': round(start, 2),
+            'duration': round(duration, 2)
+        })
+        start += duration
+    return captions
+
+def window_dicts(captions):
+    windows = []
+    end = captions[-1]['start'] + captions[-1]['duration']
+    position = 0.0
+    while position < end:
+        windows.append(' '.join(
+            caption['text'] for caption in captions
+            if caption['start'] < position + WINDOW and caption['start'] + caption['duration'] > position
+        ))
+        position += WINDOW
+    return windows
+
+def window_segments(segments):
+    windows = []
+    end = segments.end
+    position = 0.0
+    while position < end:
+        windows.append(segments.time_slice(position, position + WINDOW).text)
+        position += WINDOW
+    return windows
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, elapsed, size / (1024 * 1024)
+
+if __name__ == '__main__':
+    videos = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(42)
+    raw = [json.dumps(make_captions(rng)) for _ in range(videos)]
+
+    dicts, dict_build, dict_mb = measure(lambda: [json.loads(captions) for captions in raw])
+    packed, packed_build, packed_mb = measure(
+        lambda: [TranscriptSegments.from_entries(json.loads(captions)) for captions in raw]
+    )
+    segments = sum(len(captions) for captions in dicts)
+
+    start = time.perf_counter()
+    for captions in dicts:
+        TranscriptSegments.from_entries(captions)
+    convert_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dict_windows = [window_dicts(captions) for captions in dicts]
+    dict_window_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    packed_windows = [window_segments(transcript) for transcript in packed]
+    packed_window_s = time.perf_counter() - start
+    assert sum(map(len, dict_windows)) == sum(map(len, packed_windows))
+
+    json_mb = sum(len(captions.encode('utf-8')) for captions in raw) / (1024 * 1024)
+    binary_mb = sum(len(transcript.to_bytes()) for transcript in packed) / (1024 * 1024)
+
+    start = time.perf_counter()
+    for transcript in packed:
+        TranscriptSegments.from_bytes(transcript.to_bytes())
+    roundtrip_s = time.perf_counter() - start
+
+    print(f"{videos} videos, {segments} segments")
+    print(f"{'':<30} {'dicts':>10} {'packed':>10}")
+    print(f"{'resident memory (MB)':<30} {dict_mb:>10.1f} {packed_mb:>10.1f}")
+    print(f"{'build time (s)':<30} {dict_build:>10.2f} {packed_build:>10.2f}")
+    print(f"{'from_entries on parsed (s)':<30} {'':>10} {convert_s:>10.2f}")
+    print(f"{'serialized size (MB)':<30} {json_mb:>10.1f} {binary_mb:>10.1f}")
+    print(f"{'5-minute windows (s)':<30} {dict_window_s:>10.2f} {packed_window_s:>10.2f}")
+    print(f"binary round trip of all transcripts: {roundtrip_s:.2f}s")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark: storage size and scan speed with transcripts inline in the video
+row vs compressed in a separate video_transcript table.
+
+Seeds two SQLite databases with the same synthetic corpus (default 20,000
+videos with 10-40 minute transcripts of Zipf-distributed English-like text),
+one with the old inline video.transcript column and one with the blobs
+written by models.compress_text, then reports file size, the time of a full
+scan of the video table, and the time to fetch and decompress transcripts.
+
+Either way, transcript search keeps a second, uncompressed copy of every
+transcript: timed caption lines in transcript_segment plus the
+transcript_fts index over them. They are built once more with the shipped
+schema, and their size is added to both database totals.
+
+    python3 benchmarks/bench_transcript_storage.py [videos]
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import time
+import zlib
+from itertools import accumulate
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.schema import CreateTable, CreateIndex
+from models import TranscriptSegment
+from services.search_service import SQLITE_SCHEMA
+
+INLINE_SCHEMA = """
+CREATE TABLE video (
+    id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    view_count BIGINT,
+    published_at DATETIME,
+    transcript TEXT
+);
+"""
+
+SPLIT_SCHEMA = """
+CREATE TABLE video (
+    id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    view_count BIGINT,
+    published_at DATETIME
+);
+CREATE TABLE video_transcript (
+    video_id INTEGER PRIMARY KEY,
+    codec VARCHAR(10) NOT NULL,
+    data BLOB NOT NULL,
+    raw_size INTEGER NOT NULL
+);
+"""
+
+# transcript_segment with its indexes, and the FTS table and triggers over it
+SEGMENT_SCHEMA = [
+    str(ddl.compile(dialect=sqlite_dialect.dialect())) for ddl in (
+        CreateTable(TranscriptSegment.__table__),
+        *(CreateIndex(index) for index in TranscriptSegment.__table__.indexes)
+    )
+] + [statement for statement in SQLITE_SCHEMA if 'transcript_fts' in statement]
+
+# Words per caption line and seconds per line, about 150 words a minute
+SEGMENT_WORDS = 10
+SEGMENT_SECONDS = 4.0
+
+# A listing-style query that has to visit every video row
+SCAN_QUERY = 'SELECT id, title, view_count FROM video WHERE view_count > ? ORDER BY published_at DESC LIMIT 20'
+
+COMMON_WORDS = (
+    "the and to of a i you it in that is we this so what for on be are like just have "
+    "with do can was about know it's not but they if your my at all one going there get "
+    "right really think out up here now how when which because some people time want them "
+    "me he would more make these go see our then thing actually video things going way "
+    "also well good first look need much very where could those into work code use data "
+    "little bit kind let's okay other same different because something today question"
+).split()
+
+def make_vocabulary(size=15000, seed=7):
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    rare = [''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+    return COMMON_WORDS + rare
+
+def make_corpus(videos, vocabulary):
+    rng = random.Random(42)
+    cum_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def words(n):
+        return ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=n))
+
+    # Spoken English runs at roughly 150 words per minute
+    for i in range(1, videos + 1):
+        yield (
+            i, rng.randint(1, 50), words(8), words(60), rng.randint(0, 1_000_000),
+            f'2020-01-01 00:00:{i:09d}', words(150 * rng.randint(10, 40))
+        )
+
+def compress(value):
+    raw = value.encode('utf-8')
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(raw)
+    return 'zlib', zlib.compress(raw, 9)
+
+def decompress(codec, data):
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+def segment_rows(corpus):
+    next_id = 1
+    for row in corpus:
+        words = row[-1].split(' ')
+        for i in range(0, len(words), SEGMENT_WORDS):
+            yield (next_id, row[0], 1, i // SEGMENT_WORDS * SEGMENT_SECONDS, SEGMENT_SECONDS,
+                   ' '.join(words[i:i + SEGMENT_WORDS]))
+            next_id += 1
+
+def file_size(path):
+    return os.path.getsize(path) / (1024 * 1024)
+
+def median_ms(fn, repeat=7):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+if __name__ == '__main__':
+    videos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    corpus = list(make_corpus(videos, make_vocabulary()))
+    raw_bytes = sum(len(row[-1].encode('utf-8')) for row in corpus)
+    sample_ids = random.Random(1).sample(range(1, videos + 1), min(200, videos))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inline_path = os.path.join(tmp, 'inline.db')
+        inline = sqlite3.connect(inline_path)
+        inline.executescript(INLINE_SCHEMA)
+        inline.executemany('INSERT INTO video VALUES (?, ?, ?, ?, ?, ?, ?)', corpus)
+        inline.commit()
+
+        split_path = os.path.join(tmp, 'split.db')
+        split = sqlite3.connect(split_path)
+        split.executescript(SPLIT_SCHEMA)
+        split.executemany('INSERT INTO video VALUES (?, ?, ?, ?, ?, ?)', [row[:-1] for row in corpus])
+        start = time.perf_counter()
+        blobs = []
+        for row in corpus:
+            codec, data = compress(row[-1])
+            blobs.append((row[0], codec, data, len(row[-1].encode('utf-8'))))
+        compress_s = time.perf_counter() - start
+        split.executemany('INSERT INTO video_transcript VALUES (?, ?, ?, ?)', blobs)
+        split.commit()
+        compressed_bytes = sum(len(blob[2]) for blob in blobs)
+
+        # The search copy is the same whichever way the transcript itself is stored
+        segments_path = os.path.join(tmp, 'segments.db')
+        segments = sqlite3.connect(segments_path)
+        for statement in SEGMENT_SCHEMA:
+            segments.execute(statement)
+        segments.executemany(
+            'INSERT INTO transcript_segment (id, video_id, user_id, start, duration, text) VALUES (?, ?, ?, ?, ?, ?)',
+            segment_rows(corpus)
+        )
+        segments.commit()
+        segments.close()
+        segments_mb = file_size(segments_path)
+
+        def fetch_inline():
+            for video_id in sample_ids:
+                inline.execute('SELECT transcript FROM video WHERE id = ?', (video_id,)).fetchone()
+
+        def fetch_split():
+            for video_id in sample_ids:
+                codec, data = split.execute(
+                    'SELECT codec, data FROM video_transcript WHERE video_id = ?', (video_id,)
+                ).fetchone()
+                decompress(codec, data)
+
+        # Warm both page caches so the scans compare layouts, not disk reads
+        inline.execute(SCAN_QUERY, (500000,)).fetchall()
+        split.execute(SCAN_QUERY, (500000,)).fetchall()
+
+        codec = blobs[0][1]
+        print(f"{videos} videos, {raw_bytes / 1024 / 1024:.1f} MB of transcript text, codec {codec}")
+        print(f"compression ratio {raw_bytes / compressed_bytes:.2f}x, "
+              f"compress {compress_s * 1000 / videos:.3f} ms/transcript")
+        print(f"{'':<28} {'inline':>10} {'compressed':>12}")
+        inline_mb = file_size(inline_path)
+        split_mb = file_size(split_path)
+        print(f"{'database size (MB)':<28} {inline_mb:>10.1f} {split_mb:>12.1f}")
+        print(f"{'with search tables (MB)':<28} {inline_mb + segments_mb:>10.1f} {split_mb + segments_mb:>12.1f}")
+        print(f"{'video table scan (ms)':<28} "
+              f"{median_ms(lambda: inline.execute(SCAN_QUERY, (500000,)).fetchall()):>10.2f} "
+              f"{median_ms(lambda: split.execute(SCAN_QUERY, (500000,)).fetchall()):>12.2f}")
+        print(f"{f'fetch {len(sample_ids)} transcripts (ms)':<28} "
+              f"{median_ms(fetch_inline):>10.2f} {median_ms(fetch_split):>12.2f}")
+
+        print(f"transcript_segment and transcript_fts take {segments_mb:.1f} MB in both layouts; "
+              f"compression saves {(1 - (split_mb + segments_mb) / (inline_mb + segments_mb)) * 100:.0f}% "
+              f"of the total, {(1 - split_mb / inline_mb) * 100:.0f}% without them")
+
+        inline.close()
+        split.close()
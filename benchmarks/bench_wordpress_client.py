@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: WordPress publishing through services.wordpress_client.
+
+Runs against benchmarks/fake_wordpress_server.py, which counts TCP
+connections and HTTP requests and adds a connection setup delay and a
+per-request round-trip delay. Publishes the same posts (default 100)
+three ways:
+
+  - a new wordpress_xmlrpc Client per post (how BlogService used to work)
+  - one call per post through WordPressClientPool
+  - publish_many-style system.multicall batches through the pool
+
+then checks that faults come back per post inside a multicall, that 8
+threads publishing at once share a bounded set of connections, and that
+idle clients are closed after the idle timeout.
+
+    python3 benchmarks/bench_wordpress_client.py [posts]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xmlrpc.client import Fault
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from wordpress_xmlrpc import Client, WordPressPost
+from wordpress_xmlrpc.methods import posts
+from services.wordpress_client import WordPressClientPool, multicall
+
+import fake_wordpress_server
+from fake_wordpress_server import USERNAME, PASSWORD
+
+def wordpress_post(title):
+    wp_post = WordPressPost()
+    wp_post.title = title
+    wp_post.content = 'Building in public means sharing the work as it happens. ' * 40
+    wp_post.excerpt = 'What a year of shipping in the open taught us.'
+    wp_post.post_status = 'publish'
+    wp_post.terms_names = {'category': ['Video Content', 'Blog'], 'post_tag': ['youtube', 'video']}
+    return wp_post
+
+def run(server, label, publish):
+    server.reset_counts()
+    start = time.perf_counter()
+    published = publish()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed * 1000:8.0f} ms  {server.counts['connections']:4d} connections  "
+          f"{server.counts['requests']:4d} requests  ({published} posts)")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    server = fake_wordpress_server.start()
+    titles = [f'Post {i}' for i in range(count)]
+    print(f"fake server: {server.connect_delay * 1000:.0f} ms per connection, "
+          f"{server.request_delay * 1000:.0f} ms per request")
+
+    def per_call():
+        for title in titles:
+            client = Client(server.url, USERNAME, PASSWORD)
+            client.call(posts.NewPost(wordpress_post(title)))
+        return len(titles)
+
+    pool = WordPressClientPool()
+
+    def pooled():
+        for title in titles:
+            with pool.client(server.url, USERNAME, PASSWORD) as client:
+                client.call(posts.NewPost(wordpress_post(title)))
+        return len(titles)
+
+    def batched():
+        with pool.client(server.url, USERNAME, PASSWORD) as client:
+            results = multicall(client, [posts.NewPost(wordpress_post(title)) for title in titles])
+        return sum(1 for result in results if not isinstance(result, Fault))
+
+    run(server, 'client per post', per_call)
+    run(server, 'pooled client', pooled)
+    run(server, 'pooled + multicall', batched)
+
+    # A rejected post fails alone
+    with pool.client(server.url, USERNAME, PASSWORD) as client:
+        results = multicall(client, [posts.NewPost(wordpress_post(title)) for title in ('a', 'reject', 'b')])
+    print(f"multicall with a rejected post: {[type(result).__name__ for result in results]}")
+
+    # Concurrent callers each get their own client; at most pool_size stay open
+    server.reset_counts()
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda title: pooled_publish(pool, server, title), titles))
+    print(f"{count} posts from 8 threads: {server.counts['connections']} new connections, "
+          f"pool {pool.stats()}")
+
+    # Idle clients are closed and replaced
+    short = WordPressClientPool(idle_timeout=0.2)
+    server.reset_counts()
+    for pause in (0, 0.05, 0.3):
+        time.sleep(pause)
+        with short.client(server.url, USERNAME, PASSWORD) as client:
+            client.call(posts.NewPost(wordpress_post('idle')))
+    print(f"calls after 0 s, 0.05 s and 0.3 s idle (timeout 0.2 s): "
+          f"{server.counts['connections']} connections, pool {short.stats()}")
+
+def pooled_publish(pool, server, title):
+    with pool.client(server.url, USERNAME, PASSWORD) as client:
+        return client.call(posts.NewPost(wordpress_post(title)))
+
+if __name__ == '__main__':
+    main()
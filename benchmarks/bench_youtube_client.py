@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request YouTube client setup cost.
+
+Compares building a fresh client for every request (the old behaviour of
+YouTubeService.__init__) with the shared per-process client. No network
+access is needed; both paths use the bundled discovery document.
+
+    python3 benchmarks/bench_youtube_client.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('YOUTUBE_API_KEY', 'benchmark-key')
+
+from googleapiclient.discovery import build
+from services.youtube_service import YouTubeService
+
+class UnmeteredQuota:
+    """Stands in for the quota ledger, which needs the app database"""
+    def charge(self, method, priority='normal'):
+        return 0
+
+QUOTA = UnmeteredQuota()
+
+def time_it(label, fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed / iterations * 1000:8.3f} ms/request")
+    return elapsed
+
+def fresh_client():
+    youtube = build('youtube', 'v3', developerKey=os.environ['YOUTUBE_API_KEY'])
+    youtube.channels().list(part='snippet', id='UC_x5XG1OV2P6uZZ5FSM9Ttw')
+
+def shared_client():
+    service = YouTubeService(quota=QUOTA)
+    service.youtube.channels().list(part='snippet', id='UC_x5XG1OV2P6uZZ5FSM9Ttw')
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    # Warm the shared client so its one-off build is not counted
+    YouTubeService(quota=QUOTA)
+
+    fresh = time_it('build() per request', fresh_client, iterations)
+    shared = time_it('shared client', shared_client, iterations)
+    print(f"speedup: {fresh / shared:.1f}x")
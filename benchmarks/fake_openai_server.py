@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for the OpenAI chat completions API, for benchmarks.
+
+Answers POST /v1/chat/completions with a fixed JSON blog post, either in
+one response after the whole reply has been "generated" or, with
+"stream": true, as server-sent chunks in the OpenAI format. Each token
+takes `token_delay` seconds either way.
+
+    python3 benchmarks/fake_openai_server.py [port]
+
+then point the app at it with OPENAI_API_BASE=http://127.0.0.1:<port>/v1.
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = json.dumps({
+    'title': 'Ten Lessons From a Year of Building in Public',
+    'content': '## Introduction\n\n' + 'Building in public means sharing the work as it happens. ' * 120,
+    'excerpt': 'What a year of shipping in the open taught us.'
+})
+
+def tokens(text):
+    """Split text into roughly token-sized pieces"""
+    return re.findall(r'\s*\S{1,4}', text)
+
+class Handler(BaseHTTPRequestHandler):
+    token_delay = 0.005
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        pieces = tokens(REPLY)
+
+        if not body.get('stream'):
+            time.sleep(self.token_delay * len(pieces))
+            self._send_json({
+                'object': 'chat.completion',
+                'model': body.get('model'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': REPLY},
+                             'finish_reason': 'stop'}]
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for piece in pieces:
+            time.sleep(self.token_delay)
+            self._send_chunk(body, {'content': piece}, None)
+        self._send_chunk(body, {}, 'stop')
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+    def _send_chunk(self, body, delta, finish_reason):
+        chunk = {
+            'object': 'chat.completion.chunk',
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send_json(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def start(port=0, token_delay=None):
+    """Serve on a background thread; returns the server (see server.server_port)"""
+    if token_delay is not None:
+        Handler.token_delay = token_delay
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    server = start(int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Fake OpenAI API on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for a WordPress XML-RPC endpoint, for benchmarks.
+
+Serves /xmlrpc.php over HTTP/1.1 keep-alive with the methods the app
+uses (mt.supportedMethods, wp.newPost, wp.editPost, wp.deletePost,
+wp.getPosts, wp.getTerms) plus system.multicall, and counts the TCP
+connections and HTTP requests it receives. Each new connection waits
+`connect_delay` seconds (standing in for TCP and TLS setup to a remote
+host) and each request `request_delay` seconds (the round-trip).
+wp.newPost answers a post titled "reject" with a fault.
+
+    python3 benchmarks/fake_wordpress_server.py [port]
+
+then set the WordPress URL in the app to http://127.0.0.1:<port>.
+"""
+
+import itertools
+import sys
+import threading
+import time
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+from xmlrpc.client import Fault
+
+USERNAME = 'admin'
+PASSWORD = 'secret'
+
+class Handler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ('/xmlrpc.php',)
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+        time.sleep(self.server.connect_delay)
+
+    def do_POST(self):
+        self.server.count('requests')
+        time.sleep(self.server.request_delay)
+        super().do_POST()
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeWordPressServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, connect_delay=0.02, request_delay=0.005):
+        super().__init__(('127.0.0.1', port), Handler, allow_none=True, logRequests=False)
+        self.connect_delay = connect_delay
+        self.request_delay = request_delay
+        self.counts = {'connections': 0, 'requests': 0}
+        self.posts = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self.register_multicall_functions()
+        for name, function in {
+            'mt.supportedMethods': self.supported_methods,
+            'wp.newPost': self.new_post,
+            'wp.editPost': self.edit_post,
+            'wp.deletePost': self.delete_post,
+            'wp.getPosts': self.get_posts,
+            'wp.getTerms': self.get_terms
+        }.items():
+            self.register_function(function, name)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/xmlrpc.php'
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {'connections': 0, 'requests': 0}
+
+    def supported_methods(self):
+        return list(self.funcs)
+
+    def new_post(self, blog_id, username, password, content):
+        self._login(username, password)
+        if content.get('post_title') == 'reject':
+            raise Fault(500, 'Sorry, you are not allowed to publish this post.')
+        post_id = str(next(self._ids))
+        with self._lock:
+            self.posts[post_id] = dict(content, post_id=post_id)
+        return post_id
+
+    def edit_post(self, blog_id, username, password, post_id, content):
+        self._login(username, password)
+        # WordPress takes the id as an int or a string
+        post_id = str(post_id)
+        with self._lock:
+            if post_id not in self.posts:
+                raise Fault(404, 'Invalid post ID.')
+            self.posts[post_id].update(content)
+        return True
+
+    def delete_post(self, blog_id, username, password, post_id):
+        self._login(username, password)
+        post_id = str(post_id)
+        with self._lock:
+            if self.posts.pop(post_id, None) is None:
+                raise Fault(404, 'Invalid post ID.')
+        return True
+
+    def get_posts(self, blog_id, username, password, filter=None, fields=None):
+        self._login(username, password)
+        number = (filter or {}).get('number', 10)
+        with self._lock:
+            return list(self.posts.values())[:number]
+
+    def get_terms(self, blog_id, username, password, taxonomy, filter=None):
+        self._login(username, password)
+        return [{'term_id': '1', 'name': 'Blog', 'slug': 'blog', 'taxonomy': taxonomy,
+                 'term_group': '0', 'term_taxonomy_id': '1', 'description': '', 'parent': '0', 'count': 0}]
+
+    @staticmethod
+    def _login(username, password):
+        if (username, password) != (USERNAME, PASSWORD):
+            raise Fault(403, 'Incorrect username or password.')
+
+def start(port=0, connect_delay=0.02, request_delay=0.005):
+    """Run a server in a background thread and return it"""
+    server = FakeWordPressServer(port, connect_delay, request_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    server = FakeWordPressServer(int(sys.argv[1]) if len(sys.argv) > 1 else 8090)
+    print(f'Fake WordPress XML-RPC on {server.url} (user {USERNAME}, password {PASSWORD})')
+    server.serve_forever()
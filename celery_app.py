@@ -0,0 +1,33 @@
+import os
+from celery import Celery
+
+# How often the beat scheduler hands a slice of channels to the stats refresh
+STATS_REFRESH_TICK = int(os.getenv('STATS_REFRESH_TICK_SECONDS', 15 * 60))
+
+# Configured against the Flask app by init_celery() in app.py
+celery = Celery('dupetube')
+
+def init_celery(app):
+    """Configure Celery from the Flask app and run tasks inside its app context"""
+    celery.conf.update(
+        broker_url=app.config['CELERY_BROKER_URL'],
+        result_backend=app.config['CELERY_RESULT_BACKEND'],
+        task_always_eager=app.config['CELERY_TASK_ALWAYS_EAGER'],
+        task_ignore_result=True,
+        task_acks_late=True,
+        worker_prefetch_multiplier=1,
+        beat_schedule={
+            'refresh-stale-statistics': {
+                'task': 'channels.refresh_stale_statistics',
+                'schedule': STATS_REFRESH_TICK
+            }
+        }
+    )
+    
+    class ContextTask(celery.Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+    
+    celery.Task = ContextTask
+    return celery
@@ -0,0 +1,164 @@
+"""
+Schema migrations for databases created before a model change.
+
+db.create_all() only creates missing tables, so columns and indexes added to
+existing tables are applied here. Every step is idempotent and steps run in
+order; the highest applied version is kept in the schema_version table.
+"""
+
+from sqlalchemy import inspect, text
+from models import db, compress_text, decompress_text
+from services.minhash import MinHashLSH, signature, band_buckets
+
+def _add_columns(connection, table, columns):
+    existing = {column['name'] for column in inspect(connection).get_columns(table)}
+    for name, ddl in columns:
+        if name not in existing:
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+
+def _create_indexes(connection, indexes):
+    for name, table, columns in indexes:
+        connection.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
+
+def sync_columns(connection):
+    """Columns added for incremental sync and statistics refresh"""
+    _add_columns(connection, 'channel', [
+        ('uploads_playlist_id', 'VARCHAR(50)'),
+        ('last_video_id', 'VARCHAR(50)'),
+        ('last_video_published_at', 'TIMESTAMP'),
+        ('stats_refreshed_at', 'TIMESTAMP'),
+    ])
+    _add_columns(connection, 'job', [
+        ('videos_updated', 'INTEGER DEFAULT 0'),
+    ])
+
+def query_indexes(connection):
+    """Composite indexes matching the list and lookup queries"""
+    _create_indexes(connection, [
+        ('ix_channel_user_id_channel_id', 'channel', 'user_id, channel_id'),
+        ('ix_video_channel_id_published_at', 'video', 'channel_id, published_at'),
+        ('ix_blog_post_user_id_status_created_at', 'blog_post', 'user_id, status, created_at'),
+        ('ix_blog_post_user_id_created_at', 'blog_post', 'user_id, created_at'),
+        ('ix_blog_post_video_id_user_id', 'blog_post', 'video_id, user_id'),
+    ])
+
+def compress_transcripts(connection):
+    """Move inline video.transcript text into compressed video_transcript rows"""
+    if 'transcript' not in {column['name'] for column in inspect(connection).get_columns('video')}:
+        return
+
+    last_id = 0
+    while True:
+        rows = connection.execute(text(
+            'SELECT id, transcript FROM video '
+            'WHERE id > :last_id AND transcript IS NOT NULL AND transcript != \'\' '
+            'ORDER BY id LIMIT 500'
+        ), {'last_id': last_id}).all()
+        if not rows:
+            break
+        blobs = []
+        for video_id, transcript in rows:
+            codec, data = compress_text(transcript)
+            blobs.append({
+                'video_id': video_id,
+                'codec': codec,
+                'data': data,
+                'raw_size': len(transcript.encode('utf-8'))
+            })
+        connection.execute(text(
+            'INSERT INTO video_transcript (video_id, codec, data, raw_size) '
+            'VALUES (:video_id, :codec, :data, :raw_size)'
+        ), blobs)
+        last_id = rows[-1][0]
+
+    # The legacy column is emptied rather than dropped (SQLite before 3.35
+    # cannot drop columns); VACUUM afterwards to reclaim the space
+    connection.execute(text('UPDATE video SET transcript = NULL WHERE transcript IS NOT NULL'))
+
+def transcript_timing(connection):
+    """Segment timing stored next to the compressed transcript text"""
+    _add_columns(connection, 'video_transcript', [
+        ('timing', 'BLOB' if connection.dialect.name == 'sqlite' else 'BYTEA'),
+    ])
+
+def transcript_status_columns(connection):
+    """Caption fetch outcome per video, so videos without captions are not retried every time"""
+    _add_columns(connection, 'video', [
+        ('transcript_status', 'VARCHAR(20)'),
+        ('transcript_checked_at', 'TIMESTAMP'),
+        ('transcript_retry_after', 'TIMESTAMP'),
+    ])
+
+def duplicate_columns(connection):
+    """MinHash signature and near-duplicate link per video"""
+    _add_columns(connection, 'video', [
+        ('minhash', 'BLOB' if connection.dialect.name == 'sqlite' else 'BYTEA'),
+        ('duplicate_of_id', 'INTEGER REFERENCES video(id) ON DELETE SET NULL'),
+    ])
+
+def minhash_signatures(connection):
+    """Signatures, band buckets and duplicate links for transcripts stored before duplicate detection"""
+    indexes = {}  # user_id -> MinHashLSH of that user's videos
+    order = {}  # video id -> sort key, earliest published first
+
+    last_id = 0
+    while True:
+        rows = connection.execute(text(
+            'SELECT video.id, video.published_at, channel.user_id, video_transcript.codec, video_transcript.data '
+            'FROM video '
+            'JOIN channel ON channel.id = video.channel_id '
+            'JOIN video_transcript ON video_transcript.video_id = video.id '
+            'WHERE video.id > :last_id AND video.minhash IS NULL '
+            'ORDER BY video.id LIMIT 500'
+        ), {'last_id': last_id}).all()
+        if not rows:
+            break
+        signatures = []
+        bands = []
+        for video_id, published_at, user_id, codec, data in rows:
+            sig = signature(decompress_text(codec, data))
+            if sig is None:
+                continue
+            signatures.append({'id': video_id, 'minhash': sig.tobytes()})
+            bands.extend({'video_id': video_id, 'user_id': user_id, 'bucket': bucket} for bucket in band_buckets(sig))
+            indexes.setdefault(user_id, MinHashLSH()).insert(video_id, sig)
+            order[video_id] = (published_at is None, published_at or '', video_id)
+        if signatures:
+            connection.execute(text('UPDATE video SET minhash = :minhash WHERE id = :id'), signatures)
+            connection.execute(text(
+                'INSERT INTO video_band (video_id, user_id, bucket) VALUES (:video_id, :user_id, :bucket)'
+            ), bands)
+        last_id = rows[-1][0]
+
+    # Each video repeating an earlier one points at the earliest
+    links = []
+    for index in indexes.values():
+        for video_id, sig in index.signatures.items():
+            earlier = [other for other, _ in index.query(sig) if order[other] < order[video_id]]
+            if earlier:
+                links.append({'id': video_id, 'duplicate_of_id': min(earlier, key=order.get)})
+    if links:
+        connection.execute(text('UPDATE video SET duplicate_of_id = :duplicate_of_id WHERE id = :id'), links)
+
+MIGRATIONS = [
+    (1, sync_columns),
+    (2, query_indexes),
+    (3, compress_transcripts),
+    (4, transcript_timing),
+    (5, transcript_status_columns),
+    (6, duplicate_columns),
+    (7, minhash_signatures),
+]
+
+def run_migrations():
+    """Apply pending migrations; safe to call on every startup"""
+    with db.engine.begin() as connection:
+        connection.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+        current = connection.execute(text('SELECT max(version) FROM schema_version')).scalar() or 0
+
+        for version, migration in MIGRATIONS:
+            if version > current:
+                print(f"Applying migration {version}: {migration.__name__}")
+                migration(connection)
+                connection.execute(text('INSERT INTO schema_version (version) VALUES (:version)'),
+                                   {'version': version})
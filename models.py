@@ -1,8 +1,50 @@
+import json
+import uuid
+import zlib
 from datetime import datetime
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import deferred
+from services.transcript_segments import TranscriptSegments
 from werkzeug.security import generate_password_hash, check_password_hash
 
-# db will be set from app.py
-db = None
+try:
+    import zstandard
+except ImportError:  # optional: transcripts fall back to zlib
+    zstandard = None
+
+# Bound to the Flask app by db.init_app() in app.py
+db = SQLAlchemy()
+
+def compress_bytes(raw, codec=None):
+    """Compress bytes for blob storage; returns (codec, data)"""
+    codec = codec or ('zstd' if zstandard is not None else 'zlib')
+    if codec == 'zstd':
+        return codec, zstandard.ZstdCompressor(level=10).compress(raw)
+    return codec, zlib.compress(raw, 9)
+
+def decompress_bytes(codec, data):
+    """Inverse of compress_bytes"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read zstd-compressed transcripts')
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    raise ValueError(f'Unknown codec: {codec}')
+
+def compress_text(value):
+    return compress_bytes(value.encode('utf-8'))
+
+def decompress_text(codec, data):
+    return decompress_bytes(codec, data).decode('utf-8')
+
+def serialize_fields(obj, fields):
+    """Serialize the named attributes of obj, touching no other columns"""
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -38,10 +80,14 @@ class User(db.Model):
         }
 
 class Channel(db.Model):
+    # Lookups by owner, and by owner plus YouTube id when adding a channel
+    __table_args__ = (db.Index('ix_channel_user_id_channel_id', 'user_id', 'channel_id'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     channel_id = db.Column(db.String(50), nullable=False)
     channel_url = db.Column(db.String(200), nullable=False)
+    uploads_playlist_id = db.Column(db.String(50))
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     subscriber_count = db.Column(db.Integer, default=0)
@@ -50,6 +96,13 @@ class Channel(db.Model):
     indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_sync = db.Column(db.DateTime)
     
+    # High-water mark for incremental sync: newest upload seen so far
+    last_video_id = db.Column(db.String(50))
+    last_video_published_at = db.Column(db.DateTime)
+    
+    # Last time view/like/comment counts of stored videos were refreshed
+    stats_refreshed_at = db.Column(db.DateTime)
+    
     # Relationships
     videos = db.relationship('Video', backref='channel', lazy=True, cascade='all, delete-orphan')
     
@@ -64,15 +117,19 @@ class Channel(db.Model):
             'video_count': self.video_count,
             'view_count': self.view_count,
             'indexed_at': self.indexed_at.isoformat() if self.indexed_at else None,
-            'last_sync': self.last_sync.isoformat() if self.last_sync else None
+            'last_sync': self.last_sync.isoformat() if self.last_sync else None,
+            'last_video_published_at': self.last_video_published_at.isoformat() if self.last_video_published_at else None
         }
 
 class Video(db.Model):
+    # Per-channel listings newest first; also serves the join from Channel
+    __table_args__ = (db.Index('ix_video_channel_id_published_at', 'channel_id', 'published_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     channel_id = db.Column(db.Integer, db.ForeignKey('channel.id'), nullable=False)
     video_id = db.Column(db.String(50), nullable=False, unique=True)
     title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text)
+    description = deferred(db.Column(db.Text))
     thumbnail_url = db.Column(db.String(300))
     duration = db.Column(db.String(20))
     view_count = db.Column(db.BigInteger, default=0)
@@ -82,39 +139,168 @@ class Video(db.Model):
     tags = db.Column(db.Text)  # JSON string of tags
     category_id = db.Column(db.String(10))
     
-    # Content processing
-    transcript = db.Column(db.Text)
+    # Content processing (the transcript itself lives in VideoTranscript)
+    transcript_status = db.Column(db.String(20))  # available, unavailable, error; None until checked
+    transcript_checked_at = db.Column(db.DateTime)
+    transcript_retry_after = db.Column(db.DateTime)  # don't fetch captions again before this
     summary = db.Column(db.Text)
     key_points = db.Column(db.Text)  # JSON string
     blog_ready = db.Column(db.Boolean, default=False)
     
+    # Near-duplicate detection: MinHash signature of the transcript (uint32
+    # array) and the earlier video it was found to repeat, if any
+    minhash = deferred(db.Column(db.LargeBinary))
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('video.id', ondelete='SET NULL'))
+    
     # Relationships
     blog_posts = db.relationship('BlogPost', backref='video', lazy=True)
+    transcript_segments = db.relationship('TranscriptSegment', backref='video', lazy=True,
+                                          cascade='all, delete-orphan', order_by='TranscriptSegment.start')
+    transcript_data = db.relationship('VideoTranscript', uselist=False, lazy='select',
+                                      cascade='all, delete-orphan')
+    vector = db.relationship('VideoVector', uselist=False, lazy='select', cascade='all, delete-orphan')
+    bands = db.relationship('VideoBand', lazy=True, cascade='all, delete-orphan')
+    
+    @property
+    def transcript(self):
+        """Full transcript text, fetched and decompressed on access"""
+        if self.transcript_data is None:
+            return None
+        return self.transcript_data.text
+    
+    @transcript.setter
+    def transcript(self, value):
+        if not value:
+            self.transcript_data = None
+        elif self.transcript_data is None:
+            self.transcript_data = VideoTranscript(text=value)
+        else:
+            self.transcript_data.text = value
+    
+    @property
+    def segments(self):
+        """Timed transcript as TranscriptSegments, or None"""
+        if self.transcript_data is None:
+            return None
+        return self.transcript_data.segments
+    
+    @segments.setter
+    def segments(self, value):
+        if not value:
+            self.transcript_data = None
+        elif self.transcript_data is None:
+            self.transcript_data = VideoTranscript(segments=value)
+        else:
+            self.transcript_data.segments = value
+    
+    # Keys of to_dict(); each one is a column, so list endpoints can turn
+    # ?fields= into load_only()
+    FIELDS = (
+        'id', 'video_id', 'title', 'description', 'thumbnail_url', 'duration',
+        'view_count', 'like_count', 'comment_count', 'published_at', 'tags',
+        'category_id', 'summary', 'blog_ready', 'transcript_status', 'duplicate_of_id'
+    )
+    
+    def to_dict(self, fields=None):
+        return serialize_fields(self, fields or self.FIELDS)
+
+class VideoTranscript(db.Model):
+    """Compressed transcript text, kept out of the video row so scans skip it"""
+    video_id = db.Column(db.Integer, db.ForeignKey('video.id'), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False)  # zlib, zstd; applies to data and timing
+    data = db.Column(db.LargeBinary, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False)  # uncompressed UTF-8 bytes
+    timing = db.Column(db.LargeBinary)  # TranscriptSegments arrays without text; None if untimed
+    
+    def __init__(self, text=None, segments=None, **kwargs):
+        super().__init__(**kwargs)
+        if segments is not None:
+            self.segments = segments
+        elif text is not None:
+            self.text = text
+    
+    @property
+    def text(self):
+        return decompress_text(self.codec, self.data)
+    
+    @text.setter
+    def text(self, value):
+        self.codec, self.data = compress_text(value)
+        self.raw_size = len(value.encode('utf-8'))
+        self.timing = None
+    
+    @property
+    def segments(self):
+        """The transcript as TranscriptSegments, or None if it was stored without timing"""
+        if self.timing is None:
+            return None
+        return TranscriptSegments.from_bytes(decompress_bytes(self.codec, self.timing), self.text)
+    
+    @segments.setter
+    def segments(self, value):
+        self.text = value.text
+        self.timing = compress_bytes(value.to_bytes(include_text=False), self.codec)[1]
+
+class VideoVector(db.Model):
+    """Hashed term frequencies of a video's text, for similarity search
+
+    IDF weights are not stored; they change as the library grows and are
+    applied when the index is queried.
+    """
+    # Index refreshes read a user's vectors changed since the last one
+    __table_args__ = (db.Index('ix_video_vector_user_id_updated_at', 'user_id', 'updated_at'),)
+    
+    video_id = db.Column(db.Integer, db.ForeignKey('video.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # owner, for tenant filtering
+    terms = db.Column(db.LargeBinary, nullable=False)  # uint32 feature ids, ascending
+    weights = db.Column(db.LargeBinary, nullable=False)  # float32 sublinear term frequencies
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class VideoBand(db.Model):
+    """One LSH band bucket of a video's MinHash signature
+
+    Videos sharing any bucket are near-duplicate candidates, so finding them
+    is an indexed lookup of a video's 16 buckets rather than a library scan.
+    """
+    __table_args__ = (db.Index('ix_video_band_user_id_bucket', 'user_id', 'bucket'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # owner, for tenant filtering
+    bucket = db.Column(db.BigInteger, nullable=False)
+
+class TranscriptSegment(db.Model):
+    """One timed caption line, indexed for full-text transcript search"""
+    __table_args__ = (db.Index('ix_transcript_segment_video_id_start', 'video_id', 'start'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)  # owner, for tenant filtering
+    start = db.Column(db.Float, nullable=False)  # seconds from the start of the video
+    duration = db.Column(db.Float, default=0.0)
+    text = db.Column(db.Text, nullable=False)
     
     def to_dict(self):
         return {
-            'id': self.id,
-            'video_id': self.video_id,
-            'title': self.title,
-            'description': self.description,
-            'thumbnail_url': self.thumbnail_url,
+            'start': self.start,
             'duration': self.duration,
-            'view_count': self.view_count,
-            'like_count': self.like_count,
-            'comment_count': self.comment_count,
-            'published_at': self.published_at.isoformat() if self.published_at else None,
-            'tags': self.tags,
-            'category_id': self.category_id,
-            'summary': self.summary,
-            'blog_ready': self.blog_ready
+            'text': self.text
         }
 
 class BlogPost(db.Model):
+    __table_args__ = (
+        # Post listings, optionally filtered by status, newest first
+        db.Index('ix_blog_post_user_id_status_created_at', 'user_id', 'status', 'created_at'),
+        db.Index('ix_blog_post_user_id_created_at', 'user_id', 'created_at'),
+        # "Does this video already have a post?" checks
+        db.Index('ix_blog_post_video_id_user_id', 'video_id', 'user_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    content = deferred(db.Column(db.Text, nullable=False))
     excerpt = db.Column(db.Text)
     status = db.Column(db.String(20), default='draft')  # draft, published, scheduled
     wordpress_post_id = db.Column(db.Integer)
@@ -122,16 +308,59 @@ class BlogPost(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keys of to_dict(); each one is a column
+    FIELDS = (
+        'id', 'video_id', 'title', 'content', 'excerpt', 'status',
+        'wordpress_post_id', 'published_at', 'created_at', 'updated_at'
+    )
+    
+    def to_dict(self, fields=None):
+        return serialize_fields(self, fields or self.FIELDS)
+
+class Job(db.Model):
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    channel_id = db.Column(db.Integer, db.ForeignKey('channel.id'))
+    job_type = db.Column(db.String(20), nullable=False)  # index, sync, refresh_stats, transcripts
+    status = db.Column(db.String(20), default='queued')  # queued, running, deferred, completed, failed
+    
+    # Progress counters
+    pages_fetched = db.Column(db.Integer, default=0)
+    videos_inserted = db.Column(db.Integer, default=0)
+    videos_updated = db.Column(db.Integer, default=0)
+    posts_generated = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text)  # JSON string of error messages
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def add_error(self, message):
+        errors = json.loads(self.errors) if self.errors else []
+        errors.append(message)
+        self.errors = json.dumps(errors)
+    
     def to_dict(self):
         return {
             'id': self.id,
-            'video_id': self.video_id,
-            'title': self.title,
-            'content': self.content,
-            'excerpt': self.excerpt,
+            'channel_id': self.channel_id,
+            'job_type': self.job_type,
             'status': self.status,
-            'wordpress_post_id': self.wordpress_post_id,
-            'published_at': self.published_at.isoformat() if self.published_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
\ No newline at end of file
+            'pages_fetched': self.pages_fetched or 0,
+            'videos_inserted': self.videos_inserted or 0,
+            'videos_updated': self.videos_updated or 0,
+            'posts_generated': self.posts_generated or 0,
+            'errors': json.loads(self.errors) if self.errors else [],
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class QuotaUsage(db.Model):
+    """YouTube Data API units spent per Pacific-time day and method"""
+    __table_args__ = (db.UniqueConstraint('day', 'method'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.String(10), nullable=False)  # YYYY-MM-DD
+    method = db.Column(db.String(100), nullable=False)
+    units = db.Column(db.Integer, default=0, nullable=False)
\ No newline at end of file
@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify
+import json
+import time
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, Channel, Video, BlogPost
 from services.blog_service import BlogService
+from services.bulk_pipeline import BulkGenerationPipeline
+from services.duplicate_service import DuplicateService, DUPLICATE_POLICIES, DUPLICATE_POLICY
+from services.pagination import keyset_paginate, clamp_per_page, parse_fields, load_fields
+from sqlalchemy.orm import undefer, selectinload
 from datetime import datetime
 
 blog_bp = Blueprint('blog', __name__)
@@ -13,14 +19,31 @@ def get_blog_posts():
     try:
         user_id = get_jwt_identity()
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = clamp_per_page(request.args.get('per_page', 20, type=int))
         status = request.args.get('status')  # draft, published, scheduled
+        # Sparse fieldsets: leave out content to skip loading post bodies
+        fields = parse_fields(BlogPost, request.args.get('fields'))
         
         query = BlogPost.query.filter_by(user_id=user_id)
         
         if status:
             query = query.filter_by(status=status)
         
+        query = load_fields(query, BlogPost, fields, always=[BlogPost.created_at])
+        
+        # Opt-in cursor mode: pass ?cursor= (empty for the first page)
+        if 'cursor' in request.args:
+            posts, pagination = keyset_paginate(
+                query, BlogPost.created_at, BlogPost.id,
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                include_total=request.args.get('include_total', 'false').lower() == 'true'
+            )
+            return jsonify({
+                'posts': [post.to_dict(fields) for post in posts],
+                'pagination': pagination
+            }), 200
+        
         posts = query.order_by(BlogPost.created_at.desc()).paginate(
             page=page,
             per_page=per_page,
@@ -28,7 +51,7 @@ def get_blog_posts():
         )
         
         return jsonify({
-            'posts': [post.to_dict() for post in posts.items],
+            'posts': [post.to_dict(fields) for post in posts.items],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -39,6 +62,8 @@ def get_blog_posts():
             }
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -104,6 +129,59 @@ def generate_blog_post():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@blog_bp.route('/generate/stream', methods=['POST'])
+@jwt_required()
+def stream_blog_post():
+    """Generate a blog post, streaming the title and body as server-sent events"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json()
+        video_id = data.get('video_id')
+        
+        if not video_id:
+            return jsonify({'error': 'Video ID is required'}), 400
+        
+        # Get video and verify ownership; generation reads the description and transcript
+        video = db.session.query(Video).join(Channel).filter(
+            Video.id == video_id,
+            Channel.user_id == user_id
+        ).options(undefer(Video.description)).first()
+        
+        if not video:
+            return jsonify({'error': 'Video not found'}), 404
+        
+        existing_post = BlogPost.query.filter_by(video_id=video_id, user_id=user_id).first()
+        
+        def events():
+            if existing_post:
+                yield {'event': 'post', 'post': existing_post.to_dict(), 'existing': True}
+                return
+            try:
+                yield from BlogService().stream_blog_post(video, user)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error streaming blog post for video {video_id}: {e}")
+                yield {'event': 'error', 'error': str(e)}
+        
+        def messages():
+            for event in events():
+                name = event.pop('event')
+                yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+        
+        return Response(stream_with_context(messages()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx from buffering the stream
+            'X-Accel-Buffering': 'no'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @blog_bp.route('/posts/<int:post_id>', methods=['PUT'])
 @jwt_required()
 def update_blog_post(post_id):
@@ -175,6 +253,54 @@ def publish_blog_post(post_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@blog_bp.route('/posts/publish', methods=['POST'])
+@jwt_required()
+def publish_blog_posts():
+    """Publish several blog posts to WordPress in system.multicall batches"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json()
+        post_ids = data.get('post_ids', [])
+        
+        if not post_ids:
+            return jsonify({'error': 'Post IDs are required'}), 400
+        
+        if not user.wordpress_url:
+            return jsonify({'error': 'WordPress configuration not found'}), 400
+        
+        # Verify ownership; publishing sends the content
+        blog_posts = BlogPost.query.filter(
+            BlogPost.id.in_(post_ids),
+            BlogPost.user_id == user_id
+        ).options(undefer(BlogPost.content)).order_by(BlogPost.id).all()
+        
+        if len(blog_posts) != len(set(post_ids)):
+            return jsonify({'error': 'Some blog posts not found or not accessible'}), 404
+        
+        # Posts already on WordPress are edited rather than published twice;
+        # each batch is committed as it returns
+        results = []
+        for post, result in BlogService().publish_many_to_wordpress(blog_posts, user):
+            if isinstance(result, Exception):
+                results.append({'post_id': post.id, 'success': False, 'error': str(result)})
+            else:
+                results.append({'post_id': post.id, 'success': True, 'wordpress_post_id': result})
+        
+        published = sum(1 for result in results if result['success'])
+        return jsonify({
+            'message': f'Published {published} of {len(results)} blog posts',
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @blog_bp.route('/posts/<int:post_id>', methods=['DELETE'])
 @jwt_required()
 def delete_blog_post(post_id):
@@ -211,33 +337,95 @@ def bulk_generate_posts():
         if not video_ids:
             return jsonify({'error': 'Video IDs are required'}), 400
         
-        # Get videos and verify ownership
+        # Videos repeating another one's transcript: 'generate', 'skip' or 'merge'
+        policy = data.get('duplicates', DUPLICATE_POLICY)
+        if policy not in DUPLICATE_POLICIES:
+            return jsonify({'error': f"duplicates must be one of {', '.join(DUPLICATE_POLICIES)}"}), 400
+        
+        # Get videos and verify ownership; generation reads the description and transcript
         videos = db.session.query(Video).join(Channel).filter(
             Video.id.in_(video_ids),
             Channel.user_id == user_id
-        ).all()
+        ).options(undefer(Video.description), selectinload(Video.transcript_data)).all()
         
         if len(videos) != len(video_ids):
             return jsonify({'error': 'Some videos not found or not accessible'}), 404
         
         blog_service = BlogService()
-        generated_posts = []
         
-        for video in videos:
-            # Skip if blog post already exists
-            existing_post = BlogPost.query.filter_by(video_id=video.id, user_id=user_id).first()
-            if existing_post:
-                continue
-            
-            try:
-                blog_post = blog_service.generate_blog_post(video, user)
-                generated_posts.append(blog_post.to_dict())
-            except Exception as e:
-                print(f"Failed to generate blog post for video {video.id}: {e}")
+        # Skip videos that already have a post
+        existing = {
+            video_id for (video_id,) in db.session.query(BlogPost.video_id).filter(
+                BlogPost.user_id == user_id,
+                BlogPost.video_id.in_(video_ids)
+            )
+        }
+        pending = {video.id: video for video in videos if video.id not in existing}
+        snapshots = [blog_service.snapshot_video(video) for video in pending.values()]
+        
+        # Captions, summaries and post content are produced by overlapping
+        # stage thread pools; each post is saved here on the request thread.
+        # Videos whose transcript repeats one with a post, or an earlier one
+        # in this batch, skip the model calls
+        duplicates = DuplicateService().post_index(user_id) if policy != 'generate' else None
+        pipeline = BulkGenerationPipeline(blog_service, duplicates=duplicates)
+        
+        def events():
+            yield {'event': 'started', 'total': len(snapshots), 'skipped': len(existing)}
+            for item in pipeline.run(snapshots):
+                video_id = item['snapshot'].id
+                if item['error']:
+                    print(f"Failed to generate blog post for video {video_id}: {item['error']}")
+                    yield {'event': 'failed', 'video_id': video_id, 'stage': item['failed_stage'], 'error': item['error']}
+                    continue
+                
+                start = time.perf_counter()
+                try:
+                    duplicate_of = item['snapshot'].duplicate_of
+                    if duplicate_of:
+                        blog_post = blog_service.save_duplicate(pending[video_id], user, item, policy)
+                        pipeline.record_write(time.perf_counter() - start)
+                        yield {'event': 'duplicate', 'video_id': video_id, 'duplicate_of': duplicate_of,
+                               'policy': policy, 'post': blog_post.to_dict() if blog_post else None}
+                        continue
+                    
+                    blog_post = blog_service.save_blog_post(pending[video_id], user, item)
+                    pipeline.record_write(time.perf_counter() - start)
+                    yield {'event': 'post', 'video_id': video_id, 'post': blog_post.to_dict(),
+                           'stages': pipeline.stage_stats()}
+                except Exception as e:
+                    db.session.rollback()
+                    pipeline.record_write(time.perf_counter() - start, failed=True)
+                    print(f"Failed to generate blog post for video {video_id}: {e}")
+                    yield {'event': 'failed', 'video_id': video_id, 'stage': 'write', 'error': str(e)}
+            yield {'event': 'done', 'stages': pipeline.stage_stats()}
+        
+        # ?stream=true or Accept: application/x-ndjson streams one event per line
+        if request.args.get('stream', 'false').lower() == 'true' or \
+                request.accept_mimetypes.best == 'application/x-ndjson':
+            lines = (json.dumps(event) + '\n' for event in events())
+            return Response(stream_with_context(lines), status=201, mimetype='application/x-ndjson')
+        
+        generated_posts = []
+        duplicate_videos = []
+        stages = {}
+        for event in events():
+            if event['event'] == 'post':
+                generated_posts.append(event['post'])
+            elif event['event'] == 'duplicate':
+                duplicate_videos.append({
+                    'video_id': event['video_id'],
+                    'duplicate_of': event['duplicate_of'],
+                    'post_id': event['post']['id'] if event['post'] else None
+                })
+            elif event['event'] == 'done':
+                stages = event['stages']
         
         return jsonify({
             'message': f'Generated {len(generated_posts)} blog posts',
-            'posts': generated_posts
+            'posts': generated_posts,
+            'duplicates': duplicate_videos,
+            'stages': stages
         }), 201
         
     except Exception as e:
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Channel, Video
+from models import db, User, Channel, Job
 from services.youtube_service import YouTubeService
+from services.quota_service import QuotaExceededError
+from tasks import index_channel_task, sync_channel_task, refresh_stats_task, backfill_transcripts_task
 from datetime import datetime
 import re
 
@@ -46,6 +48,7 @@ def add_channel():
             user_id=user_id,
             channel_id=channel_id,
             channel_url=channel_url,
+            uploads_playlist_id=channel_info.get('uploads_playlist_id'),
             title=channel_info.get('title', ''),
             description=channel_info.get('description', ''),
             subscriber_count=channel_info.get('subscriber_count', 0),
@@ -62,6 +65,8 @@ def add_channel():
             'channel': channel.to_dict()
         }), 201
         
+    except QuotaExceededError as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -83,7 +88,7 @@ def get_channels():
 @channels_bp.route('/<int:channel_id>/index', methods=['POST'])
 @jwt_required()
 def index_channel_videos(channel_id):
-    """Index all videos from a channel"""
+    """Queue a background job that indexes all videos from a channel"""
     try:
         user_id = get_jwt_identity()
         channel = Channel.query.filter_by(id=channel_id, user_id=user_id).first()
@@ -91,43 +96,15 @@ def index_channel_videos(channel_id):
         if not channel:
             return jsonify({'error': 'Channel not found'}), 404
         
-        youtube_service = YouTubeService()
-        videos_data = youtube_service.get_channel_videos(channel.channel_id)
-        
-        indexed_count = 0
-        for video_data in videos_data:
-            # Check if video already exists
-            existing_video = Video.query.filter_by(video_id=video_data['video_id']).first()
-            if existing_video:
-                continue
-            
-            # Create video record
-            video = Video(
-                channel_id=channel.id,
-                video_id=video_data['video_id'],
-                title=video_data['title'],
-                description=video_data['description'],
-                thumbnail_url=video_data['thumbnail_url'],
-                duration=video_data['duration'],
-                view_count=video_data['view_count'],
-                like_count=video_data['like_count'],
-                comment_count=video_data['comment_count'],
-                published_at=video_data['published_at'],
-                tags=video_data['tags'],
-                category_id=video_data['category_id']
-            )
-            
-            db.session.add(video)
-            indexed_count += 1
-        
-        # Update channel sync time
-        channel.last_sync = datetime.utcnow()
-        db.session.commit()
+        # Only uploads newer than the channel watermark are fetched unless ?full=true
+        full = request.args.get('full', 'false').lower() == 'true'
+        job = enqueue_channel_job(index_channel_task, user_id, channel, 'index', full=full)
         
         return jsonify({
-            'message': f'Indexed {indexed_count} new videos',
-            'indexed_count': indexed_count
-        }), 200
+            'message': 'Indexing started',
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -135,71 +112,83 @@ def index_channel_videos(channel_id):
 @channels_bp.route('/<int:channel_id>/sync', methods=['POST'])
 @jwt_required()
 def sync_channel(channel_id):
-    """Sync channel for new videos and auto-create blog posts if enabled"""
+    """Queue a background job that syncs new videos and auto-creates blog posts if enabled"""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
         channel = Channel.query.filter_by(id=channel_id, user_id=user_id).first()
         
         if not channel:
             return jsonify({'error': 'Channel not found'}), 404
         
-        # Index new videos
-        youtube_service = YouTubeService()
-        videos_data = youtube_service.get_channel_videos(channel.channel_id, limit=10)  # Get recent videos
-        
-        new_videos = []
-        for video_data in videos_data:
-            existing_video = Video.query.filter_by(video_id=video_data['video_id']).first()
-            if existing_video:
-                continue
-            
-            video = Video(
-                channel_id=channel.id,
-                video_id=video_data['video_id'],
-                title=video_data['title'],
-                description=video_data['description'],
-                thumbnail_url=video_data['thumbnail_url'],
-                duration=video_data['duration'],
-                view_count=video_data['view_count'],
-                like_count=video_data['like_count'],
-                comment_count=video_data['comment_count'],
-                published_at=video_data['published_at'],
-                tags=video_data['tags'],
-                category_id=video_data['category_id']
-            )
-            
-            db.session.add(video)
-            new_videos.append(video)
+        job = enqueue_channel_job(sync_channel_task, user_id, channel, 'sync')
         
-        db.session.commit()
+        return jsonify({
+            'message': 'Sync started',
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 202
         
-        # Auto-create blog posts if enabled
-        auto_created = 0
-        if user.auto_sync_enabled and user.wordpress_url:
-            from services.blog_service import BlogService
-            blog_service = BlogService()
-            
-            for video in new_videos:
-                try:
-                    blog_service.auto_generate_blog_post(video, user)
-                    auto_created += 1
-                except Exception as e:
-                    print(f"Failed to auto-create blog post for video {video.video_id}: {e}")
-        
-        # Update sync time
-        channel.last_sync = datetime.utcnow()
-        db.session.commit()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@channels_bp.route('/<int:channel_id>/refresh-stats', methods=['POST'])
+@jwt_required()
+def refresh_channel_stats(channel_id):
+    """Queue a background job that refreshes statistics of indexed videos"""
+    try:
+        user_id = get_jwt_identity()
+        channel = Channel.query.filter_by(id=channel_id, user_id=user_id).first()
+        
+        if not channel:
+            return jsonify({'error': 'Channel not found'}), 404
+        
+        job = enqueue_channel_job(refresh_stats_task, user_id, channel, 'refresh_stats')
         
         return jsonify({
-            'message': f'Synced {len(new_videos)} new videos',
-            'new_videos': len(new_videos),
-            'auto_created_posts': auto_created
-        }), 200
+            'message': 'Statistics refresh started',
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@channels_bp.route('/<int:channel_id>/transcripts', methods=['POST'])
+@jwt_required()
+def backfill_channel_transcripts(channel_id):
+    """Queue a background job that fetches missing transcripts (?concurrency= caption requests at once)"""
+    try:
+        user_id = get_jwt_identity()
+        channel = Channel.query.filter_by(id=channel_id, user_id=user_id).first()
+        
+        if not channel:
+            return jsonify({'error': 'Channel not found'}), 404
+        
+        concurrency = request.args.get('concurrency', type=int)
+        job = enqueue_channel_job(backfill_transcripts_task, user_id, channel, 'transcripts',
+                                  concurrency=concurrency)
+        
+        return jsonify({
+            'message': 'Transcript backfill started',
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def enqueue_channel_job(task, user_id, channel, job_type, **task_kwargs):
+    """Create a job record and hand it to the task queue"""
+    job = Job(user_id=user_id, channel_id=channel.id, job_type=job_type)
+    db.session.add(job)
+    db.session.commit()
+    
+    task.delay(job.id, **task_kwargs)
+    
+    # Eager execution (in-memory broker) runs the task in its own session
+    db.session.refresh(job)
+    return job
+
 def extract_channel_id(url):
     """Extract YouTube channel ID from various URL formats"""
     patterns = [
@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import Job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Get the status and progress of a background job"""
+    try:
+        user_id = get_jwt_identity()
+        job = Job.query.filter_by(id=job_id, user_id=user_id).first()
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({'job': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
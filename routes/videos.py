@@ -1,11 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Channel, Video
+from models import db, User, Channel, Video, BlogPost
 from services.content_service import ContentService
+from services.search_service import SearchService
+from services.transcript_backfill import TranscriptBackfill
+from services.similarity_service import SimilarityService
+from services.duplicate_service import DuplicateService
+from services.pagination import keyset_paginate, clamp_per_page, encode_cursor, decode_offset_cursor, parse_fields, load_fields
 from datetime import datetime
 
 videos_bp = Blueprint('videos', __name__)
 
+# Fields of each entry in a video's related_videos list
+RELATED_FIELDS = ('id', 'video_id', 'title', 'thumbnail_url', 'published_at')
+
 @videos_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_videos():
@@ -13,14 +21,31 @@ def get_videos():
     try:
         user_id = get_jwt_identity()
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = clamp_per_page(request.args.get('per_page', 20, type=int))
         channel_id = request.args.get('channel_id', type=int)
+        # Sparse fieldsets: ?fields=id,title,thumbnail_url selects only those columns
+        fields = parse_fields(Video, request.args.get('fields'))
         
         query = db.session.query(Video).join(Channel).filter(Channel.user_id == user_id)
         
         if channel_id:
             query = query.filter(Video.channel_id == channel_id)
         
+        query = load_fields(query, Video, fields, always=[Video.published_at])
+        
+        # Opt-in cursor mode: pass ?cursor= (empty for the first page)
+        if 'cursor' in request.args:
+            videos, pagination = keyset_paginate(
+                query, Video.published_at, Video.id,
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                include_total=request.args.get('include_total', 'false').lower() == 'true'
+            )
+            return jsonify({
+                'videos': [video.to_dict(fields) for video in videos],
+                'pagination': pagination
+            }), 200
+        
         query = query.order_by(Video.published_at.desc())
         
         videos = query.paginate(
@@ -30,7 +55,7 @@ def get_videos():
         )
         
         return jsonify({
-            'videos': [video.to_dict() for video in videos.items],
+            'videos': [video.to_dict(fields) for video in videos.items],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -41,6 +66,8 @@ def get_videos():
             }
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -58,7 +85,95 @@ def get_video(video_id):
         if not video:
             return jsonify({'error': 'Video not found'}), 404
         
-        return jsonify({'video': video.to_dict()}), 200
+        # ?related=0 leaves out the related videos
+        related = request.args.get('related', 5, type=int)
+        similar = SimilarityService().similar_videos(
+            user_id, video, limit=clamp_per_page(related), fields=RELATED_FIELDS
+        ) if related > 0 else []
+        
+        return jsonify({
+            'video': video.to_dict(),
+            'related_videos': [
+                dict(other.to_dict(RELATED_FIELDS), score=round(score, 4)) for other, score in similar
+            ]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@videos_bp.route('/similar', methods=['GET'])
+@jwt_required()
+def similar_videos():
+    """Videos most similar to a piece of text (?q=) or to another video (?video_id=)"""
+    try:
+        user_id = get_jwt_identity()
+        query_text = request.args.get('q', '').strip()
+        video_id = request.args.get('video_id', type=int)
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        fields = parse_fields(Video, request.args.get('fields'))
+        
+        similarity_service = SimilarityService()
+        if video_id:
+            video = db.session.query(Video).join(Channel).filter(
+                Video.id == video_id,
+                Channel.user_id == user_id
+            ).first()
+            if not video:
+                return jsonify({'error': 'Video not found'}), 404
+            results = similarity_service.similar_videos(user_id, video, limit=limit, fields=fields)
+        elif query_text:
+            results = similarity_service.search(user_id, query_text, limit=limit, fields=fields)
+        else:
+            return jsonify({'error': 'Search query or video ID is required'}), 400
+        
+        return jsonify({
+            'videos': [
+                dict(video.to_dict(fields), score=round(score, 4))
+                for video, score in results
+            ],
+            'query': query_text or None,
+            'video_id': video_id
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@videos_bp.route('/<int:video_id>/duplicates', methods=['GET'])
+@jwt_required()
+def get_duplicates(video_id):
+    """Videos whose transcripts nearly repeat this one's, with their blog posts"""
+    try:
+        user_id = get_jwt_identity()
+        video = db.session.query(Video).join(Channel).filter(
+            Video.id == video_id,
+            Channel.user_id == user_id
+        ).first()
+        
+        if not video:
+            return jsonify({'error': 'Video not found'}), 404
+        
+        duplicates = DuplicateService().find_duplicates(user_id, video)
+        posts = {
+            post.video_id: post for post in BlogPost.query.filter(
+                BlogPost.user_id == user_id,
+                BlogPost.video_id.in_([other.id for other, _ in duplicates])
+            )
+        } if duplicates else {}
+        
+        return jsonify({
+            'video_id': video.id,
+            'duplicate_of_id': video.duplicate_of_id,
+            'duplicates': [
+                dict(
+                    other.to_dict(RELATED_FIELDS),
+                    similarity=round(score, 4),
+                    post=posts[other.id].to_dict(['id', 'title', 'status']) if other.id in posts else None
+                )
+                for other, score in duplicates
+            ]
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -79,14 +194,13 @@ def process_video(video_id):
         
         content_service = ContentService()
         
-        # Get transcript
-        if not video.transcript:
-            transcript = content_service.get_video_transcript(video.video_id)
-            video.transcript = transcript
+        # Get transcript and index its timestamped segments; videos known to
+        # have no captions are not asked again until their retry time
+        TranscriptBackfill(content_service=content_service).backfill_video(video)
         
         # Generate summary and key points
         if not video.summary and video.transcript:
-            summary_data = content_service.generate_summary(video.transcript, video.title)
+            summary_data = content_service.generate_summary(video.transcript, video.title, video.segments)
             video.summary = summary_data.get('summary')
             video.key_points = summary_data.get('key_points')
         
@@ -126,44 +240,98 @@ def get_content_suggestions(video_id):
 @videos_bp.route('/search', methods=['GET'])
 @jwt_required()
 def search_videos():
-    """Search videos by title, description, or tags"""
+    """Full-text search over video titles, descriptions and tags, best matches first"""
     try:
         user_id = get_jwt_identity()
         query_text = request.args.get('q', '').strip()
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = clamp_per_page(request.args.get('per_page', 20, type=int))
+        fields = parse_fields(Video, request.args.get('fields'))
         
         if not query_text:
             return jsonify({'error': 'Search query is required'}), 400
         
-        # Search in title, description, and tags
-        search_filter = db.or_(
-            Video.title.ilike(f'%{query_text}%'),
-            Video.description.ilike(f'%{query_text}%'),
-            Video.tags.ilike(f'%{query_text}%')
-        )
+        search_service = SearchService()
         
-        videos = db.session.query(Video).join(Channel).filter(
-            Channel.user_id == user_id,
-            search_filter
-        ).order_by(Video.published_at.desc()).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
+        # Cursor mode: ranked hits have no stable keyset, so the opaque cursor
+        # carries the position in the ranking and no COUNT(*) is run by default
+        if 'cursor' in request.args:
+            offset = decode_offset_cursor(request.args.get('cursor'))
+            include_total = request.args.get('include_total', 'false').lower() == 'true'
+            results, total = search_service.search_videos(
+                user_id, query_text, offset=offset, limit=per_page + 1, include_total=include_total,
+                fields=fields
+            )
+            has_next = len(results) > per_page
+            pagination = {
+                'per_page': per_page,
+                'next_cursor': encode_cursor(offset + per_page) if has_next else None,
+                'has_next': has_next
+            }
+            if include_total:
+                pagination['total'] = total
+            
+            return jsonify({
+                'videos': [
+                    dict(result['video'].to_dict(fields), rank=result['rank'], highlights=result['highlights'])
+                    for result in results[:per_page]
+                ],
+                'pagination': pagination,
+                'query': query_text
+            }), 200
+        
+        results, total = search_service.search_videos(
+            user_id, query_text, offset=(page - 1) * per_page, limit=per_page, fields=fields
         )
         
+        pages = (total + per_page - 1) // per_page if per_page else 0
+        
         return jsonify({
-            'videos': [video.to_dict() for video in videos.items],
+            'videos': [
+                dict(result['video'].to_dict(fields), rank=result['rank'], highlights=result['highlights'])
+                for result in results
+            ],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
-                'total': videos.total,
-                'pages': videos.pages,
-                'has_next': videos.has_next,
-                'has_prev': videos.has_prev
+                'total': total,
+                'pages': pages,
+                'has_next': page < pages,
+                'has_prev': page > 1
             },
             'query': query_text
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@videos_bp.route('/transcripts/search', methods=['GET'])
+@jwt_required()
+def search_transcripts():
+    """Search video transcripts for a phrase and return the timestamps where it is spoken"""
+    try:
+        user_id = get_jwt_identity()
+        query_text = request.args.get('q', '').strip()
+        limit = clamp_per_page(request.args.get('limit', 20, type=int))
+        fields = parse_fields(Video, request.args.get('fields'))
+        
+        if not query_text:
+            return jsonify({'error': 'Search query is required'}), 400
+        
+        search_service = SearchService()
+        results = search_service.search_transcripts(user_id, query_text, limit=limit, fields=fields)
+        
+        return jsonify({
+            'videos': [
+                dict(result['video'].to_dict(fields), hits=result['hits'])
+                for result in results
+            ],
+            'query': query_text
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,55 +1,205 @@
 import os
+import json
+import html
+from types import SimpleNamespace
 from datetime import datetime
-from wordpress_xmlrpc import Client, WordPressPost
-from wordpress_xmlrpc.methods import posts
+from wordpress_xmlrpc import WordPressPost
+from wordpress_xmlrpc.methods import posts, taxonomies
 from models import db, BlogPost
 from services.content_service import ContentService
+from services.search_service import SearchService
+from services.json_stream import JsonFieldStream
+from services.transcript_backfill import transcript_due, record_transcript_result
+from services.duplicate_service import DUPLICATE_POLICY
+from services.minhash import signature
+from services.wordpress_client import get_wordpress_pool, multicall_batches, xmlrpc_url
 
 class BlogService:
     def __init__(self):
         self.content_service = ContentService()
     
-    def generate_blog_post(self, video, user):
-        """Generate a blog post from a video"""
+    def generate_blog_post(self, video, user, duplicates=None, policy=None):
+        """Generate a blog post from a video
+
+        With duplicates (a MinHashLSH from DuplicateService.post_index), a
+        video repeating one in it is handled by policy instead of being
+        written up again; see save_duplicate. Returns the new post, the
+        merged existing post, or None if the video was skipped.
+        """
         try:
-            # Process video content if not already done
-            if not video.transcript:
-                video.transcript = self.content_service.get_video_transcript(video.video_id)
-            
-            if not video.summary and video.transcript:
-                summary_data = self.content_service.generate_summary(video.transcript, video.title)
-                video.summary = summary_data.get('summary')
-                video.key_points = summary_data.get('key_points')
-                video.blog_ready = True
-                db.session.commit()
-            
-            # Generate blog content
-            blog_content = self.content_service.generate_blog_content(video)
-            
-            # Create blog post record
-            blog_post = BlogPost(
-                user_id=user.id,
-                video_id=video.id,
-                title=blog_content['title'],
-                content=blog_content['content'],
-                excerpt=blog_content['excerpt'],
-                status='draft'
-            )
-            
-            db.session.add(blog_post)
-            db.session.commit()
-            
-            return blog_post
+            prepared = self.prepare_blog_content(self.snapshot_video(video), duplicates)
+            if prepared['snapshot'].duplicate_of:
+                return self.save_duplicate(video, user, prepared, policy or DUPLICATE_POLICY)
+            return self.save_blog_post(video, user, prepared)
             
         except Exception as e:
             print(f"Error generating blog post: {e}")
             raise e
     
-    def auto_generate_blog_post(self, video, user):
-        """Auto-generate and optionally publish a blog post"""
+    def stream_blog_post(self, video, user):
+        """Generate a blog post, yielding progress events as it goes
+
+        Yields {'event': 'status', 'stage': ...} as each step starts,
+        {'event': 'field', 'field': ..., 'delta': ...} for each piece of the
+        title, content and excerpt as the model writes them, and finally
+        {'event': 'post', 'post': ...} once the post is saved.
+        """
+        snapshot = self.snapshot_video(video)
+        yield {'event': 'status', 'stage': 'transcript'}
+        segments = self.prepare_transcript(snapshot)
+        yield {'event': 'status', 'stage': 'summary'}
+        summary = self.prepare_summary(snapshot)
+        yield {'event': 'status', 'stage': 'writing'}
+        
+        parser = JsonFieldStream()
+        reply = []
+        for piece in self.content_service.stream_blog_content(snapshot):
+            reply.append(piece)
+            for field, delta in parser.feed(piece):
+                yield {'event': 'field', 'field': field, 'delta': delta}
+        
+        try:
+            blog_content = json.loads(''.join(reply))
+        except ValueError:
+            # e.g. a reply wrapped in a code fence; use what the parser decoded
+            blog_content = parser.fields
+        if not blog_content.get('title') or not blog_content.get('content'):
+            raise ValueError("Model reply is missing the post title or content")
+        blog_content.setdefault('excerpt', '')
+        
+        blog_post = self.save_blog_post(video, user, {
+            'snapshot': snapshot,
+            'segments': segments,
+            'summary': summary,
+            'blog_content': blog_content
+        })
+        yield {'event': 'post', 'post': blog_post.to_dict()}
+    
+    def snapshot_video(self, video):
+        """Copy the fields content generation reads, so it can run outside the database session"""
+        return SimpleNamespace(
+            id=video.id,
+            video_id=video.video_id,
+            title=video.title,
+            description=video.description,
+            transcript=video.transcript,
+            segments=video.segments,
+            summary=video.summary,
+            key_points=video.key_points,
+            transcript_retry_after=video.transcript_retry_after,
+            transcript_status=None,  # set when prepare_transcript fetches captions
+            duplicate_of=None  # Video.id this one repeats, set by prepare_transcript
+        )
+    
+    def prepare_blog_content(self, snapshot, duplicates=None):
+        """Fetch the transcript and summary if missing and generate the post content
+
+        Only network calls happen here (YouTube captions, the model), so it is
+        safe to run on worker threads. Returns what save_blog_post needs.
+        """
+        return {
+            'snapshot': snapshot,
+            'segments': self.prepare_transcript(snapshot, duplicates),
+            'summary': self.prepare_summary(snapshot),
+            'blog_content': self.prepare_post_content(snapshot)
+        }
+    
+    def prepare_transcript(self, snapshot, duplicates=None):
+        """Fetch captions for a snapshot without a transcript; returns the new segments or None
+
+        With duplicates, the transcript is then checked against it: a near
+        duplicate sets snapshot.duplicate_of, anything else is added so later
+        videos in the same batch are checked against this one.
+        """
+        segments = None
+        if not snapshot.transcript and transcript_due(snapshot):
+            segments, snapshot.transcript_status = self.content_service.fetch_transcript_segments(snapshot.video_id)
+            if segments:
+                snapshot.segments = segments
+                snapshot.transcript = segments.text
+        
+        if duplicates is not None and snapshot.transcript:
+            snapshot.duplicate_of = duplicates.claim(snapshot.id, signature(snapshot.transcript))
+        return segments
+    
+    def prepare_summary(self, snapshot):
+        """Summarize a snapshot without a summary; returns the new summary data or None"""
+        if snapshot.summary or not snapshot.transcript or snapshot.duplicate_of:
+            return None
+        summary_data = self.content_service.generate_summary(snapshot.transcript, snapshot.title, snapshot.segments)
+        snapshot.summary = summary_data.get('summary')
+        snapshot.key_points = summary_data.get('key_points')
+        return summary_data
+    
+    def prepare_post_content(self, snapshot):
+        """Generate the post content, unless the snapshot repeats another video"""
+        if snapshot.duplicate_of:
+            return None
+        return self.content_service.generate_blog_content(snapshot)
+    
+    def save_blog_post(self, video, user, prepared):
+        """Store the prepared transcript and summary on the video and create the draft post"""
+        self._save_transcript(video, prepared)
+        
+        if prepared['summary']:
+            video.summary = prepared['summary'].get('summary')
+            video.key_points = prepared['summary'].get('key_points')
+            video.blog_ready = True
+        
+        blog_content = prepared['blog_content']
+        blog_post = BlogPost(
+            user_id=user.id,
+            video_id=video.id,
+            title=blog_content['title'],
+            content=blog_content['content'],
+            excerpt=blog_content['excerpt'],
+            status='draft'
+        )
+        
+        db.session.add(blog_post)
+        db.session.commit()
+        
+        return blog_post
+    
+    def save_duplicate(self, video, user, prepared, policy):
+        """Store the transcript of a video found to repeat prepared['snapshot'].duplicate_of
+
+        'skip' leaves it without a post; 'merge' adds a link to the video at
+        the end of the existing post. Returns the existing post of the
+        repeated video, if it has one.
+        """
+        self._save_transcript(video, prepared)
+        duplicate_of = prepared['snapshot'].duplicate_of
+        video.duplicate_of_id = video.duplicate_of_id or duplicate_of
+        
+        blog_post = BlogPost.query.filter_by(video_id=duplicate_of, user_id=user.id).first()
+        if blog_post and policy == 'merge' and video.video_id not in (blog_post.content or ''):
+            blog_post.content = (blog_post.content or '') + (
+                f'\n\n<p>Also covered in <a href="https://www.youtube.com/watch?v={video.video_id}">'
+                f'{html.escape(video.title)}</a>.</p>'
+            )
+            blog_post.updated_at = datetime.utcnow()
+        
+        db.session.commit()
+        return blog_post
+    
+    def _save_transcript(self, video, prepared):
+        if prepared['segments']:
+            SearchService().store_transcript(video, prepared['segments'])
+        if prepared['snapshot'].transcript_status:
+            record_transcript_result(video, prepared['snapshot'].transcript_status)
+    
+    def auto_generate_blog_post(self, video, user, duplicates=None):
+        """Auto-generate and optionally publish a blog post
+        
+        Returns None, or an existing post that was not published again, for
+        videos repeating one in duplicates (see generate_blog_post).
+        """
         try:
             # Generate the blog post
-            blog_post = self.generate_blog_post(video, user)
+            blog_post = self.generate_blog_post(video, user, duplicates)
+            if blog_post is None or blog_post.video_id != video.id:
+                return blog_post
             
             # If user has auto-sync enabled and WordPress configured, publish it
             if user.auto_sync_enabled and user.wordpress_url:
@@ -72,61 +222,57 @@ class BlogService:
     def publish_to_wordpress(self, blog_post, user):
         """Publish a blog post to WordPress"""
         try:
-            if not user.wordpress_url or not user.wordpress_username or not user.wordpress_password:
-                raise ValueError("WordPress configuration incomplete")
-            
-            # Prepare WordPress client
-            wp_url = user.wordpress_url.rstrip('/')
-            if not wp_url.endswith('/xmlrpc.php'):
-                wp_url += '/xmlrpc.php'
-            
-            client = Client(wp_url, user.wordpress_username, user.wordpress_password)
-            
-            # Create WordPress post
-            wp_post = WordPressPost()
-            wp_post.title = blog_post.title
-            wp_post.content = blog_post.content
-            wp_post.excerpt = blog_post.excerpt
-            wp_post.post_status = 'publish'
-            
-            # Add custom fields or categories if needed
-            wp_post.terms_names = {
-                'category': ['Video Content', 'Blog'],
-                'post_tag': ['youtube', 'video', 'content']
-            }
-            
-            # Publish the post
-            wordpress_post_id = client.call(posts.NewPost(wp_post))
-            
-            return wordpress_post_id
+            with self._wordpress_client(user) as client:
+                return client.call(posts.NewPost(self._wordpress_post(blog_post, publish=True)))
             
         except Exception as e:
             print(f"Error publishing to WordPress: {e}")
             raise e
     
+    def publish_many_to_wordpress(self, blog_posts, user):
+        """Publish several blog posts in system.multicall batches
+        
+        Posts already on WordPress are edited there instead of posted
+        again, so retrying a partly failed request does not duplicate them.
+        Published posts are recorded and committed batch by batch; if a
+        batch fails to go through, it and the batches after it get the
+        error. Returns [(blog_post, wordpress_post_id or Exception)] in
+        order; a post WordPress rejects does not stop the others.
+        """
+        if not blog_posts:
+            return []
+        methods = [
+            posts.EditPost(blog_post.wordpress_post_id, self._wordpress_post(blog_post, publish=True))
+            if blog_post.wordpress_post_id else posts.NewPost(self._wordpress_post(blog_post, publish=True))
+            for blog_post in blog_posts
+        ]
+        
+        results = []
+        try:
+            with self._wordpress_client(user) as client:
+                for batch in multicall_batches(client, methods):
+                    published_at = datetime.utcnow()
+                    for blog_post, result in zip(blog_posts[len(results):], batch):
+                        if not isinstance(result, Exception):
+                            # EditPost answers True; the post keeps its id
+                            result = blog_post.wordpress_post_id or result
+                            self._mark_published(blog_post, result, published_at)
+                        results.append(result)
+                    db.session.commit()
+        except Exception as e:
+            print(f"Error publishing to WordPress: {e}")
+            results.extend(e for _ in blog_posts[len(results):])
+        
+        return list(zip(blog_posts, results))
+    
     def update_wordpress_post(self, blog_post, user):
         """Update an existing WordPress post"""
         try:
             if not blog_post.wordpress_post_id:
                 raise ValueError("Blog post not published to WordPress yet")
             
-            if not user.wordpress_url or not user.wordpress_username or not user.wordpress_password:
-                raise ValueError("WordPress configuration incomplete")
-            
-            wp_url = user.wordpress_url.rstrip('/')
-            if not wp_url.endswith('/xmlrpc.php'):
-                wp_url += '/xmlrpc.php'
-            
-            client = Client(wp_url, user.wordpress_username, user.wordpress_password)
-            
-            # Update WordPress post
-            wp_post = WordPressPost()
-            wp_post.title = blog_post.title
-            wp_post.content = blog_post.content
-            wp_post.excerpt = blog_post.excerpt
-            
-            # Update the post
-            success = client.call(posts.EditPost(blog_post.wordpress_post_id, wp_post))
+            with self._wordpress_client(user) as client:
+                success = client.call(posts.EditPost(blog_post.wordpress_post_id, self._wordpress_post(blog_post)))
             
             if success:
                 blog_post.updated_at = datetime.utcnow()
@@ -144,19 +290,8 @@ class BlogService:
             if not blog_post.wordpress_post_id:
                 return True  # Nothing to delete
             
-            if not user.wordpress_url or not user.wordpress_username or not user.wordpress_password:
-                raise ValueError("WordPress configuration incomplete")
-            
-            wp_url = user.wordpress_url.rstrip('/')
-            if not wp_url.endswith('/xmlrpc.php'):
-                wp_url += '/xmlrpc.php'
-            
-            client = Client(wp_url, user.wordpress_username, user.wordpress_password)
-            
-            # Delete the post
-            success = client.call(posts.DeletePost(blog_post.wordpress_post_id))
-            
-            return success
+            with self._wordpress_client(user) as client:
+                return client.call(posts.DeletePost(blog_post.wordpress_post_id))
             
         except Exception as e:
             print(f"Error deleting WordPress post: {e}")
@@ -165,17 +300,12 @@ class BlogService:
     def test_wordpress_connection(self, user):
         """Test WordPress connection settings"""
         try:
-            if not user.wordpress_url or not user.wordpress_username or not user.wordpress_password:
+            if not self._wordpress_configured(user):
                 return {'success': False, 'message': 'WordPress configuration incomplete'}
             
-            wp_url = user.wordpress_url.rstrip('/')
-            if not wp_url.endswith('/xmlrpc.php'):
-                wp_url += '/xmlrpc.php'
-            
-            client = Client(wp_url, user.wordpress_username, user.wordpress_password)
-            
-            # Try to get user info to test connection
-            user_info = client.call(posts.GetPosts({'number': 1}))
+            # Try to get a post to test the connection
+            with self._wordpress_client(user) as client:
+                client.call(posts.GetPosts({'number': 1}))
             
             return {'success': True, 'message': 'WordPress connection successful'}
             
@@ -185,20 +315,48 @@ class BlogService:
     def get_wordpress_categories(self, user):
         """Get available WordPress categories"""
         try:
-            if not user.wordpress_url or not user.wordpress_username or not user.wordpress_password:
+            if not self._wordpress_configured(user):
                 return []
             
-            wp_url = user.wordpress_url.rstrip('/')
-            if not wp_url.endswith('/xmlrpc.php'):
-                wp_url += '/xmlrpc.php'
-            
-            client = Client(wp_url, user.wordpress_username, user.wordpress_password)
-            
-            from wordpress_xmlrpc.methods import taxonomies
-            categories = client.call(taxonomies.GetTerms('category'))
+            with self._wordpress_client(user) as client:
+                categories = client.call(taxonomies.GetTerms('category'))
             
             return [{'id': cat.id, 'name': cat.name, 'slug': cat.slug} for cat in categories]
             
         except Exception as e:
             print(f"Error getting WordPress categories: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    @staticmethod
+    def _mark_published(blog_post, wordpress_post_id, published_at):
+        blog_post.wordpress_post_id = wordpress_post_id
+        if blog_post.status != 'published':
+            blog_post.status = 'published'
+            blog_post.published_at = published_at
+    
+    @staticmethod
+    def _wordpress_configured(user):
+        return bool(user.wordpress_url and user.wordpress_username and user.wordpress_password)
+    
+    def _wordpress_client(self, user):
+        """Borrow a pooled client for the user's site (a context manager)"""
+        if not self._wordpress_configured(user):
+            raise ValueError("WordPress configuration incomplete")
+        return get_wordpress_pool().client(
+            xmlrpc_url(user.wordpress_url), user.wordpress_username, user.wordpress_password
+        )
+    
+    @staticmethod
+    def _wordpress_post(blog_post, publish=False):
+        wp_post = WordPressPost()
+        wp_post.title = blog_post.title
+        wp_post.content = blog_post.content
+        wp_post.excerpt = blog_post.excerpt
+        if publish:
+            wp_post.post_status = 'publish'
+            # Add custom fields or categories if needed
+            wp_post.terms_names = {
+                'category': ['Video Content', 'Blog'],
+                'post_tag': ['youtube', 'video', 'content']
+            }
+        return wp_post
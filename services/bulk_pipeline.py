@@ -0,0 +1,162 @@
+import os
+import time
+import queue
+import threading
+from functools import partial
+
+# Worker threads per stage and items buffered between stages
+PIPELINE_TRANSCRIPT_WORKERS = int(os.getenv('PIPELINE_TRANSCRIPT_WORKERS', 4))
+PIPELINE_SUMMARY_WORKERS = int(os.getenv('PIPELINE_SUMMARY_WORKERS', 4))
+PIPELINE_BLOG_WORKERS = int(os.getenv('PIPELINE_BLOG_WORKERS', 4))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 8))
+
+# End-of-input marker; each stage gets one per worker, sent by the last
+# worker of the stage before it
+_DONE = object()
+
+class StageStats:
+    """Per-stage counters; throughput is items per second since the pipeline started"""
+    def __init__(self, name, workers, inbox=None):
+        self.name = name
+        self.workers = workers
+        self.inbox = inbox
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, failed=False):
+        with self._lock:
+            self.processed += 1
+            self.busy += seconds
+            if failed:
+                self.failed += 1
+
+    def to_dict(self, elapsed):
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'failed': self.failed,
+            'busy_seconds': round(self.busy, 3),
+            'items_per_second': round(self.processed / elapsed, 3) if elapsed else 0.0,
+            # Items waiting for this stage; a growing backlog marks the bottleneck
+            'backlog': self.inbox.qsize() if self.inbox is not None else 0
+        }
+
+class BulkGenerationPipeline:
+    """Transcript fetch, summarization and post generation as overlapping stages
+
+    Snapshots (see BlogService.snapshot_video) flow through bounded queues
+    between thread pools, one pool per stage, so one video's captions are
+    fetched while another is being summarized. run() yields items as they
+    leave the last stage; the caller does the database write for each, on
+    its own thread, and reports it with record_write().
+
+    An item is a dict with the snapshot, the prepared 'segments', 'summary'
+    and 'blog_content', and 'error'/'failed_stage' once a stage has raised.
+    Failed items skip the remaining stages. With duplicates (see
+    BlogService.prepare_transcript), items whose snapshot has duplicate_of
+    set after the transcript stage skip summary and post generation.
+    """
+    def __init__(self, blog_service, transcript_workers=None, summary_workers=None, blog_workers=None,
+                 queue_size=None, duplicates=None):
+        self.blog_service = blog_service
+        size = queue_size or PIPELINE_QUEUE_SIZE
+        self.queues = [queue.Queue(maxsize=size) for _ in range(4)]
+        # (name, item key the stage fills, fn(snapshot), workers)
+        self.stages = [
+            ('transcript', 'segments', partial(blog_service.prepare_transcript, duplicates=duplicates),
+             transcript_workers or PIPELINE_TRANSCRIPT_WORKERS),
+            ('summary', 'summary', blog_service.prepare_summary,
+             summary_workers or PIPELINE_SUMMARY_WORKERS),
+            ('blog', 'blog_content', blog_service.prepare_post_content,
+             blog_workers or PIPELINE_BLOG_WORKERS),
+        ]
+        self.stats = [
+            StageStats(name, workers, self.queues[index])
+            for index, (name, _, _, workers) in enumerate(self.stages)
+        ]
+        self.stats.append(StageStats('write', 1, self.queues[-1]))
+        self.started = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def run(self, snapshots):
+        """Feed snapshots through the stages; yields each finished item"""
+        self.started = time.perf_counter()
+        threads = [threading.Thread(target=self._feed, args=(list(snapshots),), daemon=True)]
+        for index, (_, _, _, workers) in enumerate(self.stages):
+            remaining = [workers]
+            for _ in range(workers):
+                threads.append(threading.Thread(target=self._work, args=(index, remaining), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        finished = False
+        try:
+            while True:
+                item = self.queues[-1].get()
+                if item is _DONE:
+                    finished = True
+                    break
+                yield item
+        finally:
+            if not finished:
+                # The consumer went away (e.g. a closed stream): skip the
+                # remaining work and let the stages wind down
+                self.cancelled = True
+                while self.queues[-1].get() is not _DONE:
+                    pass
+            for thread in threads:
+                thread.join()
+
+    def record_write(self, seconds, failed=False):
+        self.stats[-1].record(seconds, failed)
+
+    def stage_stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {stats.name: stats.to_dict(elapsed) for stats in self.stats}
+
+    def _feed(self, snapshots):
+        for snapshot in snapshots:
+            if self.cancelled:
+                break
+            self.queues[0].put({
+                'snapshot': snapshot,
+                'segments': None,
+                'summary': None,
+                'blog_content': None,
+                'error': None,
+                'failed_stage': None
+            })
+        self._finish(0)
+
+    def _work(self, index, remaining):
+        name, key, fn, _ = self.stages[index]
+        inbox, outbox = self.queues[index], self.queues[index + 1]
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            if item['error'] is None and not self.cancelled:
+                start = time.perf_counter()
+                try:
+                    item[key] = fn(item['snapshot'])
+                    self.stats[index].record(time.perf_counter() - start)
+                except Exception as e:
+                    item['error'] = str(e)
+                    item['failed_stage'] = name
+                    self.stats[index].record(time.perf_counter() - start, failed=True)
+            outbox.put(item)
+
+        with self._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            self._finish(index + 1)
+
+    def _finish(self, index):
+        """Signal end of input to every consumer of queue index"""
+        consumers = self.stages[index][3] if index < len(self.stages) else 1
+        for _ in range(consumers):
+            self.queues[index].put(_DONE)
@@ -0,0 +1,158 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+import redis
+
+class MemoryStore:
+    """String values with a TTL and LRU eviction, in process memory
+
+    Values are kept as given, so any object can be stored.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self):
+        return len(self._entries)
+
+class SQLiteStore:
+    """String values with a TTL and LRU eviction, in a table of a SQLite file
+
+    Survives restarts without a server; each thread gets its own connection.
+    """
+
+    def __init__(self, path, table, ttl, max_entries):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connection().executescript(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_{table}_used_at ON {table} (used_at);
+        """)
+
+    def get(self, key):
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            f'SELECT value FROM {self.table} WHERE key = ? AND expires_at >= ?', (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        with connection:
+            connection.execute(f'UPDATE {self.table} SET used_at = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)',
+                (key, value, now + self.ttl, now)
+            )
+            # Evict expired entries, then least recently used ones beyond the size bound
+            connection.execute(f'DELETE FROM {self.table} WHERE expires_at < ?', (now,))
+            excess = self.size() - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    f'DELETE FROM {self.table} WHERE key IN '
+                    f'(SELECT key FROM {self.table} ORDER BY used_at LIMIT ?)',
+                    (excess,)
+                )
+
+    def size(self):
+        return self._connection().execute(f'SELECT count(*) FROM {self.table}').fetchone()[0]
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            self._local.connection = connection
+        return connection
+
+class RedisStore:
+    """String values with a TTL and LRU eviction, in Redis so all workers share them
+
+    Values are stored under '<prefix>:<key>' with the TTL; the '<prefix>:lru'
+    sorted set holds each key's last use and drives eviction.
+    """
+
+    def __init__(self, url, prefix, ttl, max_entries):
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.lru_key = f'{prefix}:lru'
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key):
+        redis_key = f'{self.prefix}:{key}'
+        raw = self.redis.get(redis_key)
+        if raw is None:
+            self.redis.zrem(self.lru_key, redis_key)
+            return None
+        self.redis.zadd(self.lru_key, {redis_key: time.time()})
+        return raw.decode('utf-8')
+
+    def set(self, key, value):
+        redis_key = f'{self.prefix}:{key}'
+        pipe = self.redis.pipeline()
+        pipe.setex(redis_key, self.ttl, value)
+        pipe.zadd(self.lru_key, {redis_key: time.time()})
+        pipe.execute()
+
+        excess = self.size() - self.max_entries
+        if excess > 0:
+            evicted = [name for name, _ in self.redis.zpopmin(self.lru_key, excess)]
+            if evicted:
+                self.redis.delete(*evicted)
+
+    def size(self):
+        return self.redis.zcard(self.lru_key)
+
+class CountingCache:
+    """Base for caches over a store, with the hit and miss counts GET /api/health reports"""
+
+    def __init__(self, store):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        # Plain counters; a lost increment under contention is harmless
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': self.store.size()}
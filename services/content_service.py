@@ -1,64 +1,212 @@
 import os
 import json
 import requests
-from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api import (
+    YouTubeTranscriptApi, NoTranscriptFound, NoTranscriptAvailable, TranscriptsDisabled, VideoUnavailable
+)
 import openai
+from services.transcript_segments import TranscriptSegments
+from services.summarizer import MapReduceSummarizer
+from services.extractive_summarizer import ExtractiveSummarizer
+from services.llm_cache import get_llm_cache, cache_key
+from services.llm_executor import get_llm_executor
+from services.cache_store import MemoryStore
+from services.singleton import process_singleton
+
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+
+# Transcript tokens included verbatim in a blog post prompt; longer
+# transcripts are condensed into chunk notes first
+BLOG_TRANSCRIPT_TOKENS = int(os.getenv('BLOG_TRANSCRIPT_TOKENS', 3000))
+
+# Caption listings kept per video (None for videos without captions)
+TRANSCRIPT_LISTING_TTL = int(os.getenv('TRANSCRIPT_LISTING_TTL', 6 * 3600))
+TRANSCRIPT_LISTING_MAX_ENTRIES = int(os.getenv('TRANSCRIPT_LISTING_MAX_ENTRIES', 5000))
+
+@process_singleton
+def get_listing_store():
+    """Return the process-wide cache of caption listings"""
+    return MemoryStore(TRANSCRIPT_LISTING_TTL, TRANSCRIPT_LISTING_MAX_ENTRIES)
+
+def get_transcript_listing(video_id):
+    """Return the video's caption track listing, or None if it has no captions
+
+    Listings are cached with a TTL and LRU eviction. Errors other than
+    "no captions" propagate and are not cached.
+    """
+    store = get_listing_store()
+    # Stored as a 1-tuple so a cached "no captions" is told apart from a miss
+    entry = store.get(video_id)
+    if entry is not None:
+        return entry[0]
+    
+    try:
+        listing = YouTubeTranscriptApi.list_transcripts(video_id)
+    except (TranscriptsDisabled, NoTranscriptAvailable, VideoUnavailable):
+        listing = None
+    
+    store.set(video_id, (listing,))
+    return listing
 
 class ContentService:
-    def __init__(self):
+    def __init__(self, llm=None, stream_llm=None):
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
         if self.openai_api_key:
             openai.api_key = self.openai_api_key
+            # OPENAI_API_BASE points the client at a compatible server, e.g. a local fake
+            if os.getenv('OPENAI_API_BASE'):
+                openai.api_base = os.getenv('OPENAI_API_BASE')
+        
+        # llm(messages, max_tokens, temperature) -> str and stream_llm(...) ->
+        # iterator of reply pieces; both default to the OpenAI API
+        self.llm = llm or (self._chat if self.openai_api_key else None)
+        if stream_llm:
+            self.stream_llm = stream_llm
+        elif llm:
+            self.stream_llm = lambda messages, **kwargs: iter([llm(messages, **kwargs)])
+        else:
+            self.stream_llm = self._chat_stream if self.openai_api_key else None
+        # Condensing long transcripts takes whole replies; a stream-only model
+        # has its pieces joined
+        condense_llm = self.llm or (self._joined(self.stream_llm) if self.stream_llm else None)
+        self.summarizer = MapReduceSummarizer(condense_llm) if condense_llm else None
+        self.cache = get_llm_cache()
+        self.executor = get_llm_executor()
+    
+    @staticmethod
+    def _joined(stream_llm):
+        return lambda messages, **kwargs: ''.join(stream_llm(messages, **kwargs))
+    
+    def _chat(self, messages, max_tokens=1000, temperature=0.7):
+        """Send one chat completion request and return the reply text
+
+        Replies are cached by a hash of the full request, so repeating a
+        request for the same content costs no API call. API calls go through
+        the shared executor's concurrency and rate limits.
+        """
+        key = cache_key(OPENAI_MODEL, messages, temperature, max_tokens)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        choice = self.executor.call(self._complete, messages, max_tokens=max_tokens, temperature=temperature)
+        # Replies cut off by max_tokens are usually unparseable JSON; don't keep them
+        if self.cache and choice.finish_reason == 'stop':
+            self.cache.set(key, choice.message.content)
+        return choice.message.content
+    
+    def _chat_stream(self, messages, max_tokens=1000, temperature=0.7):
+        """Like _chat, but yields the reply in pieces as the API streams it"""
+        key = cache_key(OPENAI_MODEL, messages, temperature, max_tokens)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        pieces = []
+        finish_reason = None
+        for choice in self.executor.stream(self._complete_stream, messages,
+                                           max_tokens=max_tokens, temperature=temperature):
+            piece = choice.delta.get('content')
+            if piece:
+                pieces.append(piece)
+                yield piece
+            finish_reason = choice.finish_reason or finish_reason
+        
+        if self.cache and finish_reason == 'stop':
+            self.cache.set(key, ''.join(pieces))
+    
+    def _complete_stream(self, messages, max_tokens, temperature):
+        for chunk in openai.ChatCompletion.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        ):
+            if chunk.choices:
+                yield chunk.choices[0]
+    
+    def _complete(self, messages, max_tokens, temperature):
+        response = openai.ChatCompletion.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0]
     
     def get_video_transcript(self, video_id):
         """Get transcript for a YouTube video"""
+        segments = self.get_video_transcript_segments(video_id)
+        if segments is None:
+            return None
+        
+        # The segment text buffer is the combined transcript
+        return segments.text
+    
+    def get_video_transcript_segments(self, video_id):
+        """Get the timestamped captions of a YouTube video as TranscriptSegments"""
+        segments, status = self.fetch_transcript_segments(video_id)
+        return segments
+    
+    def fetch_transcript_segments(self, video_id):
+        """Fetch captions and classify the outcome
+
+        Returns (segments, status) with status 'available', 'unavailable'
+        (the video has no usable captions) or 'error' (worth retrying soon).
+        Listings are cached per video, so a retry only re-fetches the track.
+        """
         try:
-            # Try to get transcript in English first
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+            transcript_list = get_transcript_listing(video_id)
+            if transcript_list is None:
+                return None, 'unavailable'
             
-            # Look for English transcript
+            # English first (manual before auto-generated), else the first available track
             try:
                 transcript = transcript_list.find_transcript(['en'])
-                transcript_data = transcript.fetch()
-            except:
-                # If no English transcript, try auto-generated
-                try:
-                    transcript = transcript_list.find_generated_transcript(['en'])
-                    transcript_data = transcript.fetch()
-                except:
-                    # If still no transcript, try the first available
-                    transcript = next(iter(transcript_list))
-                    transcript_data = transcript.fetch()
+            except NoTranscriptFound:
+                transcript = next(iter(transcript_list), None)
+                if transcript is None:
+                    return None, 'unavailable'
             
-            # Combine all transcript segments
-            full_transcript = ' '.join([entry['text'] for entry in transcript_data])
-            return full_transcript
+            segments = TranscriptSegments.from_entries(transcript.fetch())
+            return (segments, 'available') if segments else (None, 'unavailable')
             
         except Exception as e:
             print(f"Error getting transcript for video {video_id}: {e}")
-            return None
+            return None, 'error'
     
-    def generate_summary(self, transcript, title):
-        """Generate summary and key points from video transcript using OpenAI"""
-        if not self.openai_api_key or not transcript:
+    def generate_summary(self, transcript, title, segments=None):
+        """Generate summary and key points from video transcript using OpenAI
+
+        Long transcripts are map-reduced: chunk notes (split on the segment
+        boundaries of segments when given) are summarized together, so the
+        whole video is covered.
+        """
+        if not self.llm or not transcript:
             return self._generate_simple_summary(transcript, title)
         
         try:
+            notes = self.summarizer.condense(transcript, title, segments)
+            source = 'transcript' if notes is transcript else 'notes on the full transcript'
+            
             prompt = f"""
-            Based on the following YouTube video transcript with title "{title}", please:
+            Based on the following {source} of a YouTube video with title "{title}", please:
             1. Create a comprehensive summary (3-4 paragraphs)
             2. Extract 5-7 key points from the content
             
-            Transcript:
-            {transcript[:4000]}  # Limit transcript length for API
+            Content:
+            {notes}
             
             Please format your response as JSON with 'summary' and 'key_points' fields.
             The key_points should be an array of strings.
             """
             
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            reply = self.llm(
+                [
                     {"role": "system", "content": "You are a helpful assistant that summarizes video content."},
                     {"role": "user", "content": prompt}
                 ],
@@ -66,7 +214,7 @@ class ContentService:
                 temperature=0.7
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(reply)
             return {
                 'summary': result.get('summary', ''),
                 'key_points': json.dumps(result.get('key_points', []))
@@ -77,28 +225,14 @@ class ContentService:
             return self._generate_simple_summary(transcript, title)
     
     def _generate_simple_summary(self, transcript, title):
-        """Generate a simple summary without AI"""
+        """Generate a summary without AI, from the transcript's most central sentences"""
         if not transcript:
             return {
                 'summary': f"This video titled '{title}' covers various topics. No transcript available for detailed summary.",
                 'key_points': json.dumps([])
             }
         
-        # Simple summary - first 300 characters + ellipsis
-        words = transcript.split()
-        summary_words = words[:50]  # First 50 words
-        summary = ' '.join(summary_words)
-        if len(words) > 50:
-            summary += "..."
-        
-        # Simple key points - split transcript into chunks
-        key_points = []
-        chunks = [words[i:i+20] for i in range(0, min(len(words), 100), 20)]
-        for chunk in chunks[:5]:  # Max 5 key points
-            point = ' '.join(chunk)
-            if len(point) > 10:  # Only add if substantial
-                key_points.append(point[:100] + "..." if len(point) > 100 else point)
-        
+        summary, key_points = ExtractiveSummarizer().summarize(transcript)
         return {
             'summary': summary,
             'key_points': json.dumps(key_points)
@@ -107,52 +241,66 @@ class ContentService:
     def generate_blog_content(self, video, user_preferences=None):
         """Generate blog content from video data"""
         try:
-            if not self.openai_api_key:
+            if not self.llm:
                 return self._generate_simple_blog_content(video)
             
-            # Prepare context
-            transcript = video.transcript if video.transcript else ""
-            summary = video.summary if video.summary else ""
-            title = video.title
-            description = video.description
-            
-            prompt = f"""
-            Create a comprehensive blog post based on this YouTube video:
-            
-            Title: {title}
-            Description: {description}
-            Summary: {summary}
-            Transcript (excerpt): {transcript[:2000]}
+            reply = self.llm(self._blog_messages(video), max_tokens=2000, temperature=0.7)
             
-            Please create:
-            1. An engaging blog post title (may be different from video title)
-            2. A compelling introduction paragraph
-            3. Well-structured main content with subheadings
-            4. A conclusion with call-to-action
-            5. A short excerpt for social media
-            
-            Format as JSON with fields: title, content, excerpt
-            Make the content SEO-friendly and engaging for blog readers.
-            Include references to the original video where appropriate.
-            """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert content writer who creates engaging blog posts from video content."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.7
-            )
-            
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(reply)
             return result
             
         except Exception as e:
             print(f"Error generating blog content: {e}")
             return self._generate_simple_blog_content(video)
     
+    def stream_blog_content(self, video):
+        """Yield pieces of the JSON blog content reply as the model produces them
+
+        Same prompt as generate_blog_content, so streamed and blocking
+        generation share cached replies. Without a model, yields the simple
+        content as one piece.
+        """
+        if not self.stream_llm:
+            yield json.dumps(self._generate_simple_blog_content(video))
+            return
+        yield from self.stream_llm(self._blog_messages(video), max_tokens=2000, temperature=0.7)
+    
+    def _blog_messages(self, video):
+        # Prepare context; long transcripts are condensed rather than cut off
+        transcript = video.transcript if video.transcript else ""
+        if transcript and self.summarizer:
+            transcript = self.summarizer.condense(
+                transcript, video.title, video.segments, max_tokens=BLOG_TRANSCRIPT_TOKENS
+            )
+        summary = video.summary if video.summary else ""
+        title = video.title
+        description = video.description
+        
+        prompt = f"""
+        Create a comprehensive blog post based on this YouTube video:
+        
+        Title: {title}
+        Description: {description}
+        Summary: {summary}
+        Transcript: {transcript}
+        
+        Please create:
+        1. An engaging blog post title (may be different from video title)
+        2. A compelling introduction paragraph
+        3. Well-structured main content with subheadings
+        4. A conclusion with call-to-action
+        5. A short excerpt for social media
+        
+        Format as JSON with fields: title, content, excerpt
+        Make the content SEO-friendly and engaging for blog readers.
+        Include references to the original video where appropriate.
+        """
+        
+        return [
+            {"role": "system", "content": "You are an expert content writer who creates engaging blog posts from video content."},
+            {"role": "user", "content": prompt}
+        ]
+    
     def _generate_simple_blog_content(self, video):
         """Generate simple blog content without AI"""
         title = video.title
@@ -198,7 +346,7 @@ class ContentService:
     def generate_content_suggestions(self, video):
         """Generate suggestions for books, courses, and additional content"""
         try:
-            if not self.openai_api_key:
+            if not self.llm:
                 return self._generate_simple_suggestions(video)
             
             context = f"""
@@ -220,9 +368,8 @@ class ContentService:
             Each should be an array of objects with 'title' and 'description' fields.
             """
             
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            reply = self.llm(
+                [
                     {"role": "system", "content": "You are a content strategist who creates comprehensive content plans."},
                     {"role": "user", "content": prompt}
                 ],
@@ -230,7 +377,7 @@ class ContentService:
                 temperature=0.8
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(reply)
             return result
             
         except Exception as e:
@@ -0,0 +1,103 @@
+import os
+from collections import namedtuple
+import numpy as np
+from models import db, Video, VideoBand, BlogPost
+from services.minhash import MinHashLSH, DUPLICATE_THRESHOLD, signature, band_buckets, similarity
+
+# What bulk generation and auto-sync do with a video whose transcript repeats
+# one that already has (or is getting) a post: generate anyway, skip it, or
+# merge it into the existing post as an extra reference
+DUPLICATE_POLICIES = ('generate', 'skip', 'merge')
+# Used by auto-sync, and by bulk generation unless the request picks one
+DUPLICATE_POLICY = os.getenv('DUPLICATE_POLICY', 'skip')
+
+Match = namedtuple('Match', ['id', 'published_at', 'similarity'])
+
+class DuplicateService:
+    """Near-duplicate videos by MinHash LSH over transcript shingles
+
+    Each video with a transcript gets a signature (Video.minhash) and one
+    VideoBand row per LSH band, so candidates for a video are found with an
+    indexed bucket lookup and then confirmed by estimated Jaccard similarity.
+    """
+
+    def index_video(self, video):
+        """Store a video's signature and band buckets and flag the video it repeats
+
+        Call after the transcript changes. duplicate_of_id is set to the
+        earliest published near-duplicate, or cleared if there is none.
+        """
+        VideoBand.query.filter_by(video_id=video.id).delete(synchronize_session=False)
+        sig = signature(video.transcript)
+        if sig is None:
+            video.minhash = None
+            video.duplicate_of_id = None
+            return
+
+        user_id = video.channel.user_id
+        video.minhash = sig.tobytes()
+        db.session.bulk_insert_mappings(VideoBand, [
+            {'video_id': video.id, 'user_id': user_id, 'bucket': bucket}
+            for bucket in band_buckets(sig)
+        ])
+
+        earlier = [
+            match for match in self._candidates(user_id, sig, exclude=video.id)
+            if self._published_before(match, video)
+        ]
+        video.duplicate_of_id = min(earlier, key=self._publish_order).id if earlier else None
+
+    def find_duplicates(self, user_id, video, threshold=None):
+        """Return [(Video, similarity)] for the user's videos repeating this one, most similar first"""
+        if video.minhash is None:
+            return []
+        sig = np.frombuffer(video.minhash, dtype=np.uint32)
+        matches = {match.id: match.similarity for match in self._candidates(user_id, sig, video.id, threshold)}
+        if not matches:
+            return []
+        videos = Video.query.filter(Video.id.in_(list(matches))).all()
+        return sorted(((other, matches[other.id]) for other in videos), key=lambda result: -result[1])
+
+    def post_index(self, user_id):
+        """MinHashLSH of the user's videos that already have a post, keyed by Video.id
+
+        BlogService.prepare_transcript claims videos in it, so a batch can
+        skip videos repeating an existing post or each other.
+        """
+        index = MinHashLSH()
+        rows = db.session.query(Video.id, Video.minhash).join(
+            BlogPost, db.and_(BlogPost.video_id == Video.id, BlogPost.user_id == user_id)
+        ).filter(Video.minhash.isnot(None)).distinct()
+        for video_id, minhash in rows:
+            index.insert(video_id, np.frombuffer(minhash, dtype=np.uint32))
+        return index
+
+    def _candidates(self, user_id, sig, exclude=None, threshold=None):
+        """Matches for videos sharing a band bucket with sig and at or above the threshold"""
+        threshold = DUPLICATE_THRESHOLD if threshold is None else threshold
+        candidate_ids = db.session.query(VideoBand.video_id).filter(
+            VideoBand.user_id == user_id,
+            VideoBand.bucket.in_(band_buckets(sig))
+        )
+        if exclude is not None:
+            candidate_ids = candidate_ids.filter(VideoBand.video_id != exclude)
+        rows = db.session.query(Video.id, Video.published_at, Video.minhash).filter(
+            Video.id.in_(candidate_ids.distinct().scalar_subquery()),
+            Video.minhash.isnot(None)
+        ).all()
+
+        matches = []
+        for row in rows:
+            score = similarity(sig, np.frombuffer(row.minhash, dtype=np.uint32))
+            if score >= threshold:
+                matches.append(Match(row.id, row.published_at, score))
+        matches.sort(key=lambda match: -match.similarity)
+        return matches
+
+    @staticmethod
+    def _publish_order(match):
+        # Undated videos sort last, then by id
+        return (match.published_at is None, match.published_at or 0, match.id)
+
+    def _published_before(self, match, video):
+        return self._publish_order(match) < self._publish_order(video)
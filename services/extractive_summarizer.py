@@ -0,0 +1,128 @@
+import re
+import numpy as np
+
+# Longest run of words treated as one sentence; auto-generated captions
+# have no punctuation, so long runs are cut into windows of about this size
+MAX_SENTENCE_WORDS = 30
+# Above this many sentences, neighbours are merged to keep the similarity matrix small
+MAX_SENTENCES = 1500
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are aren't as at be because been before being
+below between both but by can can't could did didn't do does doesn't doing don't down during each
+few for from further get gets getting go going gonna got had has have having he her here hers him
+his how i i'm if in into is isn't it it's its just know let's like me more most my no nor not now
+of off on once only or other our ours out over own really right same she should so some such than
+that that's the their theirs them then there there's these they they're this those through to too
+um uh under until up us very want was we we're were what when where which while who why will with
+would yeah you you're your yours
+""".split())
+
+def split_sentences(text):
+    """Split a transcript into sentences, cutting unpunctuated runs into even windows"""
+    sentences = []
+    for part in SENTENCE_END_RE.split(text.strip()):
+        words = part.split()
+        if not words:
+            continue
+        windows = -(-len(words) // MAX_SENTENCE_WORDS)
+        size = -(-len(words) // windows)
+        for begin in range(0, len(words), size):
+            sentences.append(' '.join(words[begin:begin + size]))
+    return sentences
+
+def term_matrix(sentences):
+    """L2-normalized TF-IDF rows (sublinear tf, smoothed idf) as a dense float32 matrix
+
+    Only terms found in two or more sentences get a column, since the rest
+    cannot add to any similarity; they still count towards each row's norm.
+    """
+    vocab = {}
+    rows = []
+    cols = []
+    for index, sentence in enumerate(sentences):
+        for word in WORD_RE.findall(sentence.lower()):
+            if word not in STOPWORDS:
+                rows.append(index)
+                cols.append(vocab.setdefault(word, len(vocab)))
+
+    n, v = len(sentences), max(len(vocab), 1)
+    cells, counts = np.unique(np.asarray(rows, dtype=np.int64) * v + np.asarray(cols, dtype=np.int64),
+                              return_counts=True)
+    rows, cols = cells // v, cells % v
+
+    df = np.bincount(cols, minlength=v)
+    weights = np.log1p(counts) * (np.log((n + 1) / (df[cols] + 1)) + 1)
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+
+    shared = np.flatnonzero(df > 1)
+    column = np.full(v, -1)
+    column[shared] = np.arange(len(shared))
+    keep = column[cols] >= 0
+    matrix = np.zeros((n, len(shared)), dtype=np.float32)
+    matrix[rows[keep], column[cols[keep]]] = weights[keep] / norms[rows[keep]]
+    return matrix
+
+def textrank(similarity, damping=0.85, iterations=100, tolerance=1e-6):
+    """PageRank scores over a sentence similarity matrix"""
+    n = similarity.shape[0]
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0)
+    totals = weights.sum(axis=1, keepdims=True)
+    # Sentences sharing no terms with any other link to every sentence equally
+    transition = np.where(totals > 0, weights / np.where(totals > 0, totals, 1), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+class ExtractiveSummarizer:
+    """Summarize a transcript locally by picking its most central sentences
+
+    Sentences become TF-IDF vectors; TextRank over their cosine similarity
+    matrix ranks them. The best-ranked ones become key points, and the
+    summary is the top few in transcript order. Sentences too similar to one
+    already picked are skipped, so repeated phrases do not crowd out the rest.
+    """
+
+    def __init__(self, summary_sentences=8, key_points=5, redundancy=0.5):
+        self.summary_sentences = summary_sentences
+        self.key_points = key_points
+        self.redundancy = redundancy
+
+    def summarize(self, transcript):
+        """Return (summary, key_points) for a transcript"""
+        sentences = self._merge(split_sentences(transcript))
+        if len(sentences) <= 1:
+            return ' '.join(sentences), sentences
+
+        matrix = term_matrix(sentences)
+        similarity = matrix @ matrix.T
+        picked = self._pick(textrank(similarity), similarity,
+                            max(self.summary_sentences, self.key_points))
+
+        summary = ' '.join(sentences[index] for index in sorted(picked[:self.summary_sentences]))
+        return summary, [sentences[index] for index in picked[:self.key_points]]
+
+    def _pick(self, scores, similarity, count):
+        picked = []
+        for index in np.argsort(-scores, kind='stable'):
+            if picked and similarity[index, picked].max() > self.redundancy:
+                continue
+            picked.append(int(index))
+            if len(picked) == count:
+                break
+        return picked
+
+    def _merge(self, sentences):
+        if len(sentences) <= MAX_SENTENCES:
+            return sentences
+        group = -(-len(sentences) // MAX_SENTENCES)
+        return [' '.join(sentences[i:i + group]) for i in range(0, len(sentences), group)]
@@ -0,0 +1,128 @@
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class JsonFieldStream:
+    """Incrementally decode the string fields of a JSON object as it streams in
+
+    feed() takes arbitrary pieces of text such as '{"title": "Ho' and
+    'w to ...' and returns (field, text) pieces of decoded top-level string
+    values as soon as they arrive, so partial values can be shown before
+    the object is complete. Escapes split across pieces are handled.
+    Non-string and nested values are skipped; text before the opening brace
+    (e.g. a code fence) is ignored. fields holds everything decoded so far.
+    """
+    def __init__(self):
+        self.fields = {}
+        self._state = 'start'  # start, key, key_string, after_key, value, string, skip, done
+        self._key = []
+        self._field = None
+        self._escape = None  # None, '' after a backslash, or the hex digits of \\uXXXX
+        self._depth = 0
+        self._in_skipped_string = False
+        self._pending_surrogate = None
+
+    def feed(self, text):
+        events = []
+        chunk = []
+        for char in text:
+            state = self._state
+            if state == 'start':
+                if char == '{':
+                    self._state = 'key'
+            elif state == 'key':
+                if char == '"':
+                    self._state = 'key_string'
+                    self._key = []
+                elif char == '}':
+                    self._state = 'done'
+            elif state == 'key_string':
+                if self._escape is not None:
+                    self._key.append(ESCAPES.get(char, char))
+                    self._escape = None
+                elif char == '\\':
+                    self._escape = ''
+                elif char == '"':
+                    self._field = ''.join(self._key)
+                    self._state = 'after_key'
+                else:
+                    self._key.append(char)
+            elif state == 'after_key':
+                if char == ':':
+                    self._state = 'value'
+            elif state == 'value':
+                if char == '"':
+                    self._state = 'string'
+                    self.fields.setdefault(self._field, '')
+                elif char in '{[':
+                    self._state = 'skip'
+                    self._depth = 1
+                elif char in ',}':
+                    self._end_value(char)
+                elif not char.isspace():
+                    self._state = 'skip'
+                    self._depth = 0
+            elif state == 'string':
+                decoded = self._decode(char)
+                if decoded is False:
+                    if chunk:
+                        events.append((self._field, ''.join(chunk)))
+                        chunk = []
+                    self._end_value(',')
+                elif decoded:
+                    chunk.append(decoded)
+            elif state == 'skip':
+                if self._in_skipped_string:
+                    if self._escape is not None:
+                        self._escape = None
+                    elif char == '\\':
+                        self._escape = ''
+                    elif char == '"':
+                        self._in_skipped_string = False
+                elif char == '"':
+                    self._in_skipped_string = True
+                elif char in '{[':
+                    self._depth += 1
+                elif char in '}]' and self._depth:
+                    self._depth -= 1
+                elif self._depth == 0 and char in ',}':
+                    self._end_value(char)
+
+        if chunk:
+            events.append((self._field, ''.join(chunk)))
+        for field, piece in events:
+            self.fields[field] += piece
+        return events
+
+    def _end_value(self, char):
+        self._field = None
+        self._state = 'done' if char == '}' else 'key'
+
+    def _decode(self, char):
+        """Decoded text for one character of a string value, '' if incomplete, False at the closing quote"""
+        if self._escape is None:
+            if char == '\\':
+                self._escape = ''
+                return ''
+            if char == '"':
+                return False
+            return char
+
+        if self._escape == '':
+            if char == 'u':
+                self._escape = 'u'
+                return ''
+            self._escape = None
+            return ESCAPES.get(char, char)
+
+        self._escape += char
+        if len(self._escape) < 5:
+            return ''
+        code = int(self._escape[1:], 16)
+        self._escape = None
+        # Join UTF-16 surrogate pairs such as \\ud83d\\ude00
+        if 0xD800 <= code < 0xDC00:
+            self._pending_surrogate = code
+            return ''
+        if 0xDC00 <= code < 0xE000 and self._pending_surrogate is not None:
+            code = 0x10000 + ((self._pending_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._pending_surrogate = None
+        return chr(code)
@@ -0,0 +1,45 @@
+import os
+import json
+import hashlib
+from services.cache_store import CountingCache, RedisStore, SQLiteStore
+from services.singleton import process_singleton
+
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 30 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 20000))
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'llm_cache.db')
+
+def cache_key(model, messages, temperature, max_tokens):
+    """Content address of a chat completion request"""
+    request = json.dumps({
+        'model': model,
+        'messages': messages,
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+class LLMCache(CountingCache):
+    """Chat completion replies keyed by a hash of the request, with a TTL and LRU eviction
+
+    Entries live in a SQLite file, or in Redis when a URL is given so all
+    workers share them. Safe to use from worker threads.
+    """
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES, path=LLM_CACHE_PATH, redis_url=None):
+        super().__init__(
+            RedisStore(redis_url, 'llm_cache', ttl, max_entries) if redis_url
+            else SQLiteStore(path, 'llm_cache', ttl, max_entries)
+        )
+
+    def get(self, key):
+        """Return the cached reply for key, or None if missing or expired"""
+        value = self.store.get(key)
+        self.record(value is not None)
+        return value
+
+    def set(self, key, value):
+        self.store.set(key, value)
+
+@process_singleton
+def get_llm_cache():
+    """Return the process-wide LLM reply cache, or None when LLM_CACHE_TTL is 0"""
+    return LLMCache(redis_url=os.getenv('LLM_CACHE_REDIS_URL')) if LLM_CACHE_TTL > 0 else None
@@ -0,0 +1,114 @@
+import os
+import time
+import random
+import threading
+from services.summarizer import estimate_tokens
+from services.singleton import process_singleton
+
+# Model calls in flight at once across the process, and the account's rate limits
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 8))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv('LLM_REQUESTS_PER_MINUTE', 3500))
+LLM_TOKENS_PER_MINUTE = int(os.getenv('LLM_TOKENS_PER_MINUTE', 90000))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 5))
+
+def is_rate_limited(error):
+    """True for HTTP 429 errors from the OpenAI client or a compatible server"""
+    status = getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+    return status == 429 or type(error).__name__ == 'RateLimitError'
+
+class TokenBucket:
+    """Allows `per_minute` units per minute, with bursts up to a minute's worth"""
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        """Block until amount units are available, then take them"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+class LLMExecutor:
+    """Runs model calls under a concurrency cap and request/token rate limits
+
+    call() blocks for a concurrency slot and for room in both buckets (the
+    prompt estimate plus max_tokens, which is what the API counts against
+    the limit), and retries 429 responses with jittered exponential backoff.
+    """
+    def __init__(self, concurrency=None, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=None, backoff=1.0, max_backoff=60.0):
+        self.concurrency = max(concurrency or LLM_MAX_CONCURRENCY, 1)
+        self.requests = TokenBucket(requests_per_minute or LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute or LLM_TOKENS_PER_MINUTE)
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+
+    def call(self, fn, messages, max_tokens=1000, temperature=0.7):
+        """Run fn(messages, max_tokens, temperature) within the limits"""
+        cost = sum(estimate_tokens(message['content']) for message in messages) + max_tokens
+        attempt = 0
+        while True:
+            self.requests.acquire()
+            self.tokens.acquire(cost)
+            try:
+                with self._slots:
+                    return fn(messages, max_tokens=max_tokens, temperature=temperature)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+
+    def stream(self, fn, messages, max_tokens=1000, temperature=0.7):
+        """Like call() for a streaming fn that yields reply pieces
+
+        The concurrency slot is held until the stream ends or is closed.
+        429s are only retried before the first piece has been passed on.
+        """
+        cost = sum(estimate_tokens(message['content']) for message in messages) + max_tokens
+        attempt = 0
+        while True:
+            self.requests.acquire()
+            self.tokens.acquire(cost)
+            started = False
+            with self._slots:
+                try:
+                    for piece in fn(messages, max_tokens=max_tokens, temperature=temperature):
+                        started = True
+                        yield piece
+                    return
+                except Exception as e:
+                    if started or not is_rate_limited(e) or attempt >= self.max_retries:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, error, attempt):
+        headers = getattr(error, 'headers', None) or {}
+        retry_after = headers.get('retry-after') or headers.get('Retry-After')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Full jitter, so retries from concurrent calls spread out
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+@process_singleton
+def get_llm_executor():
+    """Return the process-wide model call executor"""
+    return LLMExecutor()
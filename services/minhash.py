@@ -0,0 +1,110 @@
+import os
+import zlib
+import hashlib
+import threading
+import numpy as np
+from services.extractive_summarizer import WORD_RE
+
+# Signature length and LSH banding: 16 bands of 8 rows make videos with a
+# Jaccard similarity around (1/16) ** (1/8) = 0.71 or more likely to share a
+# bucket, so candidates above DUPLICATE_THRESHOLD are rarely missed
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 16
+ROWS_PER_BAND = MINHASH_PERMUTATIONS // MINHASH_BANDS
+SHINGLE_WORDS = 5
+
+# Estimated Jaccard similarity of transcript shingles at which two videos count as the same content
+DUPLICATE_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', 0.8))
+
+# Largest prime below 2**32: (a * x + b) stays within uint64 for 32-bit a, x and b
+PRIME = 4294967291
+# Shingles hashed per block, to bound memory on very long transcripts
+BLOCK_SIZE = 4096
+
+# Fixed seed: stored signatures are only comparable under the same permutations
+_random = np.random.RandomState(20240101)
+_A = _random.randint(1, PRIME, size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+_B = _random.randint(0, PRIME, size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+
+def shingles(text):
+    """Hashes of the distinct SHINGLE_WORDS-word runs in a text"""
+    words = WORD_RE.findall(text.lower()) if text else []
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    count = max(len(words) - SHINGLE_WORDS + 1, 1)
+    return np.unique(np.fromiter(
+        (zlib.crc32(' '.join(words[i:i + SHINGLE_WORDS]).encode()) for i in range(count)),
+        dtype=np.uint64, count=count
+    ))
+
+def signature(text):
+    """MinHash signature of a text's shingles as uint32, or None for an empty text"""
+    hashes = shingles(text)
+    if not len(hashes):
+        return None
+    result = np.full(MINHASH_PERMUTATIONS, PRIME, dtype=np.uint64)
+    for begin in range(0, len(hashes), BLOCK_SIZE):
+        block = hashes[begin:begin + BLOCK_SIZE]
+        np.minimum(result, ((_A * block + _B) % PRIME).min(axis=1), out=result)
+    return result.astype(np.uint32)
+
+def band_buckets(sig):
+    """One signed 64-bit bucket id per band; equal ids mean an identical band"""
+    buckets = []
+    for band in range(MINHASH_BANDS):
+        rows = sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return float(np.count_nonzero(a == b)) / MINHASH_PERMUTATIONS
+
+class MinHashLSH:
+    """In-memory LSH index of signatures, safe to share between threads"""
+
+    def __init__(self, threshold=None):
+        self.threshold = DUPLICATE_THRESHOLD if threshold is None else threshold
+        self.signatures = {}
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def insert(self, key, sig):
+        with self._lock:
+            self._insert(key, sig)
+
+    def query(self, sig):
+        """Return [(key, similarity)] at or above the threshold, most similar first"""
+        with self._lock:
+            return self._query(sig)
+
+    def claim(self, key, sig):
+        """Return the most similar key already indexed, or index sig under key and return None
+
+        Checking and inserting happen under one lock, so when two
+        duplicates are claimed at once exactly one of them wins.
+        """
+        with self._lock:
+            matches = self._query(sig)
+            if matches:
+                return matches[0][0]
+            self._insert(key, sig)
+            return None
+
+    def _insert(self, key, sig):
+        self.signatures[key] = sig
+        for bucket in band_buckets(sig):
+            self.buckets.setdefault(bucket, set()).add(key)
+
+    def _query(self, sig):
+        candidates = set()
+        for bucket in band_buckets(sig):
+            candidates.update(self.buckets.get(bucket, ()))
+        matches = [(key, similarity(sig, self.signatures[key])) for key in candidates]
+        matches = [match for match in matches if match[1] >= self.threshold]
+        matches.sort(key=lambda match: -match[1])
+        return matches
@@ -0,0 +1,126 @@
+import json
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+
+# Largest page size list endpoints return
+MAX_PER_PAGE = 100
+
+def encode_cursor(*values):
+    """Pack sort key values into an opaque URL-safe cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Unpack a cursor made by encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def clamp_per_page(per_page):
+    """Keep a requested page size within 1..MAX_PER_PAGE"""
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+def decode_offset_cursor(cursor):
+    """Position carried by an encode_cursor(offset) cursor; an empty cursor is the start"""
+    if not cursor:
+        return 0
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], int) or isinstance(values[0], bool) or values[0] < 0:
+        raise ValueError('Invalid cursor')
+    return values[0]
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, per_page=20, include_total=False):
+    """Fetch one page ordered by (sort_column desc, id desc) after the cursor position
+
+    Each page is an index range scan from the cursor instead of an OFFSET
+    scan, and the total is only counted when asked for. Rows with a NULL
+    sort value come after all others, newest id first, from a second range
+    scan once the dated rows run out. Returns (items, pagination).
+    """
+    per_page = clamp_per_page(per_page)
+    total = query.order_by(None).count() if include_total else None
+
+    sort_value = last_id = None
+    if cursor:
+        sort_value, last_id = _parse_keyset_cursor(cursor, sort_column)
+
+    # One extra row tells whether another page exists without counting
+    rows = []
+    if not cursor or sort_value is not None:
+        dated = query.filter(sort_column.isnot(None))
+        if cursor:
+            dated = dated.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < last_id)
+            ))
+        rows = dated.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    if len(rows) <= per_page:
+        undated = query.filter(sort_column.is_(None))
+        if cursor and sort_value is None:
+            undated = undated.filter(id_column < last_id)
+        rows += undated.order_by(id_column.desc()).limit(per_page + 1 - len(rows)).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+    if include_total:
+        pagination['total'] = total
+    return items, pagination
+
+def _parse_keyset_cursor(cursor, sort_column):
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not isinstance(values[1], int) or isinstance(values[1], bool):
+        raise ValueError('Invalid cursor')
+    sort_value, last_id = values
+    if sort_value is not None and _is_datetime(sort_column):
+        try:
+            sort_value = datetime.fromisoformat(sort_value)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+    return sort_value, last_id
+
+def _is_datetime(column):
+    try:
+        return column.type.python_type is datetime
+    except NotImplementedError:
+        return False
+
+
+def parse_fields(model, value):
+    """Parse a ?fields= list against model.FIELDS; None means all fields"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in model.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def load_fields(query, model, fields=None, always=()):
+    """Limit a list query to the columns that will be serialized
+
+    Deferred heavy columns (transcripts, descriptions, post bodies) are then
+    fetched in the same SELECT when requested and skipped otherwise. Columns
+    in always (e.g. a keyset sort column) are loaded regardless.
+    """
+    columns = [getattr(model, field) for field in fields or model.FIELDS]
+    return query.options(load_only(*columns, *always))
@@ -0,0 +1,172 @@
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import redis
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, QuotaUsage
+from services.singleton import process_singleton
+
+# YouTube Data API v3 unit cost per method; anything not listed costs 1
+QUOTA_COSTS = {
+    'youtube.search.list': 100,
+    'youtube.videos.insert': 1600,
+    'youtube.videos.update': 50,
+}
+
+DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', 10000))
+
+# Share of the daily budget that must still be left after a call of the given
+# priority, so backfills and stats refreshes stop early and onboarding keeps
+# the remainder.
+PRIORITY_RESERVES = {
+    'interactive': 0.0,
+    'normal': float(os.getenv('YOUTUBE_QUOTA_RESERVE_NORMAL', 0.1)),
+    'low': float(os.getenv('YOUTUBE_QUOTA_RESERVE_LOW', 0.3)),
+}
+
+# quota_usage row holding each day's running total, next to the per-method rows
+TOTAL_METHOD = 'total'
+
+# The quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+class QuotaExceededError(Exception):
+    """Raised when a call would dip into the budget reserved for higher priorities"""
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class QuotaLedger:
+    """Daily YouTube quota accounting shared by all workers
+
+    Usage lives in Redis when REDIS_URL is set, otherwise in the quota_usage
+    table.
+    """
+    def __init__(self, daily_quota=DAILY_QUOTA, redis_url=None):
+        self.daily_quota = daily_quota
+        redis_url = redis_url or os.getenv('REDIS_URL')
+        self.redis = redis.Redis.from_url(redis_url) if redis_url else None
+
+    def cost(self, method):
+        return QUOTA_COSTS.get(method, 1)
+
+    def charge(self, method, priority='normal'):
+        """Record a call, refusing it if it would exceed the priority's share"""
+        cost = self.cost(method)
+        allowed = self.daily_quota * (1 - PRIORITY_RESERVES.get(priority, 0.0))
+        day = self._today()
+
+        if self.redis:
+            key = f'youtube_quota:{day}'
+            total = self.redis.hincrby(key, 'total', cost)
+            if total > allowed:
+                self.redis.hincrby(key, 'total', -cost)
+                self._refuse(method, priority)
+            self.redis.hincrby(key, method, cost)
+            self.redis.expire(key, 2 * 24 * 3600)
+            return cost
+
+        # Charge on its own connection so the caller's session is never
+        # committed as a side effect. The day's total only grows through a
+        # conditional UPDATE, whose row lock queues concurrent workers, so
+        # two of them cannot both pass the check and overspend
+        with db.engine.begin() as connection:
+            if not self._charge_total(connection, day, cost, allowed):
+                self._refuse(method, priority)
+            self._add_units(connection, day, method, cost)
+        return cost
+
+    def used(self):
+        """Units spent so far today"""
+        day = self._today()
+        if self.redis:
+            return int(self.redis.hget(f'youtube_quota:{day}', 'total') or 0)
+
+        with db.engine.connect() as connection:
+            return self._used(connection, day)
+
+    def remaining(self):
+        return max(self.daily_quota - self.used(), 0)
+
+    def can_spend(self, units, priority='normal'):
+        """Whether a job expected to cost units may start at this priority"""
+        allowed = self.daily_quota * (1 - PRIORITY_RESERVES.get(priority, 0.0))
+        return self.used() + units <= allowed
+
+    def mark_exhausted(self):
+        """Record that the API itself reported the daily quota as spent"""
+        day = self._today()
+        if self.redis:
+            self.redis.hset(f'youtube_quota:{day}', 'total', self.daily_quota)
+            return
+
+        with db.engine.begin() as connection:
+            self._ensure_total(connection, day)
+            used = self._used(connection, day)
+            if used < self.daily_quota:
+                self._add_units(connection, day, 'exhausted', self.daily_quota - used)
+                table = QuotaUsage.__table__
+                connection.execute(table.update().where(
+                    table.c.day == day, table.c.method == TOTAL_METHOD
+                ).values(units=self.daily_quota))
+
+    def seconds_until_reset(self):
+        now = datetime.now(QUOTA_TIMEZONE)
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return int((midnight - now).total_seconds()) + 1
+
+    def _used(self, connection, day):
+        table = QuotaUsage.__table__
+        total = connection.execute(
+            select(table.c.units).where(table.c.day == day, table.c.method == TOTAL_METHOD)
+        ).scalar()
+        if total is not None:
+            return total
+        return connection.execute(
+            select(func.coalesce(func.sum(table.c.units), 0)).where(table.c.day == day)
+        ).scalar()
+
+    def _ensure_total(self, connection, day):
+        """Create the day's total row, seeded from any per-method rows already written"""
+        table = QuotaUsage.__table__
+        insert = postgresql_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+        connection.execute(insert(table).from_select(
+            ['day', 'method', 'units'],
+            select(literal(day), literal(TOTAL_METHOD), func.coalesce(func.sum(table.c.units), 0))
+            .where(table.c.day == day)
+        ).on_conflict_do_nothing(index_elements=['day', 'method']))
+
+    def _charge_total(self, connection, day, units, allowed):
+        """Add units to the day's total unless that would pass allowed; returns whether it did"""
+        self._ensure_total(connection, day)
+        table = QuotaUsage.__table__
+        result = connection.execute(table.update().where(
+            table.c.day == day,
+            table.c.method == TOTAL_METHOD,
+            table.c.units + units <= allowed
+        ).values(units=table.c.units + units))
+        return result.rowcount == 1
+
+    def _add_units(self, connection, day, method, units):
+        insert = postgresql_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+        stmt = insert(QuotaUsage.__table__).values(day=day, method=method, units=units)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['day', 'method'],
+            set_={'units': QuotaUsage.__table__.c.units + units}
+        ))
+
+    def _refuse(self, method, priority):
+        raise QuotaExceededError(
+            f'YouTube quota budget for {priority} requests is spent ({method})',
+            retry_after=self.seconds_until_reset()
+        )
+
+    def _today(self):
+        return datetime.now(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+@process_singleton
+def get_quota_ledger():
+    """Return the process-wide quota ledger"""
+    return QuotaLedger()
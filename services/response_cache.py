@@ -0,0 +1,40 @@
+import os
+import json
+import hashlib
+from services.cache_store import CountingCache, MemoryStore, RedisStore
+from services.singleton import process_singleton
+
+CACHE_TTL = int(os.getenv('YOUTUBE_CACHE_TTL', 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.getenv('YOUTUBE_CACHE_MAX_ENTRIES', 5000))
+
+class ResponseCache(CountingCache):
+    """ETag-tagged API responses with a TTL and LRU eviction
+
+    Entries live in process memory, or in Redis when a URL is given so all
+    workers revalidate against the same copy. Callers record hits, since a
+    stored entry only counts once the API confirms it with a 304.
+    """
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, redis_url=None):
+        super().__init__(
+            RedisStore(redis_url, 'yt_cache', ttl, max_entries) if redis_url else MemoryStore(ttl, max_entries)
+        )
+
+    def get(self, key):
+        """Return (etag, body) for key, or None if missing or expired"""
+        raw = self.store.get(self._key(key))
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry['etag'], entry['body']
+
+    def set(self, key, etag, body):
+        self.store.set(self._key(key), json.dumps({'etag': etag, 'body': body}))
+
+    @staticmethod
+    def _key(key):
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+@process_singleton
+def get_response_cache():
+    """Return the process-wide YouTube response cache"""
+    return ResponseCache(redis_url=os.getenv('YOUTUBE_CACHE_REDIS_URL'))
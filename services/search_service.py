@@ -0,0 +1,342 @@
+import re
+import html
+from sqlalchemy import text
+from models import db, Channel, Video, TranscriptSegment
+from services.pagination import load_fields
+from services.similarity_service import SimilarityService
+from services.duplicate_service import DuplicateService
+
+# Private markers wrapped around matches by the database, swapped for <mark>
+# after the snippet has been HTML-escaped
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS video_fts USING fts5(
+        title, description, tags,
+        content='video', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_fts_insert AFTER INSERT ON video BEGIN
+        INSERT INTO video_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_fts_delete AFTER DELETE ON video BEGIN
+        INSERT INTO video_fts(video_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS video_fts_update AFTER UPDATE OF title, description, tags ON video BEGIN
+        INSERT INTO video_fts(video_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+        INSERT INTO video_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+        text,
+        content='transcript_segment', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transcript_fts_insert AFTER INSERT ON transcript_segment BEGIN
+        INSERT INTO transcript_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transcript_fts_delete AFTER DELETE ON transcript_segment BEGIN
+        INSERT INTO transcript_fts(transcript_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+]
+
+POSTGRES_SCHEMA = [
+    """
+    ALTER TABLE video ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_video_search_vector ON video USING GIN (search_vector)",
+    """
+    ALTER TABLE transcript_segment ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', text)) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_transcript_segment_search_vector ON transcript_segment USING GIN (search_vector)",
+]
+
+# Segment hits considered per transcript search before grouping by video
+TRANSCRIPT_HIT_LIMIT = 500
+
+class SearchService:
+    """Ranked full-text search over a user's videos and their transcripts
+
+    SQLite uses FTS5 tables kept in sync with the video and transcript_segment
+    tables by triggers; Postgres uses generated tsvector columns with GIN
+    indexes. Other databases fall back to substring matching.
+    """
+    def __init__(self):
+        self.dialect = db.session.get_bind().dialect.name
+
+    @staticmethod
+    def install():
+        """Create the full-text index for the current database if missing"""
+        dialect = db.engine.dialect.name
+        with db.engine.begin() as connection:
+            if dialect == 'sqlite':
+                existing = {row[0] for row in connection.execute(text(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('video_fts', 'transcript_fts')"
+                ))}
+                for statement in SQLITE_SCHEMA:
+                    connection.execute(text(statement))
+                # Index the rows stored before the tables existed
+                for table in ('video_fts', 'transcript_fts'):
+                    if table not in existing:
+                        connection.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+            elif dialect == 'postgresql':
+                for statement in POSTGRES_SCHEMA:
+                    connection.execute(text(statement))
+
+    def search_videos(self, user_id, query_text, offset=0, limit=20, include_total=True, fields=None):
+        """Return (results, total) for a window of ranked matches
+
+        Each result is a dict with the video, its rank and highlighted
+        title/description snippets. total is None unless include_total.
+        Videos are loaded with only the given to_dict fields.
+        """
+        if self.dialect == 'sqlite':
+            match = self._fts5_query(query_text)
+            if not match:
+                return [], 0
+            rows, total = self._search_sqlite(user_id, match, offset, limit, include_total)
+        elif self.dialect == 'postgresql':
+            rows, total = self._search_postgres(user_id, query_text, offset, limit, include_total)
+        else:
+            return self._search_fallback(user_id, query_text, offset, limit, include_total, fields)
+
+        videos = load_fields(Video.query, Video, fields).filter(Video.id.in_([row.id for row in rows]))
+        videos = {video.id: video for video in videos}
+        results = []
+        for row in rows:
+            if row.id in videos:
+                results.append({
+                    'video': videos[row.id],
+                    'rank': float(row.rank),
+                    'highlights': {
+                        'title': self._highlight(row.title_snippet),
+                        'description': self._highlight(row.description_snippet)
+                    }
+                })
+        return results, total
+
+    def store_transcript(self, video, segments):
+        """Save a video's TranscriptSegments and replace its indexed segments
+
+        The video's similarity vector and near-duplicate signature are
+        refreshed from the new transcript too.
+        """
+        video.segments = segments
+        SimilarityService().index_video(video)
+        DuplicateService().index_video(video)
+
+        TranscriptSegment.query.filter_by(video_id=video.id).delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(TranscriptSegment, [
+            {
+                'video_id': video.id,
+                'user_id': video.channel.user_id,
+                'start': start,
+                'duration': duration,
+                'text': segment_text
+            }
+            for start, duration, segment_text in segments if segment_text.strip()
+        ])
+
+    def search_transcripts(self, user_id, query_text, limit=20, hits_per_video=5, fields=None):
+        """Find videos whose transcripts contain a phrase, with the timestamps where it is spoken
+
+        Returns a list of {'video', 'hits'} ordered by each video's best
+        match; hits are {'start', 'duration', 'snippet'} in playback order.
+        """
+        if self.dialect == 'sqlite':
+            terms = re.findall(r'\w+', query_text)
+            if not terms:
+                return []
+            # FTS5 phrase query: the words in this order
+            match = '"' + ' '.join(terms) + '"'
+            rows = db.session.execute(text(f"""
+                SELECT transcript_segment.video_id AS video_id,
+                       transcript_segment.start AS start,
+                       transcript_segment.duration AS duration,
+                       highlight(transcript_fts, 0, '{MATCH_START}', '{MATCH_END}') AS snippet
+                FROM transcript_fts
+                JOIN transcript_segment ON transcript_segment.id = transcript_fts.rowid
+                WHERE transcript_fts MATCH :match AND transcript_segment.user_id = :user_id
+                ORDER BY bm25(transcript_fts)
+                LIMIT :hit_limit
+            """), {'match': match, 'user_id': user_id, 'hit_limit': TRANSCRIPT_HIT_LIMIT}).all()
+        elif self.dialect == 'postgresql':
+            rows = db.session.execute(text("""
+                SELECT hits.video_id AS video_id, hits.start AS start, hits.duration AS duration,
+                       ts_headline('english', hits.text, hits.query, :options) AS snippet
+                FROM (
+                    SELECT transcript_segment.*, query
+                    FROM transcript_segment, phraseto_tsquery('english', :query) AS query
+                    WHERE transcript_segment.search_vector @@ query
+                      AND transcript_segment.user_id = :user_id
+                    ORDER BY ts_rank_cd(transcript_segment.search_vector, query) DESC
+                    LIMIT :hit_limit
+                ) AS hits
+            """), {
+                'query': query_text,
+                'user_id': user_id,
+                'hit_limit': TRANSCRIPT_HIT_LIMIT,
+                'options': f'StartSel={MATCH_START}, StopSel={MATCH_END}, HighlightAll=true'
+            }).all()
+        else:
+            rows = db.session.query(
+                TranscriptSegment.video_id, TranscriptSegment.start, TranscriptSegment.duration,
+                TranscriptSegment.text.label('snippet')
+            ).filter(
+                TranscriptSegment.user_id == user_id,
+                TranscriptSegment.text.ilike(f'%{query_text}%')
+            ).limit(TRANSCRIPT_HIT_LIMIT).all()
+
+        # Group hits by video, keeping videos in order of their best hit
+        hits_by_video = {}
+        for row in rows:
+            if row.video_id not in hits_by_video:
+                if len(hits_by_video) == limit:
+                    continue
+                hits_by_video[row.video_id] = []
+            if len(hits_by_video[row.video_id]) < hits_per_video:
+                hits_by_video[row.video_id].append({
+                    'start': row.start,
+                    'duration': row.duration,
+                    'snippet': self._highlight(row.snippet)
+                })
+
+        videos = load_fields(Video.query, Video, fields).filter(Video.id.in_(list(hits_by_video)))
+        videos = {video.id: video for video in videos}
+        return [
+            {'video': videos[video_id], 'hits': sorted(hits, key=lambda hit: hit['start'])}
+            for video_id, hits in hits_by_video.items() if video_id in videos
+        ]
+
+    def _search_sqlite(self, user_id, match, offset, limit, include_total):
+        params = {
+            'match': match,
+            'user_id': user_id,
+            'limit': limit,
+            'offset': offset
+        }
+
+        # bm25 weights: title, description, tags
+        rows = db.session.execute(text(f"""
+            SELECT video.id AS id,
+                   bm25(video_fts, 10.0, 1.0, 4.0) AS rank,
+                   snippet(video_fts, 0, '{MATCH_START}', '{MATCH_END}', '...', 12) AS title_snippet,
+                   snippet(video_fts, 1, '{MATCH_START}', '{MATCH_END}', '...', 24) AS description_snippet
+            FROM video_fts
+            JOIN video ON video.id = video_fts.rowid
+            JOIN channel ON channel.id = video.channel_id
+            WHERE video_fts MATCH :match AND channel.user_id = :user_id
+            ORDER BY rank
+            LIMIT :limit OFFSET :offset
+        """), params).all()
+
+        if not include_total:
+            return rows, None
+
+        total = db.session.execute(text("""
+            SELECT count(*)
+            FROM video_fts
+            JOIN video ON video.id = video_fts.rowid
+            JOIN channel ON channel.id = video.channel_id
+            WHERE video_fts MATCH :match AND channel.user_id = :user_id
+        """), params).scalar()
+
+        return rows, total
+
+    def _search_postgres(self, user_id, query_text, offset, limit, include_total):
+        params = {
+            'query': query_text,
+            'user_id': user_id,
+            'limit': limit,
+            'offset': offset,
+            'title_options': f'StartSel={MATCH_START}, StopSel={MATCH_END}, HighlightAll=true',
+            'description_options': f'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxWords=35, MinWords=15'
+        }
+
+        # Headlines are expensive, so they are only built for the page of hits
+        rows = db.session.execute(text("""
+            SELECT hits.id AS id,
+                   hits.rank AS rank,
+                   ts_headline('english', video.title, hits.query, :title_options) AS title_snippet,
+                   ts_headline('english', coalesce(video.description, ''), hits.query, :description_options) AS description_snippet
+            FROM (
+                SELECT video.id AS id, ts_rank_cd(video.search_vector, query) AS rank, query
+                FROM video
+                JOIN channel ON channel.id = video.channel_id,
+                     websearch_to_tsquery('english', :query) AS query
+                WHERE video.search_vector @@ query AND channel.user_id = :user_id
+                ORDER BY rank DESC, video.id DESC
+                LIMIT :limit OFFSET :offset
+            ) AS hits
+            JOIN video ON video.id = hits.id
+            ORDER BY hits.rank DESC, hits.id DESC
+        """), params).all()
+
+        if not include_total:
+            return rows, None
+
+        total = db.session.execute(text("""
+            SELECT count(*)
+            FROM video
+            JOIN channel ON channel.id = video.channel_id
+            WHERE video.search_vector @@ websearch_to_tsquery('english', :query)
+              AND channel.user_id = :user_id
+        """), params).scalar()
+
+        return rows, total
+
+    def _search_fallback(self, user_id, query_text, offset, limit, include_total, fields=None):
+        search_filter = db.or_(
+            Video.title.ilike(f'%{query_text}%'),
+            Video.description.ilike(f'%{query_text}%'),
+            Video.tags.ilike(f'%{query_text}%')
+        )
+
+        query = db.session.query(Video).join(Channel).filter(
+            Channel.user_id == user_id,
+            search_filter
+        )
+        page = load_fields(query, Video, fields).order_by(Video.published_at.desc())
+        videos = page.offset(offset).limit(limit).all()
+        total = query.count() if include_total else None
+
+        results = [{'video': video, 'rank': None, 'highlights': {}} for video in videos]
+        return results, total
+
+    def _fts5_query(self, query_text):
+        """Turn free text into an FTS5 query: every word must match, the last as a prefix"""
+        terms = re.findall(r'\w+', query_text)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def _highlight(self, snippet):
+        if not snippet:
+            return snippet
+        return html.escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
@@ -0,0 +1,227 @@
+import os
+import json
+import zlib
+import threading
+import numpy as np
+from services.extractive_summarizer import WORD_RE, STOPWORDS
+
+# Size of the hashed feature space; collisions are rare at this size and harmless
+FEATURES = 1 << 20
+# Highest-weighted terms kept per video, and used per query
+SIMILARITY_MAX_TERMS = int(os.getenv('SIMILARITY_MAX_TERMS', 128))
+SIMILARITY_QUERY_TERMS = int(os.getenv('SIMILARITY_QUERY_TERMS', 64))
+
+# Repeat counts of each field's words, so titles and tags count for more
+FIELD_WEIGHTS = (('title', 3), ('tags', 2), ('description', 1), ('transcript', 1))
+
+def term_vector(fields, max_terms=None):
+    """Hash the words of (text, weight) pairs into (terms, weights) arrays
+
+    terms are ascending uint32 feature ids and weights float32 1 + log(tf),
+    keeping only the max_terms highest weights.
+    """
+    counts = {}
+    for text, weight in fields:
+        for word in WORD_RE.findall(text.lower()) if text else ():
+            if word not in STOPWORDS:
+                feature = zlib.crc32(word.encode()) & (FEATURES - 1)
+                counts[feature] = counts.get(feature, 0) + weight
+    if not counts:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.float32)
+
+    terms = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+    weights = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    max_terms = max_terms or SIMILARITY_MAX_TERMS
+    if len(terms) > max_terms:
+        keep = np.argpartition(-weights, max_terms)[:max_terms]
+        terms, weights = terms[keep], weights[keep]
+    order = np.argsort(terms)
+    return terms[order], weights[order]
+
+def video_vector(video):
+    """term_vector of a video's title, tags, description and transcript"""
+    tags = video.tags or ''
+    try:
+        tags = ' '.join(json.loads(tags))
+    except (ValueError, TypeError):
+        pass
+    values = {
+        'title': video.title,
+        'tags': tags,
+        'description': video.description,
+        'transcript': video.transcript
+    }
+    return term_vector((values[field], weight) for field, weight in FIELD_WEIGHTS)
+
+def idf(df, documents):
+    return np.log((documents + 1) / (df + 1)) + 1
+
+class Postings:
+    """Term-sorted postings for a set of vectors, rows numbered in input order"""
+
+    def __init__(self, vectors=()):
+        vectors = list(vectors)
+        lengths = np.fromiter((len(terms) for terms, _ in vectors), dtype=np.int64, count=len(vectors))
+        terms = np.concatenate([terms for terms, _ in vectors]) if vectors else np.empty(0, dtype=np.uint32)
+        weights = np.concatenate([weights for _, weights in vectors]) if vectors else np.empty(0, dtype=np.float32)
+        rows = np.repeat(np.arange(len(vectors), dtype=np.int32), lengths)
+        self._sort(terms, rows, weights, len(vectors))
+
+    def _sort(self, terms, rows, weights, count):
+        order = np.argsort(terms, kind='stable')
+        self.terms = terms[order]
+        self.rows = rows[order].astype(np.int32)
+        self.weights = weights[order]
+        self.count = count
+        self.norms = np.ones(count, dtype=np.float32)
+
+    def ranges(self, terms):
+        return np.searchsorted(self.terms, terms, side='left'), np.searchsorted(self.terms, terms, side='right')
+
+    def compute_norms(self, df_of, documents):
+        """Row norms with IDF from df_of(terms), the document frequencies across all segments"""
+        weighted = self.weights * idf(df_of(self.terms), documents)
+        norms = np.sqrt(np.bincount(self.rows, weights=weighted * weighted, minlength=self.count))
+        self.norms = np.where(norms > 0, norms, 1).astype(np.float32)
+
+    def scores(self, lo, hi, query):
+        """Dot products of every row with a query given as term ranges and IDF-weighted values"""
+        lengths = hi - lo
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(self.count)
+        postings = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        contributions = self.weights[postings] * np.repeat(query, lengths)
+        return np.bincount(self.rows[postings], weights=contributions, minlength=self.count) / self.norms
+
+class SimilarityIndex:
+    """In-memory inverted index over one user's video vectors
+
+    Postings live in flat NumPy arrays sorted by term, so a query is a few
+    searchsorted calls, a gather and a bincount. Updates go to a small
+    pending segment that queries search as well, and the replaced rows are
+    marked dead; once pending grows past a tenth of the index, both are
+    merged into new arrays. Scores are cosine similarities of TF-IDF
+    vectors, with IDF taken from the current document frequencies.
+    """
+
+    def __init__(self):
+        self.main = Postings()
+        self.video_ids = np.empty(0, dtype=np.int64)  # main row -> Video.id
+        self.alive = np.empty(0, dtype=bool)
+        self.row_of = {}
+        self.pending = {}  # Video.id -> (terms, weights) not merged yet
+        self._pending_ids = np.empty(0, dtype=np.int64)
+        self._pending_postings = None  # built on the first query after a change
+        self.watermark = None  # newest VideoVector.updated_at loaded
+        self.recent = {}  # Video.id -> updated_at of rows loaded near the watermark
+        self.checked = 0.0
+        self.lock = threading.Lock()
+        self.refreshing = threading.Lock()
+
+    def __len__(self):
+        return len(self.row_of) + len(self.pending)
+
+    def update(self, video_id, terms, weights, merge=True):
+        """Replace a video's vector; merge=False defers merging to flush()"""
+        with self.lock:
+            self._discard(video_id)
+            self.pending[video_id] = (terms, weights)
+            self._pending_postings = None
+            if merge and len(self.pending) > max(1000, len(self.row_of) // 10):
+                self._merge()
+
+    def remove(self, video_id):
+        with self.lock:
+            self._discard(video_id)
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                self._merge()
+
+    def query(self, terms, weights, limit=10, exclude=None):
+        """Return [(video_id, score)] for the most similar videos, best first"""
+        with self.lock:
+            if not len(terms) or not len(self):
+                return []
+            pending = self._pending()
+            documents = len(self)
+
+            main_lo, main_hi = self.main.ranges(terms)
+            pending_lo, pending_hi = pending.ranges(terms)
+            query = weights * idf(main_hi - main_lo + pending_hi - pending_lo, documents)
+            query_norm = np.linalg.norm(query)
+            # The heaviest query terms decide the ranking; the rest only cost time
+            if len(terms) > SIMILARITY_QUERY_TERMS:
+                top = np.argpartition(-query, SIMILARITY_QUERY_TERMS)[:SIMILARITY_QUERY_TERMS]
+                main_lo, main_hi, pending_lo, pending_hi, query = (
+                    main_lo[top], main_hi[top], pending_lo[top], pending_hi[top], query[top]
+                )
+
+            results = []
+            for ids, scores in (
+                (self.video_ids, self.main.scores(main_lo, main_hi, query)),
+                (self._pending_ids, pending.scores(pending_lo, pending_hi, query))
+            ):
+                if ids is self.video_ids:
+                    scores[~self.alive] = 0
+                count = min(limit + 1, len(scores))
+                if count:
+                    best = np.argpartition(-scores, count - 1)[:count]
+                    results.extend((int(ids[row]), float(scores[row] / query_norm)) for row in best)
+
+        results = [
+            (video_id, score) for video_id, score in results
+            if score > 0 and video_id != exclude
+        ]
+        results.sort(key=lambda result: -result[1])
+        return results[:limit]
+
+    def _df(self, terms):
+        lo, hi = self.main.ranges(terms)
+        df = hi - lo
+        if self._pending_postings is not None:
+            lo, hi = self._pending_postings.ranges(terms)
+            df += hi - lo
+        return df
+
+    def _pending(self):
+        if self._pending_postings is None:
+            self._pending_ids = np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))
+            self._pending_postings = Postings(self.pending.values())
+            self._pending_postings.compute_norms(self._df, len(self))
+        return self._pending_postings
+
+    def _discard(self, video_id):
+        if self.pending.pop(video_id, None) is not None:
+            self._pending_postings = None
+        row = self.row_of.pop(video_id, None)
+        if row is not None:
+            self.alive[row] = False
+
+    def _merge(self):
+        """Rebuild the main postings from its live rows and the pending vectors"""
+        live = np.flatnonzero(self.alive)
+        remap = np.full(len(self.video_ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+        kept = self.alive[self.main.rows]
+
+        pending = Postings(self.pending.values())
+        video_ids = np.concatenate([self.video_ids[live], np.fromiter(self.pending, dtype=np.int64,
+                                                                      count=len(self.pending))])
+        main = Postings()
+        main._sort(
+            np.concatenate([self.main.terms[kept], pending.terms]),
+            np.concatenate([remap[self.main.rows[kept]], pending.rows + len(live)]),
+            np.concatenate([self.main.weights[kept], pending.weights]),
+            len(video_ids)
+        )
+
+        self.main = main
+        self.video_ids = video_ids
+        self.alive = np.ones(len(video_ids), dtype=bool)
+        self.row_of = {int(video_id): row for row, video_id in enumerate(video_ids)}
+        self.pending = {}
+        self._pending_postings = None
+        self.main.compute_norms(self._df, len(video_ids))
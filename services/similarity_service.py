@@ -0,0 +1,189 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy.orm import undefer, selectinload
+from models import db, Channel, Video, VideoVector
+from services.pagination import load_fields
+from services.similarity_index import SimilarityIndex, term_vector, video_vector
+
+# How often a process checks the database for vectors written by other processes
+SIMILARITY_REFRESH_SECONDS = int(os.getenv('SIMILARITY_REFRESH_SECONDS', 30))
+# How far back each refresh looks again, for vectors whose transaction
+# committed after a newer updated_at had already been loaded
+SIMILARITY_REFRESH_OVERLAP = timedelta(seconds=int(os.getenv('SIMILARITY_REFRESH_OVERLAP_SECONDS', 300)))
+# Users whose indexes are kept in memory
+SIMILARITY_MAX_USERS = int(os.getenv('SIMILARITY_MAX_USERS', 64))
+
+# Rows loaded per query when building an index or vectorizing missing videos
+LOAD_BATCH_SIZE = 5000
+VECTORIZE_BATCH_SIZE = 200
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def _overlap_start(watermark):
+    return max(watermark, datetime.min + SIMILARITY_REFRESH_OVERLAP) - SIMILARITY_REFRESH_OVERLAP
+
+class SimilarityService:
+    """Related videos and "videos about X" from per-user TF-IDF indexes
+
+    Vectors are computed when a video's text changes (see index_videos) and
+    stored in video_vector. Each process keeps an in-memory index per
+    active user, loaded on first use and brought up to date with vectors
+    written elsewhere at most every SIMILARITY_REFRESH_SECONDS. Videos
+    stored before similarity search existed are vectorized by a background
+    job queued on first load; until it finishes they are not found.
+    """
+
+    def index_video(self, video):
+        """Store (or refresh) one video's vector; call after its text or transcript changes"""
+        self._store_vector(video, video.channel.user_id)
+
+    def index_videos(self, user_id, video_ids):
+        """Vectorize videos by Video.id, loading their text in one query"""
+        if not video_ids:
+            return
+        videos = Video.query.filter(Video.id.in_(video_ids)).options(
+            undefer(Video.description), selectinload(Video.transcript_data), selectinload(Video.vector)
+        ).all()
+        for video in videos:
+            self._store_vector(video, user_id)
+
+    def similar_videos(self, user_id, video, limit=10, fields=None):
+        """Return [(Video, score)] for the user's videos most like the given one
+
+        Videos are loaded with only the given to_dict fields.
+        """
+        vector = video.vector
+        terms, weights = self._unpack(vector) if vector is not None else video_vector(video)
+        results = self.index(user_id).query(terms, weights, limit, exclude=video.id)
+        return self._resolve(user_id, results, fields)
+
+    def search(self, user_id, query_text, limit=10, fields=None):
+        """Return [(Video, score)] for the user's videos most like a piece of text"""
+        terms, weights = term_vector([(query_text, 1)])
+        return self._resolve(user_id, self.index(user_id).query(terms, weights, limit), fields)
+
+    def index(self, user_id):
+        """The user's in-memory index, loaded or refreshed as needed"""
+        user_id = int(user_id)
+        with _indexes_lock:
+            index = _indexes.get(user_id)
+            if index is None:
+                index = _indexes[user_id] = SimilarityIndex()
+                while len(_indexes) > SIMILARITY_MAX_USERS:
+                    _indexes.popitem(last=False)
+            _indexes.move_to_end(user_id)
+
+        # One request per process refreshes; others use the index as it is
+        if time.monotonic() - index.checked >= SIMILARITY_REFRESH_SECONDS and \
+                index.refreshing.acquire(blocking=False):
+            try:
+                first_load = index.watermark is None
+                self._refresh(user_id, index)
+                if first_load and self._has_missing(user_id):
+                    self._queue_vectorize_missing(user_id)
+            finally:
+                index.refreshing.release()
+        return index
+
+    def vectorize_missing(self, user_id):
+        """Compute vectors for videos stored before similarity search existed
+
+        Runs as the similarity.vectorize_missing task; commits per batch.
+        """
+        while True:
+            video_ids = [
+                video_id for (video_id,) in self._missing(user_id).order_by(Video.id).limit(VECTORIZE_BATCH_SIZE)
+            ]
+            if not video_ids:
+                break
+            self.index_videos(user_id, video_ids)
+            db.session.commit()
+
+    def _refresh(self, user_id, index):
+        """Apply vectors written since the index last looked
+
+        Rows are read back to SIMILARITY_REFRESH_OVERLAP before the
+        watermark; rows already applied with the same updated_at are skipped.
+        """
+        index.checked = time.monotonic()
+        since = _overlap_start(index.watermark) if index.watermark is not None else None
+        last_id = 0
+        while True:
+            query = db.session.query(
+                VideoVector.video_id, VideoVector.terms, VideoVector.weights, VideoVector.updated_at
+            ).filter(VideoVector.user_id == user_id, VideoVector.video_id > last_id)
+            if since is not None:
+                query = query.filter(VideoVector.updated_at >= since)
+            rows = query.order_by(VideoVector.video_id).limit(LOAD_BATCH_SIZE).all()
+            if not rows:
+                break
+            last_id = rows[-1].video_id
+            for row in rows:
+                if row.updated_at is not None and index.recent.get(row.video_id) == row.updated_at:
+                    continue
+                index.update(row.video_id, *self._unpack(row), merge=False)
+                if row.updated_at:
+                    index.recent[row.video_id] = row.updated_at
+                    if index.watermark is None or row.updated_at > index.watermark:
+                        index.watermark = row.updated_at
+        if index.watermark is None:
+            index.watermark = datetime.min
+        # Only rows inside the next overlap window can be read again
+        cutoff = _overlap_start(index.watermark)
+        index.recent = {video_id: updated_at for video_id, updated_at in index.recent.items() if updated_at >= cutoff}
+        index.flush()
+
+    def _missing(self, user_id):
+        """Query of the ids of the user's videos without a stored vector"""
+        return db.session.query(Video.id).join(Channel).outerjoin(
+            VideoVector, VideoVector.video_id == Video.id
+        ).filter(
+            Channel.user_id == user_id,
+            VideoVector.video_id.is_(None)
+        )
+
+    def _has_missing(self, user_id):
+        return self._missing(user_id).first() is not None
+
+    def _queue_vectorize_missing(self, user_id):
+        # Imported here: tasks imports the sync service, which imports this module
+        from tasks import vectorize_missing_task
+        try:
+            vectorize_missing_task.delay(user_id)
+        except Exception as e:
+            # Reads go on with the vectors that exist; the next load queues it again
+            print(f"Failed to queue vectorizing for user {user_id}: {e}")
+
+    def _store_vector(self, video, user_id):
+        terms, weights = video_vector(video)
+        if video.vector is None:
+            video.vector = VideoVector(user_id=user_id)
+        video.vector.terms = terms.tobytes()
+        video.vector.weights = weights.tobytes()
+        video.vector.updated_at = datetime.utcnow()
+
+        with _indexes_lock:
+            index = _indexes.get(int(user_id))
+        if index is not None and video.id is not None:
+            index.update(video.id, terms, weights)
+
+    def _resolve(self, user_id, results, fields=None):
+        """Load the Video rows for (video_id, score) results, dropping any since deleted"""
+        if not results:
+            return []
+        query = db.session.query(Video).join(Channel).filter(
+            Video.id.in_([video_id for video_id, _ in results]),
+            Channel.user_id == user_id
+        )
+        videos = {video.id: video for video in load_fields(query, Video, fields)}
+        return [(videos[video_id], score) for video_id, score in results if video_id in videos]
+
+    @staticmethod
+    def _unpack(vector):
+        return (np.frombuffer(vector.terms, dtype=np.uint32),
+                np.frombuffer(vector.weights, dtype=np.float32))
@@ -0,0 +1,21 @@
+import functools
+import threading
+
+def process_singleton(factory):
+    """Make a no-argument factory build its object once per process, on first call
+
+    Threads racing to the first call share the one object; later calls
+    return it without locking.
+    """
+    lock = threading.Lock()
+    built = []
+
+    @functools.wraps(factory)
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(factory())
+        return built[0]
+
+    return get
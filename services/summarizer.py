@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Transcript tokens sent per map call, and map calls in flight at once
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', 3000))
+SUMMARY_CONCURRENCY = int(os.getenv('SUMMARY_CONCURRENCY', 4))
+
+# Rough size of a token in English text, used instead of a tokenizer
+CHARS_PER_TOKEN = 4
+
+MAP_SYSTEM_PROMPT = "You are a helpful assistant that takes concise notes on part of a video transcript."
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def chunk_text(text, max_tokens, segments=None):
+    """Split a transcript into pieces of at most max_tokens
+
+    With TranscriptSegments, cuts fall on segment boundaries; otherwise on
+    word boundaries. A single segment longer than the budget becomes its own
+    chunk.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks = []
+    if segments is not None and len(segments):
+        begin = 0
+        while begin < len(segments.text):
+            piece = segments.char_slice(begin, begin + max_chars)
+            if len(piece) > 1 and len(piece.text) > max_chars:
+                # Drop the segment that runs past the budget; it starts the next chunk
+                piece = piece.char_slice(0, piece.offsets[-2])
+            chunks.append(piece.text)
+            begin += piece.offsets[-1]
+        return chunks
+
+    words = text.split()
+    current = []
+    size = 0
+    for word in words:
+        if current and size + len(word) + 1 > max_chars:
+            chunks.append(' '.join(current))
+            current = []
+            size = 0
+        current.append(word)
+        size += len(word) + 1
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+class MapReduceSummarizer:
+    """Summarize transcripts of any length with a chat model
+
+    Transcripts within the chunk budget go out in one call. Longer ones are
+    split into chunks whose notes are written concurrently (map), then the
+    notes are merged (reduce), in rounds if they still exceed the budget.
+
+    llm is a callable (messages, max_tokens, temperature) -> str, so tests
+    and benchmarks can substitute a local fake for the OpenAI API.
+    """
+
+    def __init__(self, llm, chunk_tokens=None, concurrency=None):
+        self.llm = llm
+        self.chunk_tokens = chunk_tokens or SUMMARY_CHUNK_TOKENS
+        self.concurrency = max(concurrency or SUMMARY_CONCURRENCY, 1)
+
+    def condense(self, transcript, title, segments=None, max_tokens=None):
+        """Return the transcript itself if it fits max_tokens, else merged chunk notes that do"""
+        max_tokens = max_tokens or self.chunk_tokens
+        if estimate_tokens(transcript) <= max_tokens:
+            return transcript
+
+        notes = self.map(chunk_text(transcript, self.chunk_tokens, segments), title)
+        while estimate_tokens('\n\n'.join(notes)) > max_tokens and len(notes) > 1:
+            notes = self.map(self._group(notes), title)
+        return '\n\n'.join(notes)
+
+    def map(self, chunks, title):
+        """Take notes on each chunk, at most self.concurrency calls at a time; keeps chunk order"""
+        if len(chunks) == 1:
+            return [self._notes(chunks[0], title, 1, 1)]
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chunks))) as executor:
+            futures = [
+                executor.submit(self._notes, chunk, title, index + 1, len(chunks))
+                for index, chunk in enumerate(chunks)
+            ]
+            return [future.result() for future in futures]
+
+    def _notes(self, chunk, title, part, parts):
+        prompt = f"""
+        This is part {part} of {parts} of the transcript of a YouTube video titled "{title}".
+        Write concise notes covering every topic, claim, example and recommendation in it.
+        Reply with the notes only.
+
+        Transcript part:
+        {chunk}
+        """
+        return self.llm(
+            [
+                {"role": "system", "content": MAP_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=500,
+            temperature=0.3
+        )
+
+    def _group(self, notes):
+        """Pack consecutive notes into groups that fit the chunk budget"""
+        groups = []
+        current = []
+        for note in notes:
+            if current and estimate_tokens('\n\n'.join(current + [note])) > self.chunk_tokens:
+                groups.append('\n\n'.join(current))
+                current = []
+            current.append(note)
+        if current:
+            groups.append('\n\n'.join(current))
+        # Guarantee progress when single notes already fill the budget
+        if len(groups) == len(notes):
+            groups = ['\n\n'.join(notes[i:i + 2]) for i in range(0, len(notes), 2)]
+        return groups
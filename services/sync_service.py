@@ -0,0 +1,286 @@
+import os
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import undefer
+from models import db, Video
+from services.youtube_service import YouTubeService, to_naive_utc
+from services.similarity_service import SimilarityService
+from services.duplicate_service import DuplicateService, DUPLICATE_POLICY
+
+# Videos written per existence query and commit
+VIDEO_UPSERT_CHUNK_SIZE = int(os.getenv('VIDEO_UPSERT_CHUNK_SIZE', 500))
+
+# Metadata refreshed from the API when a known video is fetched again
+VIDEO_METADATA_FIELDS = (
+    'title', 'description', 'thumbnail_url', 'duration', 'view_count',
+    'like_count', 'comment_count', 'published_at', 'tags', 'category_id'
+)
+
+# Metadata that feeds a video's similarity vector
+VIDEO_TEXT_FIELDS = ('title', 'description', 'tags')
+
+# Videos per statistics refresh batch (the videos().list id limit)
+STATS_BATCH_SIZE = 50
+
+# Dialects with native INSERT ... ON CONFLICT
+UPSERT_DIALECTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert
+}
+
+class SyncService:
+    def __init__(self, job=None, priority='normal'):
+        self.job = job
+        self.youtube_service = YouTubeService(priority=priority)
+
+    def index_channel(self, channel, full=False):
+        """Index videos from a channel
+        
+        Once the channel has a watermark only uploads newer than it are
+        fetched, unless full is set. Either way paging is not capped, as the
+        watermark then moves to the newest upload and anything left unfetched
+        behind it would never be picked up.
+        """
+        watermark = {} if full else self._watermark(channel)
+        videos_data = self.youtube_service.get_channel_videos(
+            channel.channel_id,
+            uploads_playlist_id=self._uploads_playlist_id(channel),
+            limit=None,
+            on_page=self._record_page,
+            **watermark
+        )
+
+        new_videos = self._store_videos(channel, videos_data)
+        self._advance_watermark(channel, videos_data)
+
+        # Update channel sync time
+        channel.last_sync = datetime.utcnow()
+        db.session.commit()
+
+        return new_videos
+
+    def sync_channel(self, channel, user):
+        """Sync channel for new videos and auto-create blog posts if enabled"""
+        watermark = self._watermark(channel)
+        if watermark:
+            # Page back until the newest upload we already know about. No
+            # cap: stopping short would move the watermark past uploads
+            # that were never fetched
+            videos_data = self.youtube_service.get_channel_videos(
+                channel.channel_id,
+                uploads_playlist_id=self._uploads_playlist_id(channel),
+                limit=None,
+                on_page=self._record_page,
+                **watermark
+            )
+        else:
+            videos_data = self.youtube_service.get_channel_videos(
+                channel.channel_id,
+                uploads_playlist_id=self._uploads_playlist_id(channel),
+                limit=10,  # Get recent videos
+                on_page=self._record_page
+            )
+
+        new_videos = self._store_videos(channel, videos_data)
+        self._advance_watermark(channel, videos_data)
+
+        # Auto-create blog posts if enabled
+        auto_created = 0
+        if user.auto_sync_enabled and user.wordpress_url:
+            from services.blog_service import BlogService
+            blog_service = BlogService()
+            # Re-uploads of videos that already have a post are not written up again
+            duplicates = DuplicateService().post_index(user.id) if DUPLICATE_POLICY != 'generate' else None
+
+            for video in new_videos:
+                try:
+                    blog_post = blog_service.auto_generate_blog_post(video, user, duplicates)
+                    if blog_post is None or blog_post.video_id != video.id:
+                        continue
+                    auto_created += 1
+                    self._record_post()
+                except Exception as e:
+                    print(f"Failed to auto-create blog post for video {video.video_id}: {e}")
+                    self._record_error(f"Failed to auto-create blog post for video {video.video_id}: {e}")
+
+        # Update sync time
+        channel.last_sync = datetime.utcnow()
+        db.session.commit()
+
+        return new_videos, auto_created
+
+    def refresh_statistics(self, channel):
+        """Refresh view, like and comment counts of a channel's stored videos
+        
+        Walks the channel in id order, one videos().list(part='statistics')
+        call per batch, and bulk-updates only the rows whose counts changed.
+        Returns the number of updated videos.
+        """
+        updated = 0
+        last_id = 0
+
+        while True:
+            batch = db.session.query(
+                Video.id, Video.video_id, Video.view_count, Video.like_count, Video.comment_count
+            ).filter(
+                Video.channel_id == channel.id,
+                Video.id > last_id
+            ).order_by(Video.id).limit(STATS_BATCH_SIZE).all()
+
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            statistics = self.youtube_service.get_video_statistics([video.video_id for video in batch])
+            self._record_page(batch)
+
+            changed_rows = []
+            for video in batch:
+                stats = statistics.get(video.video_id)
+                if stats and (
+                    stats['view_count'] != video.view_count
+                    or stats['like_count'] != video.like_count
+                    or stats['comment_count'] != video.comment_count
+                ):
+                    changed_rows.append(dict(stats, id=video.id))
+
+            if changed_rows:
+                db.session.bulk_update_mappings(Video, changed_rows)
+                updated += len(changed_rows)
+                if self.job:
+                    self.job.videos_updated = (self.job.videos_updated or 0) + len(changed_rows)
+                db.session.commit()
+
+        channel.stats_refreshed_at = datetime.utcnow()
+        db.session.commit()
+
+        return updated
+
+    def _uploads_playlist_id(self, channel):
+        """Return the stored uploads playlist id, resolving it once for older rows"""
+        if not channel.uploads_playlist_id:
+            channel.uploads_playlist_id = self.youtube_service.get_uploads_playlist_id(channel.channel_id)
+            db.session.commit()
+        return channel.uploads_playlist_id
+
+    def _watermark(self, channel):
+        if not channel.last_video_id and not channel.last_video_published_at:
+            return {}
+        return {
+            'since_video_id': channel.last_video_id,
+            'since_published_at': channel.last_video_published_at
+        }
+
+    def _advance_watermark(self, channel, videos_data):
+        """Move the channel watermark to the newest fetched upload"""
+        dated = [video for video in videos_data if video['published_at']]
+        if not dated:
+            return
+
+        newest = max(dated, key=lambda video: video['published_at'])
+        published_at = to_naive_utc(newest['published_at'])
+        if not channel.last_video_published_at or published_at > channel.last_video_published_at:
+            channel.last_video_id = newest['video_id']
+            channel.last_video_published_at = published_at
+
+    def _store_videos(self, channel, videos_data):
+        """Upsert fetched videos and return the newly inserted records"""
+        new_video_ids = self.upsert_videos(channel, videos_data)
+        if not new_video_ids:
+            return []
+        query = Video.query.options(undefer(Video.description))
+        return query.filter(Video.video_id.in_(new_video_ids)).order_by(Video.published_at).all()
+
+    def upsert_videos(self, channel, videos_data, chunk_size=None):
+        """Insert new videos and refresh metadata of known ones in bulk
+        
+        Each chunk costs one IN query to find existing rows and one batched
+        write; rows whose metadata did not change are skipped. Returns the
+        YouTube ids of inserted videos.
+        """
+        chunk_size = chunk_size or VIDEO_UPSERT_CHUNK_SIZE
+        new_video_ids = []
+
+        for i in range(0, len(videos_data), chunk_size):
+            # Key by video id so a page repeated by the API is written once
+            rows = {}
+            for video_data in videos_data[i:i + chunk_size]:
+                row = {field: video_data[field] for field in VIDEO_METADATA_FIELDS}
+                row['published_at'] = to_naive_utc(row['published_at'])
+                row['video_id'] = video_data['video_id']
+                row['channel_id'] = channel.id
+                rows[row['video_id']] = row
+
+            existing = {
+                video.video_id: video for video in db.session.query(
+                    Video.id, Video.video_id, *[getattr(Video, field) for field in VIDEO_METADATA_FIELDS]
+                ).filter(Video.video_id.in_(list(rows)))
+            }
+
+            new_rows = [row for video_id, row in rows.items() if video_id not in existing]
+            changed_rows = [
+                dict(row, id=existing[video_id].id) for video_id, row in rows.items()
+                if video_id in existing and any(
+                    getattr(existing[video_id], field) != row[field] for field in VIDEO_METADATA_FIELDS
+                )
+            ]
+
+            self._write_video_rows(new_rows, changed_rows)
+            new_video_ids.extend(row['video_id'] for row in new_rows)
+
+            # New videos and edited titles, descriptions or tags get fresh similarity vectors
+            retext = [row['video_id'] for row in new_rows] + [
+                video_id for video_id, row in rows.items()
+                if video_id in existing and any(
+                    getattr(existing[video_id], field) != row[field] for field in VIDEO_TEXT_FIELDS
+                )
+            ]
+            if retext:
+                SimilarityService().index_videos(channel.user_id, [
+                    video_id for (video_id,) in db.session.query(Video.id).filter(Video.video_id.in_(retext))
+                ])
+
+            if self.job:
+                self.job.videos_inserted = (self.job.videos_inserted or 0) + len(new_rows)
+            db.session.commit()
+
+        return new_video_ids
+
+    def _write_video_rows(self, new_rows, changed_rows):
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in UPSERT_DIALECTS:
+            rows = new_rows + [
+                {key: value for key, value in row.items() if key != 'id'} for row in changed_rows
+            ]
+            if not rows:
+                return
+
+            # ON CONFLICT also covers videos inserted by a concurrent job
+            stmt = UPSERT_DIALECTS[dialect](Video.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['video_id'],
+                set_={field: stmt.excluded[field] for field in VIDEO_METADATA_FIELDS}
+            )
+            db.session.execute(stmt, rows)
+        else:
+            if new_rows:
+                db.session.bulk_insert_mappings(Video, new_rows)
+            if changed_rows:
+                db.session.bulk_update_mappings(Video, changed_rows)
+
+    def _record_page(self, page_videos):
+        if self.job:
+            self.job.pages_fetched = (self.job.pages_fetched or 0) + 1
+            db.session.commit()
+
+    def _record_post(self):
+        if self.job:
+            self.job.posts_generated = (self.job.posts_generated or 0) + 1
+            db.session.commit()
+
+    def _record_error(self, message):
+        if self.job:
+            self.job.add_error(message)
+            db.session.commit()
@@ -0,0 +1,100 @@
+import os
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import undefer, selectinload
+from models import db, Video, VideoTranscript
+from services.content_service import ContentService
+from services.search_service import SearchService
+
+# Caption fetches in flight at once during a backfill
+TRANSCRIPT_BACKFILL_CONCURRENCY = int(os.getenv('TRANSCRIPT_BACKFILL_CONCURRENCY', 8))
+
+# How long to wait before checking a video again: captions are rarely added
+# after upload, while errors (throttling, timeouts) are usually transient
+TRANSCRIPT_RETRY_UNAVAILABLE = timedelta(days=int(os.getenv('TRANSCRIPT_RETRY_UNAVAILABLE_DAYS', 7)))
+TRANSCRIPT_RETRY_ERROR = timedelta(minutes=int(os.getenv('TRANSCRIPT_RETRY_ERROR_MINUTES', 60)))
+
+def transcript_due(video, now=None):
+    """False while a video is inside its no-captions/error back-off window"""
+    now = now or datetime.utcnow()
+    return video.transcript_retry_after is None or video.transcript_retry_after <= now
+
+def record_transcript_result(video, status, now=None):
+    now = now or datetime.utcnow()
+    video.transcript_status = status
+    video.transcript_checked_at = now
+    if status == 'unavailable':
+        video.transcript_retry_after = now + TRANSCRIPT_RETRY_UNAVAILABLE
+    elif status == 'error':
+        video.transcript_retry_after = now + TRANSCRIPT_RETRY_ERROR
+    else:
+        video.transcript_retry_after = None
+
+class TranscriptBackfill:
+    """Fetch missing transcripts, many videos at a time
+
+    Caption requests run on a thread pool; storing them and recording the
+    outcome happens on the calling thread, one commit per batch.
+    """
+    def __init__(self, job=None, concurrency=None, content_service=None):
+        self.job = job
+        self.concurrency = max(concurrency or TRANSCRIPT_BACKFILL_CONCURRENCY, 1)
+        self.content_service = content_service or ContentService()
+        self.search_service = SearchService()
+
+    def backfill_video(self, video):
+        """Fetch and store one video's transcript unless it is backing off; returns True if stored"""
+        if video.transcript_data is not None or not transcript_due(video):
+            return False
+        segments, status = self.content_service.fetch_transcript_segments(video.video_id)
+        return self._store(video, segments, status)
+
+    def backfill_channel(self, channel, batch_size=None):
+        """Fetch transcripts for all of a channel's videos that lack one and are due
+
+        Returns counts per outcome.
+        """
+        batch_size = batch_size or self.concurrency * 10
+        counts = {'available': 0, 'unavailable': 0, 'error': 0}
+        last_id = 0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                now = datetime.utcnow()
+                videos = Video.query.outerjoin(VideoTranscript).filter(
+                    Video.channel_id == channel.id,
+                    Video.id > last_id,
+                    VideoTranscript.video_id.is_(None),
+                    db.or_(Video.transcript_retry_after.is_(None), Video.transcript_retry_after <= now)
+                ).options(
+                    # Storing a transcript also refreshes the video's similarity vector
+                    undefer(Video.description), selectinload(Video.vector)
+                ).order_by(Video.id).limit(batch_size).all()
+                if not videos:
+                    break
+                last_id = videos[-1].id
+
+                results = executor.map(self.content_service.fetch_transcript_segments,
+                                       [video.video_id for video in videos])
+                stored = 0
+                for video, (segments, status) in zip(videos, results):
+                    stored += self._store(video, segments, status, now)
+                    counts[status] += 1
+                    if status == 'error':
+                        self._record_error(f"Transcript fetch failed for video {video.video_id}")
+
+                if self.job:
+                    self.job.videos_updated = (self.job.videos_updated or 0) + stored
+                db.session.commit()
+
+        return counts
+
+    def _store(self, video, segments, status, now=None):
+        if segments:
+            self.search_service.store_transcript(video, segments)
+        record_transcript_result(video, status, now)
+        return bool(segments)
+
+    def _record_error(self, message):
+        if self.job:
+            self.job.add_error(message)
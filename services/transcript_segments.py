@@ -0,0 +1,137 @@
+import sys
+import struct
+from array import array
+import numpy as np
+from bisect import bisect_left, bisect_right
+
+# Serialized layout (little-endian):
+#   magic b'TSG1', flags (uint8), segment count n (uint32)
+#   starts      n x float64   seconds from the start of the video
+#   durations   n x float64
+#   offsets     n+1 x uint32  character offsets of each segment in text
+#   text        UTF-8, only when flags & HAS_TEXT
+MAGIC = b'TSG1'
+HEADER = struct.Struct('<4sBI')
+HAS_TEXT = 1
+SEPARATOR = ' '
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+def _to_array(typecode, values):
+    result = array(typecode)
+    result.frombytes(values.tobytes())
+    return result
+
+class TranscriptSegments:
+    """Timed caption segments packed into arrays over a single text buffer
+
+    text is the segments joined by a space, so it is also the plain
+    transcript. Segment i covers text[offsets[i]:offsets[i + 1] - 1] and
+    starts at starts[i] seconds. Slicing returns another TranscriptSegments
+    sharing no per-segment Python objects.
+    """
+    __slots__ = ('text', 'starts', 'durations', 'offsets')
+
+    def __init__(self, text='', starts=None, durations=None, offsets=None):
+        self.text = text
+        self.starts = starts if starts is not None else array('d')
+        self.durations = durations if durations is not None else array('d')
+        self.offsets = offsets if offsets is not None else array('I', [0])
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build from caption entries with 'text', 'start' and 'duration' keys"""
+        # Fill each array in one np.fromiter pass of known length rather than
+        # growing it entry by entry, then hand the buffers to array
+        entries = entries if isinstance(entries, list) else list(entries)
+        count = len(entries)
+        parts = [entry['text'] for entry in entries]
+        starts = np.fromiter((entry.get('start', 0.0) for entry in entries), np.float64, count)
+        durations = np.fromiter((entry.get('duration', 0.0) for entry in entries), np.float64, count)
+        offsets = np.zeros(count + 1, np.uint32)
+        np.cumsum(np.fromiter(map(len, parts), np.uint32, count) + len(SEPARATOR), out=offsets[1:])
+        return cls(SEPARATOR.join(parts), _to_array('d', starts), _to_array('d', durations),
+                   _to_array('I', offsets))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        """Yield (start, duration, text) per segment"""
+        for i in range(len(self.starts)):
+            yield self.starts[i], self.durations[i], self.segment_text(i)
+
+    def segment_text(self, i):
+        return self.text[self.offsets[i]:self.offsets[i + 1] - len(SEPARATOR)]
+
+    @property
+    def end(self):
+        """Seconds at which the last segment ends"""
+        return max((start + duration for start, duration in zip(self.starts, self.durations)), default=0.0)
+
+    def index_at(self, seconds):
+        """Index of the segment being spoken at the given time, or -1 before the first"""
+        return bisect_right(self.starts, seconds) - 1
+
+    def time_slice(self, start, end):
+        """Segments that overlap the [start, end) time range"""
+        first = max(self.index_at(start), 0)
+        if first < len(self) and self.starts[first] + self.durations[first] <= start:
+            first += 1
+        return self._slice(first, bisect_left(self.starts, end))
+
+    def char_slice(self, begin, end):
+        """Segments that overlap the [begin, end) range of text"""
+        first = max(bisect_right(self.offsets, begin) - 1, 0)
+        last = min(bisect_left(self.offsets, end), len(self))
+        return self._slice(first, last)
+
+    def _slice(self, first, last):
+        if last <= first:
+            return TranscriptSegments()
+        base = self.offsets[first]
+        offsets = array('I', (offset - base for offset in self.offsets[first:last + 1]))
+        text = self.text[base:self.offsets[last] - len(SEPARATOR)]
+        return TranscriptSegments(text, self.starts[first:last], self.durations[first:last], offsets)
+
+    def to_bytes(self, include_text=True):
+        """Serialize; without text, from_bytes needs the text passed back in"""
+        parts = [
+            HEADER.pack(MAGIC, HAS_TEXT if include_text else 0, len(self)),
+            _little_endian(self.starts).tobytes(),
+            _little_endian(self.durations).tobytes(),
+            _little_endian(self.offsets).tobytes()
+        ]
+        if include_text:
+            parts.append(self.text.encode('utf-8'))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data, text=None):
+        """Inverse of to_bytes; raises ValueError if data is not a segment blob"""
+        if len(data) < HEADER.size:
+            raise ValueError('Truncated transcript segments')
+        magic, flags, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Not a transcript segments blob')
+
+        arrays = []
+        position = HEADER.size
+        for typecode, length in (('d', count), ('d', count), ('I', count + 1)):
+            values = array(typecode)
+            size = values.itemsize * length
+            values.frombytes(data[position:position + size])
+            if len(values) != length:
+                raise ValueError('Truncated transcript segments')
+            arrays.append(_little_endian(values))
+            position += size
+
+        if flags & HAS_TEXT:
+            text = bytes(data[position:]).decode('utf-8')
+        elif text is None:
+            raise ValueError('Transcript segments were serialized without text')
+        return cls(text, *arrays)
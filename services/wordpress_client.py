@@ -0,0 +1,193 @@
+import os
+import time
+import threading
+import http.client
+from collections import OrderedDict
+from contextlib import contextmanager
+from xmlrpc import client as xmlrpc_client
+from wordpress_xmlrpc import Client
+from services.singleton import process_singleton
+
+# Idle clients (each holding one keep-alive connection) kept per site, how
+# long one may sit unused, and how many sites are remembered at once
+WORDPRESS_POOL_SIZE = int(os.getenv('WORDPRESS_POOL_SIZE', 4))
+WORDPRESS_IDLE_TIMEOUT = int(os.getenv('WORDPRESS_IDLE_TIMEOUT', 60))
+WORDPRESS_MAX_SITES = int(os.getenv('WORDPRESS_MAX_SITES', 256))
+WORDPRESS_TIMEOUT = int(os.getenv('WORDPRESS_TIMEOUT', 30))
+
+# Calls sent per system.multicall request
+WORDPRESS_MULTICALL_SIZE = int(os.getenv('WORDPRESS_MULTICALL_SIZE', 50))
+
+# Errors after which a client's connection can't be trusted; faults are
+# answers from WordPress and leave the connection usable
+CONNECTION_ERRORS = (OSError, http.client.HTTPException, xmlrpc_client.ProtocolError)
+
+def xmlrpc_url(wordpress_url):
+    """The XML-RPC endpoint of a site given its base URL"""
+    url = wordpress_url.rstrip('/')
+    if not url.endswith('/xmlrpc.php'):
+        url += '/xmlrpc.php'
+    return url
+
+class _TimeoutMixin:
+    def __init__(self, *args, timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+class KeepAliveTransport(_TimeoutMixin, xmlrpc_client.Transport):
+    """HTTP transport with a timeout; the connection stays open between requests"""
+
+class SafeKeepAliveTransport(_TimeoutMixin, xmlrpc_client.SafeTransport):
+    """HTTPS counterpart of KeepAliveTransport"""
+
+def multicall_batches(client, methods, batch_size=None):
+    """Send wordpress_xmlrpc methods in system.multicall batches, yielding each batch's results
+
+    Each yielded list has one entry per method in the batch, in order: the
+    method's processed result, or the xmlrpc Fault WordPress answered it
+    with. A connection error raises out of the generator, so callers have
+    already seen the results of the batches that went through.
+    """
+    batch_size = batch_size or WORDPRESS_MULTICALL_SIZE
+    for begin in range(0, len(methods), batch_size):
+        batch = methods[begin:begin + batch_size]
+        replies = client.server.system.multicall([
+            {'methodName': method.method_name, 'params': method.get_args(client)}
+            for method in batch
+        ])
+        results = []
+        for method, reply in zip(batch, replies):
+            if isinstance(reply, dict):
+                results.append(xmlrpc_client.Fault(reply.get('faultCode'), reply.get('faultString')))
+            else:
+                results.append(method.process_result(reply[0]))
+        yield results
+
+def multicall(client, methods, batch_size=None):
+    """Run wordpress_xmlrpc methods in as few system.multicall round-trips as possible
+
+    Returns one entry per method, in order (see multicall_batches).
+    """
+    return [result for batch in multicall_batches(client, methods, batch_size) for result in batch]
+
+class WordPressClientPool:
+    """Reusable wordpress_xmlrpc clients per site and login
+
+    A client owns one keep-alive connection, so it is lent to one caller
+    at a time; returned clients wait for the next caller, up to pool_size
+    per site, and are closed once idle for idle_timeout seconds. Reuse
+    also skips the mt.supportedMethods request Client() makes on creation.
+    """
+
+    def __init__(self, pool_size=None, idle_timeout=None, max_sites=None, timeout=None):
+        self.pool_size = pool_size or WORDPRESS_POOL_SIZE
+        self.idle_timeout = idle_timeout or WORDPRESS_IDLE_TIMEOUT
+        self.max_sites = max_sites or WORDPRESS_MAX_SITES
+        self.timeout = timeout or WORDPRESS_TIMEOUT
+        self.created = 0
+        self.reused = 0
+        self._idle = OrderedDict()  # (url, username, password) -> [(client, returned_at)]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def client(self, url, username, password):
+        """Borrow a client for the site, creating one if none is idle"""
+        key = (url, username, password)
+        client = self._checkout(key)
+        if client is None:
+            client = self._connect(url, username, password)
+
+        broken = False
+        try:
+            yield client
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            if broken:
+                self._close(client)
+            else:
+                self._checkin(key, client)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sites': len(self._idle),
+                'idle_clients': sum(len(clients) for clients in self._idle.values()),
+                'created': self.created,
+                'reused': self.reused
+            }
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, OrderedDict()
+        for clients in idle.values():
+            for client, _ in clients:
+                self._close(client)
+
+    def _connect(self, url, username, password):
+        transport_class = SafeKeepAliveTransport if url.startswith('https') else KeepAliveTransport
+        client = Client(url, username, password, transport=transport_class(timeout=self.timeout))
+        with self._lock:
+            self.created += 1
+        return client
+
+    def _checkout(self, key):
+        expired = []
+        client = None
+        with self._lock:
+            expired = self._evict(time.monotonic())
+            clients = self._idle.get(key)
+            if clients:
+                client = clients.pop()[0]
+                self.reused += 1
+                self._idle.move_to_end(key)
+        for stale in expired:
+            self._close(stale)
+        return client
+
+    def _checkin(self, key, client):
+        extra = []
+        with self._lock:
+            clients = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(clients) < self.pool_size:
+                clients.append((client, time.monotonic()))
+            else:
+                extra.append(client)
+            while len(self._idle) > self.max_sites:
+                _, dropped = self._idle.popitem(last=False)
+                extra.extend(client for client, _ in dropped)
+        for client in extra:
+            self._close(client)
+
+    def _evict(self, now):
+        """Remove clients idle past the timeout; returns them for closing outside the lock"""
+        expired = []
+        for key in list(self._idle):
+            clients = self._idle[key]
+            fresh = [(client, returned_at) for client, returned_at in clients
+                     if now - returned_at < self.idle_timeout]
+            expired.extend(client for client, returned_at in clients if now - returned_at >= self.idle_timeout)
+            if fresh:
+                self._idle[key] = fresh
+            else:
+                del self._idle[key]
+        return expired
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.server('close')()
+        except Exception:
+            pass
+
+@process_singleton
+def get_wordpress_pool():
+    """Return the process-wide WordPress client pool"""
+    return WordPressClientPool()
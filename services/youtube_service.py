@@ -1,16 +1,116 @@
 import os
 import json
-from datetime import datetime
+import threading
+import httplib2
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from datetime import datetime, timezone
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from services.quota_service import get_quota_ledger, QuotaExceededError
+from services.response_cache import get_response_cache
+
+HTTP_TIMEOUT = int(os.getenv('YOUTUBE_HTTP_TIMEOUT', 30))
+
+# Read methods whose responses carry an ETag worth revalidating
+CACHEABLE_METHODS = {
+    'youtube.channels.list',
+    'youtube.playlistItems.list',
+    'youtube.videos.list',
+}
+
+# One API client per key for the whole worker process; building it parses the
+# discovery document, so it must not happen per request.
+_clients = {}
+_clients_lock = threading.Lock()
+
+# httplib2.Http is not thread-safe, so each thread keeps its own keep-alive
+# connection pool and passes it to execute().
+_thread_local = threading.local()
+
+def get_youtube_client(api_key):
+    """Return the shared YouTube API client for api_key, building it once"""
+    client = _clients.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                client = build(
+                    'youtube', 'v3',
+                    developerKey=api_key,
+                    static_discovery=True,
+                    cache_discovery=False
+                )
+                _clients[api_key] = client
+    return client
+
+def get_thread_http():
+    """Return this thread's pooled HTTP transport"""
+    # Re-create after a fork so workers never share a parent's sockets
+    if getattr(_thread_local, 'pid', None) != os.getpid():
+        _thread_local.http = httplib2.Http(timeout=HTTP_TIMEOUT)
+        _thread_local.pid = os.getpid()
+    return _thread_local.http
+
+def to_naive_utc(value):
+    """Normalize a datetime to naive UTC, the form stored in the database"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 class YouTubeService:
-    def __init__(self):
+    def __init__(self, priority='interactive', quota=None):
+        # interactive (user waiting), normal (sync) or low (backfills, refreshes)
+        self.priority = priority
+        # Defaults to the shared ledger; scripts outside the app can pass their own
+        self.quota = quota or get_quota_ledger()
+        self.cache = get_response_cache()
         self.api_key = os.getenv('YOUTUBE_API_KEY')
         if not self.api_key:
             raise ValueError("YOUTUBE_API_KEY environment variable is required")
         
-        self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        self.youtube = get_youtube_client(self.api_key)
+    
+    def _execute(self, request):
+        """Charge the quota ledger and execute an API request over this thread's pooled connection
+        
+        Read requests seen before are sent with If-None-Match; a 304 reply is
+        answered from the response cache without downloading or parsing the
+        payload again.
+        """
+        self.quota.charge(request.methodId, self.priority)
+        
+        cache_key = None
+        cached = None
+        if request.methodId in CACHEABLE_METHODS:
+            cache_key = self._cache_key(request)
+            cached = self.cache.get(cache_key)
+            if cached:
+                request.headers['If-None-Match'] = cached[0]
+        
+        try:
+            response = request.execute(http=get_thread_http())
+        except HttpError as e:
+            if cached and e.resp.status == 304:
+                self.cache.record(hit=True)
+                return cached[1]
+            if e.resp.status == 403 and b'quotaExceeded' in (e.content or b''):
+                self.quota.mark_exhausted()
+                raise QuotaExceededError('YouTube daily quota exhausted', self.quota.seconds_until_reset())
+            raise
+        
+        if cache_key:
+            self.cache.record(hit=False)
+            if response.get('etag'):
+                self.cache.set(cache_key, response['etag'], response)
+        return response
+    
+    def _cache_key(self, request):
+        """Method plus sorted query parameters, without the API key"""
+        params = sorted(
+            (name, value) for name, value in parse_qsl(urlsplit(request.uri).query)
+            if name != 'key'
+        )
+        return f'{request.methodId}?{urlencode(params)}'
     
     def get_channel_info(self, channel_id):
         """Get channel information from YouTube API"""
@@ -21,12 +121,14 @@ class YouTubeService:
             # First try as channel ID
             try:
                 request = self.youtube.channels().list(
-                    part='snippet,statistics',
+                    part='snippet,statistics,contentDetails',
                     id=channel_id
                 )
-                response = request.execute()
+                response = self._execute(request)
                 if response['items']:
                     channel_info = response['items'][0]
+            except QuotaExceededError:
+                raise
             except:
                 pass
             
@@ -34,12 +136,14 @@ class YouTubeService:
             if not channel_info:
                 try:
                     request = self.youtube.channels().list(
-                        part='snippet,statistics',
+                        part='snippet,statistics,contentDetails',
                         forUsername=channel_id
                     )
-                    response = request.execute()
+                    response = self._execute(request)
                     if response['items']:
                         channel_info = response['items'][0]
+                except QuotaExceededError:
+                    raise
                 except:
                     pass
             
@@ -52,17 +156,19 @@ class YouTubeService:
                         type='channel',
                         maxResults=1
                     )
-                    search_response = search_request.execute()
+                    search_response = self._execute(search_request)
                     
                     if search_response['items']:
                         found_channel_id = search_response['items'][0]['snippet']['channelId']
                         request = self.youtube.channels().list(
-                            part='snippet,statistics',
+                            part='snippet,statistics,contentDetails',
                             id=found_channel_id
                         )
-                        response = request.execute()
+                        response = self._execute(request)
                         if response['items']:
                             channel_info = response['items'][0]
+                except QuotaExceededError:
+                    raise
                 except:
                     pass
             
@@ -71,6 +177,7 @@ class YouTubeService:
             
             snippet = channel_info['snippet']
             statistics = channel_info.get('statistics', {})
+            related_playlists = channel_info.get('contentDetails', {}).get('relatedPlaylists', {})
             
             return {
                 'channel_id': channel_info['id'],
@@ -79,9 +186,12 @@ class YouTubeService:
                 'subscriber_count': int(statistics.get('subscriberCount', 0)),
                 'video_count': int(statistics.get('videoCount', 0)),
                 'view_count': int(statistics.get('viewCount', 0)),
-                'thumbnail_url': snippet.get('thumbnails', {}).get('default', {}).get('url', '')
+                'thumbnail_url': snippet.get('thumbnails', {}).get('default', {}).get('url', ''),
+                'uploads_playlist_id': related_playlists.get('uploads')
             }
             
+        except QuotaExceededError:
+            raise
         except HttpError as e:
             print(f"YouTube API error: {e}")
             return None
@@ -89,37 +199,77 @@ class YouTubeService:
             print(f"Error getting channel info: {e}")
             return None
     
-    def get_channel_videos(self, channel_id, limit=50):
-        """Get videos from a channel"""
+    def get_uploads_playlist_id(self, channel_id):
+        """Get the id of a channel's uploads playlist"""
+        try:
+            request = self.youtube.channels().list(
+                part='contentDetails',
+                id=channel_id
+            )
+            response = self._execute(request)
+            
+            if not response['items']:
+                return None
+            
+            return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+            
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            print(f"Error getting uploads playlist: {e}")
+            return None
+    
+    def get_channel_videos(self, channel_id, limit=50, on_page=None,
+                           since_video_id=None, since_published_at=None,
+                           uploads_playlist_id=None):
+        """Get videos from a channel
+        
+        uploads_playlist_id should be the id stored on the Channel row; it is
+        only looked up through channels().list when not given.
+        
+        on_page, if given, is called with the list of videos parsed from each
+        playlist page so callers can report progress while paging. A limit of
+        None fetches until the watermark or the end of the playlist.
+        
+        since_video_id / since_published_at form a high-water mark: the uploads
+        playlist is newest-first, so paging stops at the first item that is the
+        watermark video or not newer than the watermark time.
+        """
         try:
             videos = []
             next_page_token = None
+            since_published_at = to_naive_utc(since_published_at)
+            reached_watermark = False
             
-            while len(videos) < limit:
-                # Get uploads playlist ID
-                channel_request = self.youtube.channels().list(
-                    part='contentDetails',
-                    id=channel_id
-                )
-                channel_response = channel_request.execute()
-                
-                if not channel_response['items']:
-                    break
-                
-                uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-                
+            if not uploads_playlist_id:
+                uploads_playlist_id = self.get_uploads_playlist_id(channel_id)
+                if not uploads_playlist_id:
+                    return []
+            
+            while (limit is None or len(videos) < limit) and not reached_watermark:
                 # Get videos from uploads playlist
                 playlist_request = self.youtube.playlistItems().list(
-                    part='snippet',
+                    part='snippet,contentDetails',
                     playlistId=uploads_playlist_id,
-                    maxResults=min(50, limit - len(videos)),
+                    maxResults=50 if limit is None else min(50, limit - len(videos)),
                     pageToken=next_page_token
                 )
-                playlist_response = playlist_request.execute()
+                playlist_response = self._execute(playlist_request)
                 
                 video_ids = []
                 for item in playlist_response['items']:
-                    video_ids.append(item['snippet']['resourceId']['videoId'])
+                    video_id = item['snippet']['resourceId']['videoId']
+                    if since_video_id and video_id == since_video_id:
+                        reached_watermark = True
+                        break
+                    
+                    if since_published_at:
+                        published = item.get('contentDetails', {}).get('videoPublishedAt') or item['snippet'].get('publishedAt')
+                        if published and self._parse_timestamp(published) <= since_published_at:
+                            reached_watermark = True
+                            break
+                    
+                    video_ids.append(video_id)
                 
                 # Get detailed video information
                 if video_ids:
@@ -127,19 +277,26 @@ class YouTubeService:
                         part='snippet,statistics,contentDetails',
                         id=','.join(video_ids)
                     )
-                    videos_response = videos_request.execute()
+                    videos_response = self._execute(videos_request)
                     
+                    page_videos = []
                     for video in videos_response['items']:
                         video_data = self._parse_video_data(video)
                         if video_data:
-                            videos.append(video_data)
+                            page_videos.append(video_data)
+                    
+                    videos.extend(page_videos)
+                    if on_page:
+                        on_page(page_videos)
                 
                 next_page_token = playlist_response.get('nextPageToken')
                 if not next_page_token:
                     break
             
-            return videos[:limit]
+            return videos if limit is None else videos[:limit]
             
+        except QuotaExceededError:
+            raise
         except HttpError as e:
             print(f"YouTube API error: {e}")
             return []
@@ -154,17 +311,44 @@ class YouTubeService:
                 part='snippet,statistics,contentDetails',
                 id=video_id
             )
-            response = request.execute()
+            response = self._execute(request)
             
             if not response['items']:
                 return None
             
             return self._parse_video_data(response['items'][0])
             
+        except QuotaExceededError:
+            raise
         except Exception as e:
             print(f"Error getting video info: {e}")
             return None
     
+    def get_video_statistics(self, video_ids):
+        """Get view, like and comment counts for videos, 50 ids per request"""
+        statistics = {}
+        for i in range(0, len(video_ids), 50):
+            request = self.youtube.videos().list(
+                part='statistics',
+                id=','.join(video_ids[i:i + 50]),
+                maxResults=50
+            )
+            response = self._execute(request)
+            
+            for video in response['items']:
+                stats = video.get('statistics', {})
+                statistics[video['id']] = {
+                    'view_count': int(stats.get('viewCount', 0)),
+                    'like_count': int(stats.get('likeCount', 0)),
+                    'comment_count': int(stats.get('commentCount', 0))
+                }
+        
+        return statistics
+    
+    def _parse_timestamp(self, value):
+        """Parse an API timestamp into a naive UTC datetime"""
+        return to_naive_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    
     def _parse_video_data(self, video):
         """Parse video data from YouTube API response"""
         try:
@@ -293,7 +293,14 @@ class DupetubeApp {
             const data = await response.json();
 
             if (response.ok) {
-                this.showAlert(`Indexed ${data.indexed_count} videos successfully!`, 'success');
+                const job = await this.waitForJob(data.job_id);
+                if (job.status === 'deferred') {
+                    this.showAlert('YouTube quota is running low; indexing will resume when it resets.', 'warning');
+                } else if (job.status === 'completed') {
+                    this.showAlert(`Indexed ${job.videos_inserted} videos successfully!`, 'success');
+                } else {
+                    this.showAlert(`Indexing failed: ${job.errors.join(', ')}`, 'danger');
+                }
             } else {
                 this.showAlert(data.error, 'danger');
             }
@@ -316,11 +323,18 @@ class DupetubeApp {
             const data = await response.json();
 
             if (response.ok) {
-                let message = `Synced ${data.new_videos} new videos.`;
-                if (data.auto_created_posts > 0) {
-                    message += ` ${data.auto_created_posts} blog posts auto-created.`;
+                const job = await this.waitForJob(data.job_id);
+                if (job.status === 'deferred') {
+                    this.showAlert('YouTube quota is running low; sync will resume when it resets.', 'warning');
+                } else if (job.status === 'completed') {
+                    let message = `Synced ${job.videos_inserted} new videos.`;
+                    if (job.posts_generated > 0) {
+                        message += ` ${job.posts_generated} blog posts auto-created.`;
+                    }
+                    this.showAlert(message, 'success');
+                } else {
+                    this.showAlert(`Sync failed: ${job.errors.join(', ')}`, 'danger');
                 }
-                this.showAlert(message, 'success');
             } else {
                 this.showAlert(data.error, 'danger');
             }
@@ -329,6 +343,29 @@ class DupetubeApp {
         }
     }
 
+    async waitForJob(jobId, interval = 2000) {
+        // Poll a background job until it completes or fails
+        while (true) {
+            const response = await fetch(`${this.baseURL}/api/jobs/${jobId}`, {
+                headers: {
+                    'Authorization': `Bearer ${this.token}`
+                }
+            });
+
+            const data = await response.json();
+
+            if (!response.ok) {
+                throw new Error(data.error);
+            }
+            // Deferred jobs wait for the next day's YouTube quota
+            if (['completed', 'failed', 'deferred'].includes(data.job.status)) {
+                return data.job;
+            }
+
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    }
+
     async showVideos() {
         const content = `
             <div class="card">
@@ -355,9 +392,15 @@ class DupetubeApp {
         this.loadVideos();
     }
 
-    async loadVideos() {
+    async loadVideos(cursor = '') {
+        // Cursor pagination: each scroll fetches the next page after the last video shown
+        const firstPage = cursor === '';
+        if (firstPage && this.videosObserver) {
+            this.videosObserver.disconnect();
+        }
+
         try {
-            const response = await fetch(`${this.baseURL}/api/videos/`, {
+            const response = await fetch(`${this.baseURL}/api/videos/?cursor=${encodeURIComponent(cursor)}&per_page=30&fields=id,title,thumbnail_url,published_at,view_count`, {
                 headers: {
                     'Authorization': `Bearer ${this.token}`
                 }
@@ -365,11 +408,11 @@ class DupetubeApp {
 
             const data = await response.json();
 
-            if (response.ok) {
+            if (response.ok && (data.videos.length > 0 || !firstPage)) {
                 const videosHTML = data.videos.map(video => `
                     <div class="col-md-6 col-lg-4 mb-3">
                         <div class="card video-card h-100">
-                            <img src="${video.thumbnail_url}" class="video-thumbnail" alt="${video.title}">
+                            <img src="${video.thumbnail_url}" class="video-thumbnail" alt="${video.title}" loading="lazy">
                             <div class="card-body">
                                 <h6 class="card-title">${video.title.substring(0, 50)}...</h6>
                                 <p class="card-text small text-muted">
@@ -390,9 +433,14 @@ class DupetubeApp {
                     </div>
                 `).join('');
 
-                document.getElementById('videos-list').innerHTML = 
-                    `<div class="row">${videosHTML}</div>`;
-            } else {
+                if (firstPage) {
+                    document.getElementById('videos-list').innerHTML = 
+                        `<div class="row" id="videos-grid"></div><div id="videos-sentinel"></div>`;
+                }
+                document.getElementById('videos-grid').insertAdjacentHTML('beforeend', videosHTML);
+
+                this.observeVideosSentinel(data.pagination.next_cursor);
+            } else if (firstPage) {
                 document.getElementById('videos-list').innerHTML = 
                     `<div class="alert alert-warning">No videos found. Please add a channel first.</div>`;
             }
@@ -402,33 +450,121 @@ class DupetubeApp {
         }
     }
 
+    observeVideosSentinel(nextCursor) {
+        if (this.videosObserver) {
+            this.videosObserver.disconnect();
+        }
+        if (!nextCursor) {
+            return;
+        }
+
+        // Load the next page once the bottom of the grid scrolls into view
+        this.videosObserver = new IntersectionObserver((entries) => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                this.videosObserver.disconnect();
+                this.loadVideos(nextCursor);
+            }
+        }, { rootMargin: '400px' });
+        this.videosObserver.observe(document.getElementById('videos-sentinel'));
+    }
+
     async generateBlogPost(videoId) {
         try {
             this.showAlert('Generating blog post... This may take a moment.', 'info');
             
-            const response = await fetch(`${this.baseURL}/api/blog/generate`, {
+            // The stream endpoint sends the title and body as they are written
+            const response = await fetch(`${this.baseURL}/api/blog/generate/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream',
                     'Authorization': `Bearer ${this.token}`
                 },
                 body: JSON.stringify({ video_id: videoId })
             });
 
-            const data = await response.json();
+            if (!response.ok) {
+                const data = await response.json();
+                this.showAlert(data.error, 'danger');
+                return;
+            }
 
-            if (response.ok) {
+            this.showBlogPreview();
+            const fields = { title: '', content: '' };
+            let post = null;
+
+            for await (const { event, data } of this.readEvents(response)) {
+                if (event === 'status') {
+                    document.getElementById('blog-preview-status').textContent = {
+                        transcript: 'Fetching transcript...',
+                        summary: 'Summarizing video...',
+                        writing: 'Writing post...'
+                    }[data.stage] || '';
+                } else if (event === 'field' && data.field in fields) {
+                    fields[data.field] += data.delta;
+                    document.getElementById(`blog-preview-${data.field}`).textContent = fields[data.field];
+                } else if (event === 'post') {
+                    post = data.post;
+                } else if (event === 'error') {
+                    this.showAlert(data.error, 'danger');
+                    return;
+                }
+            }
+
+            if (post) {
                 this.showAlert('Blog post generated successfully!', 'success');
-                // Optionally switch to blog posts view
                 this.showBlogPosts();
-            } else {
-                this.showAlert(data.error, 'danger');
             }
         } catch (error) {
             this.showAlert('Failed to generate blog post. Please try again.', 'danger');
         }
     }
 
+    async *readEvents(response) {
+        // Parse a text/event-stream body into { event, data } objects
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            let end;
+            while ((end = buffer.indexOf('\n\n')) !== -1) {
+                const message = buffer.slice(0, end);
+                buffer = buffer.slice(end + 2);
+                let event = 'message';
+                let data = '';
+                for (const line of message.split('\n')) {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        data += line.slice(6);
+                    }
+                }
+                yield { event, data: data ? JSON.parse(data) : {} };
+            }
+        }
+    }
+
+    showBlogPreview() {
+        const content = `
+            <div class="card">
+                <div class="card-header">
+                    <h4 id="blog-preview-title">New Blog Post</h4>
+                    <small class="text-muted" id="blog-preview-status">Starting...</small>
+                </div>
+                <div class="card-body">
+                    <div id="blog-preview-content" style="white-space: pre-wrap;"></div>
+                </div>
+            </div>
+        `;
+        
+        document.getElementById('dashboard-content').innerHTML = content;
+    }
+
     async showBlogPosts() {
         const content = `
             <div class="card">
@@ -0,0 +1,180 @@
+import os
+from datetime import datetime, timedelta
+from celery_app import celery
+from models import db, User, Channel, Job
+from services.sync_service import SyncService
+from services.transcript_backfill import TranscriptBackfill
+from services.similarity_service import SimilarityService
+from services.quota_service import get_quota_ledger, QuotaExceededError
+
+# How stale a channel's video statistics may get before the periodic refresh picks it up
+STATS_REFRESH_INTERVAL = timedelta(hours=int(os.getenv('STATS_REFRESH_INTERVAL_HOURS', 24)))
+
+# Channels refreshed per periodic tick; with a tick every 15 minutes the work
+# is spread over the whole day instead of arriving in one burst
+STATS_CHANNELS_PER_TICK = int(os.getenv('STATS_CHANNELS_PER_TICK', 5))
+
+def _start_job(job_id):
+    job = Job.query.get(job_id)
+    if not job:
+        return None
+    
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+def _finish_job(job, error=None):
+    if error:
+        db.session.rollback()
+        job.add_error(str(error))
+        job.status = 'failed'
+    else:
+        job.status = 'completed'
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+def _defer_job(task, job, error):
+    """Put a job back on the queue until the quota budget resets"""
+    db.session.rollback()
+    job.add_error(str(error))
+    
+    # Eager tasks would retry immediately and spin, so they just fail
+    if task.request.is_eager:
+        job.status = 'failed'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return
+    
+    job.status = 'deferred'
+    db.session.commit()
+    raise task.retry(countdown=error.retry_after, max_retries=None)
+
+def _estimated_index_cost(channel):
+    # One playlistItems and one videos call per page of 50 uploads
+    return max((channel.video_count or 0) // 50, 1) * 2
+
+@celery.task(bind=True, name='channels.index')
+def index_channel_task(self, job_id, full=False):
+    """Index all videos from a channel in the background"""
+    job = _start_job(job_id)
+    if not job:
+        return
+    
+    try:
+        channel = Channel.query.filter_by(id=job.channel_id, user_id=job.user_id).first()
+        if not channel:
+            raise ValueError('Channel not found')
+        
+        # Backfills are low priority: wait for tomorrow's budget rather than
+        # starting one that would be cut off halfway
+        quota = get_quota_ledger()
+        if not quota.can_spend(_estimated_index_cost(channel), priority='low'):
+            raise QuotaExceededError('Not enough YouTube quota left today to index this channel',
+                                     quota.seconds_until_reset())
+        
+        SyncService(job=job, priority='low').index_channel(channel, full=full)
+        _finish_job(job)
+    except QuotaExceededError as e:
+        print(f"Index job {job_id} deferred: {e}")
+        _defer_job(self, job, e)
+    except Exception as e:
+        print(f"Index job {job_id} failed: {e}")
+        _finish_job(job, error=e)
+
+@celery.task(bind=True, name='channels.sync')
+def sync_channel_task(self, job_id):
+    """Sync a channel for new videos in the background"""
+    job = _start_job(job_id)
+    if not job:
+        return
+    
+    try:
+        user = User.query.get(job.user_id)
+        channel = Channel.query.filter_by(id=job.channel_id, user_id=job.user_id).first()
+        if not user or not channel:
+            raise ValueError('Channel not found')
+        
+        SyncService(job=job, priority='normal').sync_channel(channel, user)
+        _finish_job(job)
+    except QuotaExceededError as e:
+        print(f"Sync job {job_id} deferred: {e}")
+        _defer_job(self, job, e)
+    except Exception as e:
+        print(f"Sync job {job_id} failed: {e}")
+        _finish_job(job, error=e)
+
+
+@celery.task(bind=True, name='channels.refresh_stats')
+def refresh_stats_task(self, job_id):
+    """Refresh view, like and comment counts for a channel's stored videos"""
+    job = _start_job(job_id)
+    if not job:
+        return
+    
+    try:
+        channel = Channel.query.filter_by(id=job.channel_id, user_id=job.user_id).first()
+        if not channel:
+            raise ValueError('Channel not found')
+        
+        # One statistics call per 50 stored videos
+        quota = get_quota_ledger()
+        if not quota.can_spend(max(channel.video_count or 0, 1) // 50 + 1, priority='low'):
+            raise QuotaExceededError('Not enough YouTube quota left today to refresh statistics',
+                                     quota.seconds_until_reset())
+        
+        SyncService(job=job, priority='low').refresh_statistics(channel)
+        _finish_job(job)
+    except QuotaExceededError as e:
+        print(f"Statistics job {job_id} deferred: {e}")
+        _defer_job(self, job, e)
+    except Exception as e:
+        print(f"Statistics job {job_id} failed: {e}")
+        _finish_job(job, error=e)
+
+@celery.task(bind=True, name='channels.backfill_transcripts')
+def backfill_transcripts_task(self, job_id, concurrency=None):
+    """Fetch missing transcripts for a channel's videos on a thread pool"""
+    job = _start_job(job_id)
+    if not job:
+        return
+    
+    try:
+        channel = Channel.query.filter_by(id=job.channel_id, user_id=job.user_id).first()
+        if not channel:
+            raise ValueError('Channel not found')
+        
+        counts = TranscriptBackfill(job=job, concurrency=concurrency).backfill_channel(channel)
+        print(f"Transcript backfill {job_id}: {counts}")
+        _finish_job(job)
+    except Exception as e:
+        print(f"Transcript backfill {job_id} failed: {e}")
+        _finish_job(job, error=e)
+
+@celery.task(name='similarity.vectorize_missing')
+def vectorize_missing_task(user_id):
+    """Store similarity vectors for a user's videos that have none"""
+    SimilarityService().vectorize_missing(user_id)
+
+@celery.task(name='channels.refresh_stale_statistics')
+def refresh_stale_statistics():
+    """Queue statistics refreshes for the channels that were refreshed longest ago"""
+    cutoff = datetime.utcnow() - STATS_REFRESH_INTERVAL
+    channels = Channel.query.filter(
+        db.or_(Channel.stats_refreshed_at.is_(None), Channel.stats_refreshed_at < cutoff)
+    ).order_by(Channel.stats_refreshed_at.asc()).limit(STATS_CHANNELS_PER_TICK).all()
+    
+    for channel in channels:
+        # Skip channels that already have a refresh waiting
+        pending = Job.query.filter(
+            Job.channel_id == channel.id,
+            Job.job_type == 'refresh_stats',
+            Job.status.in_(['queued', 'running', 'deferred'])
+        ).first()
+        if pending:
+            continue
+        
+        job = Job(user_id=channel.user_id, channel_id=channel.id, job_type='refresh_stats')
+        db.session.add(job)
+        db.session.commit()
+        refresh_stats_task.delay(job.id)
\ No newline at end of file
@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+
+# Configure before app.py is imported: in-memory broker with tasks run
+# eagerly, a throwaway SQLite database, quota accounting in that database
+# and no LLM reply cache file
+_db_dir = tempfile.mkdtemp(prefix='dupetube-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ['CELERY_BROKER_URL'] = 'memory://'
+os.environ['CELERY_TASK_ALWAYS_EAGER'] = 'true'
+os.environ.pop('CELERY_RESULT_BACKEND', None)
+os.environ.pop('REDIS_URL', None)
+os.environ['LLM_CACHE_TTL'] = '0'
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import app as flask_app, init_db
+from models import db, User, Channel
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        init_db()
+    return flask_app
+
+@pytest.fixture
+def session(app):
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+
+@pytest.fixture
+def client(app, session):
+    return app.test_client()
+
+def make_user(username):
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def user(session):
+    return make_user('creator')
+
+@pytest.fixture
+def channel(user):
+    channel = Channel(user_id=user.id, channel_id='UC123', channel_url='https://youtube.com/channel/UC123',
+                      uploads_playlist_id='UU123', title='Test Channel', video_count=120)
+    db.session.add(channel)
+    db.session.commit()
+    return channel
+
+@pytest.fixture
+def auth_headers(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
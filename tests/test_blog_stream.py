@@ -0,0 +1,77 @@
+import json
+import openai
+import pytest
+from benchmarks import fake_openai_server
+from models import db, Video, BlogPost
+from services.content_service import ContentService
+
+@pytest.fixture(scope='module')
+def openai_server():
+    server = fake_openai_server.start(token_delay=0)
+    yield f'http://127.0.0.1:{server.server_port}/v1'
+    server.shutdown()
+
+@pytest.fixture
+def fake_openai(monkeypatch, openai_server):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setenv('OPENAI_API_BASE', openai_server)
+    # ContentService sets these on the module; restore them afterwards
+    monkeypatch.setattr(openai, 'api_key', openai.api_key)
+    monkeypatch.setattr(openai, 'api_base', openai.api_base)
+
+@pytest.fixture
+def video(channel):
+    video = Video(channel_id=channel.id, video_id='abc123', title='Building in public',
+                  description='A year of shipping', summary='What we learned')
+    video.transcript = 'we shipped every week and wrote about it'
+    db.session.add(video)
+    db.session.commit()
+    return video
+
+def read_events(response):
+    events = []
+    for message in response.get_data(as_text=True).strip().split('\n\n'):
+        name, data = message.split('\n')
+        events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+def test_stream_blog_post_events(client, auth_headers, video, fake_openai):
+    response = client.post('/api/blog/generate/stream', json={'video_id': video.id}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = read_events(response)
+    reply = json.loads(fake_openai_server.REPLY)
+
+    assert [data['stage'] for name, data in events if name == 'status'] == ['transcript', 'summary', 'writing']
+    fields = [(data['field'], data['delta']) for name, data in events if name == 'field']
+    # The reply arrives in many small pieces, each passed on as it is decoded
+    assert len(fields) > 10
+    for field in ('title', 'content', 'excerpt'):
+        assert ''.join(delta for name, delta in fields if name == field) == reply[field]
+
+    name, data = events[-1]
+    assert name == 'post'
+    post = db.session.get(BlogPost, data['post']['id'])
+    assert post.video_id == video.id
+    assert post.title == reply['title']
+    assert post.content == reply['content']
+    assert post.excerpt == reply['excerpt']
+
+def test_stream_returns_existing_post(client, auth_headers, user, video, fake_openai):
+    post = BlogPost(user_id=user.id, video_id=video.id, title='Already written', content='Body')
+    db.session.add(post)
+    db.session.commit()
+
+    events = read_events(client.post('/api/blog/generate/stream', json={'video_id': video.id}, headers=auth_headers))
+
+    assert events == [('post', {'post': post.to_dict(), 'existing': True})]
+
+def test_stream_reports_model_errors(client, auth_headers, video, monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    monkeypatch.setattr(ContentService, 'stream_blog_content', lambda self, video: iter(['{"excerpt": "no title"}']))
+
+    events = read_events(client.post('/api/blog/generate/stream', json={'video_id': video.id}, headers=auth_headers))
+
+    assert events[-1] == ('error', {'error': 'Model reply is missing the post title or content'})
+    assert BlogPost.query.count() == 0
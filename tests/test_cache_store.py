@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from services.cache_store import MemoryStore, SQLiteStore
+from services.response_cache import ResponseCache
+from services.llm_cache import LLMCache
+from services.singleton import process_singleton
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make(ttl=60, max_entries=3):
+        if request.param == 'memory':
+            return MemoryStore(ttl, max_entries)
+        return SQLiteStore(str(tmp_path / 'cache.db'), 'test_cache', ttl, max_entries)
+    return make
+
+def test_store_evicts_least_recently_used(make_store):
+    store = make_store(max_entries=3)
+    for key in 'abc':
+        store.set(key, key.upper())
+        time.sleep(0.01)
+    assert store.get('a') == 'A'  # a is now the most recently used
+
+    store.set('d', 'D')
+
+    assert store.size() == 3
+    assert store.get('b') is None
+    assert [store.get(key) for key in 'acd'] == ['A', 'C', 'D']
+
+def test_store_expires_entries(make_store):
+    store = make_store(ttl=-1)
+    store.set('a', 'A')
+    assert store.get('a') is None
+
+def test_response_cache_round_trip():
+    cache = ResponseCache(ttl=60, max_entries=10)
+    cache.set('channels.list?id=UC1', 'etag-1', {'items': [{'id': 'UC1'}]})
+
+    etag, body = cache.get('channels.list?id=UC1')
+    assert etag == 'etag-1'
+    assert body == {'items': [{'id': 'UC1'}]}
+    assert cache.get('channels.list?id=UC2') is None
+
+    # Hits count only once the API confirms the entry
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'entries': 1}
+    cache.record(hit=True)
+    assert cache.stats()['hits'] == 1
+
+def test_llm_cache_counts_lookups(tmp_path):
+    cache = LLMCache(ttl=60, max_entries=10, path=str(tmp_path / 'llm.db'))
+    assert cache.get('key') is None
+    cache.set('key', 'reply')
+    assert cache.get('key') == 'reply'
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+def test_process_singleton_builds_once():
+    built = []
+
+    @process_singleton
+    def get_thing():
+        built.append(object())
+        return built[-1]
+
+    with ThreadPoolExecutor(8) as executor:
+        things = list(executor.map(lambda _: get_thing(), range(50)))
+
+    assert len(built) == 1
+    assert all(thing is built[0] for thing in things)
@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+import pytest
+from youtube_transcript_api import TranscriptsDisabled
+import services.content_service as content_service
+from services.cache_store import MemoryStore
+from services.content_service import ContentService, get_transcript_listing
+
+REPLY = json.dumps({'title': 'Post', 'content': 'Body', 'excerpt': 'Short'})
+
+def video(transcript):
+    return SimpleNamespace(video_id='abc123', title='A long talk', description='About things', summary='', key_points=None, transcript=transcript,
+                           segments=None)
+
+def test_stream_only_model_condenses_long_transcripts(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    prompts = []
+
+    def stream_llm(messages, max_tokens=1000, temperature=0.7):
+        prompts.append(messages[-1]['content'])
+        reply = 'notes' if 'Transcript part' in messages[-1]['content'] else REPLY
+        yield from (reply[i:i + 5] for i in range(0, len(reply), 5))
+
+    service = ContentService(stream_llm=stream_llm)
+    assert service.llm is None
+
+    pieces = list(service.stream_blog_content(video('word ' * 20000)))
+
+    assert json.loads(''.join(pieces)) == json.loads(REPLY)
+    # The transcript was condensed into notes before the blog prompt
+    assert any('Transcript part' in prompt for prompt in prompts)
+    assert 'word word' not in prompts[-1]
+
+def test_without_a_model_streams_simple_content(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    service = ContentService()
+
+    pieces = list(service.stream_blog_content(video('a short transcript')))
+
+    assert len(pieces) == 1
+    assert json.loads(pieces[0])['title']
+
+def test_transcript_listings_are_cached(monkeypatch):
+    store = MemoryStore(ttl=60, max_entries=10)
+    monkeypatch.setattr(content_service, 'get_listing_store', lambda: store)
+    calls = []
+
+    def list_transcripts(video_id):
+        calls.append(video_id)
+        if video_id == 'silent':
+            raise TranscriptsDisabled(video_id)
+        if video_id == 'flaky':
+            raise ConnectionError('reset')
+        return f'listing of {video_id}'
+
+    monkeypatch.setattr(content_service.YouTubeTranscriptApi, 'list_transcripts', list_transcripts)
+
+    assert get_transcript_listing('abc') == 'listing of abc'
+    assert get_transcript_listing('abc') == 'listing of abc'
+    # "No captions" is cached as well; other errors are not
+    assert get_transcript_listing('silent') is None
+    assert get_transcript_listing('silent') is None
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            get_transcript_listing('flaky')
+
+    assert calls == ['abc', 'silent', 'flaky', 'flaky']
@@ -0,0 +1,153 @@
+from types import SimpleNamespace
+import pytest
+from celery.exceptions import Retry
+from flask_jwt_extended import create_access_token
+import tasks
+from models import db, Job
+from services.quota_service import QuotaExceededError
+from conftest import make_user
+
+class FakeSyncService:
+    """Stands in for SyncService so no YouTube calls are made"""
+    calls = []
+    error = None
+
+    def __init__(self, job=None, priority='normal'):
+        self.job = job
+        self.priority = priority
+
+    def index_channel(self, channel, full=False):
+        self.calls.append(('index', channel.id, full, self.priority))
+        if self.error:
+            raise self.error
+        self.job.pages_fetched = 3
+        self.job.videos_inserted = 120
+
+    def sync_channel(self, channel, user):
+        self.calls.append(('sync', channel.id, self.priority))
+        if self.error:
+            raise self.error
+        self.job.videos_inserted = 2
+        self.job.posts_generated = 1
+
+class FakeQuotaLedger:
+    def __init__(self, available=True):
+        self.available = available
+
+    def can_spend(self, units, priority='normal'):
+        return self.available
+
+    def seconds_until_reset(self):
+        return 3600
+
+@pytest.fixture(autouse=True)
+def fake_sync(monkeypatch):
+    FakeSyncService.calls = []
+    FakeSyncService.error = None
+    monkeypatch.setattr(tasks, 'SyncService', FakeSyncService)
+    monkeypatch.setattr(tasks, 'get_quota_ledger', lambda: FakeQuotaLedger())
+    return FakeSyncService
+
+def test_index_enqueues_job_and_runs_it(client, channel, auth_headers, fake_sync):
+    response = client.post(f'/api/channels/{channel.id}/index?full=true', headers=auth_headers)
+
+    assert response.status_code == 202
+    job = response.get_json()['job']
+    assert response.get_json()['job_id'] == job['id']
+    assert job['job_type'] == 'index'
+    assert job['channel_id'] == channel.id
+    assert job['status'] == 'completed'
+    assert job['pages_fetched'] == 3
+    assert job['videos_inserted'] == 120
+    assert job['started_at'] and job['finished_at']
+    assert fake_sync.calls == [('index', channel.id, True, 'low')]
+
+def test_sync_enqueues_job(client, channel, auth_headers, fake_sync):
+    response = client.post(f'/api/channels/{channel.id}/sync', headers=auth_headers)
+
+    assert response.status_code == 202
+    job = response.get_json()['job']
+    assert job['job_type'] == 'sync'
+    assert job['status'] == 'completed'
+    assert job['posts_generated'] == 1
+    assert fake_sync.calls == [('sync', channel.id, 'normal')]
+
+def test_enqueue_unknown_channel(client, user, auth_headers):
+    response = client.post('/api/channels/999/index', headers=auth_headers)
+
+    assert response.status_code == 404
+    assert Job.query.count() == 0
+
+def test_poll_job_status(client, channel, auth_headers):
+    job_id = client.post(f'/api/channels/{channel.id}/index', headers=auth_headers).get_json()['job_id']
+
+    response = client.get(f'/api/jobs/{job_id}', headers=auth_headers)
+
+    assert response.status_code == 200
+    job = response.get_json()['job']
+    assert job['id'] == job_id
+    assert job['status'] == 'completed'
+    assert job['errors'] == []
+
+def test_poll_queued_job(client, channel, user, auth_headers):
+    job = Job(user_id=user.id, channel_id=channel.id, job_type='index')
+    db.session.add(job)
+    db.session.commit()
+
+    response = client.get(f'/api/jobs/{job.id}', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['job']['status'] == 'queued'
+    assert response.get_json()['job']['started_at'] is None
+
+def test_poll_other_users_job(client, channel, auth_headers):
+    job_id = client.post(f'/api/channels/{channel.id}/index', headers=auth_headers).get_json()['job_id']
+    other = make_user('someone-else')
+    other_headers = {'Authorization': f'Bearer {create_access_token(identity=other.id)}'}
+
+    assert client.get(f'/api/jobs/{job_id}', headers=other_headers).status_code == 404
+    assert client.get('/api/jobs/no-such-job', headers=auth_headers).status_code == 404
+
+def test_failed_job_records_error(client, channel, auth_headers, fake_sync):
+    fake_sync.error = RuntimeError('playlist not found')
+
+    job_id = client.post(f'/api/channels/{channel.id}/index', headers=auth_headers).get_json()['job_id']
+    job = client.get(f'/api/jobs/{job_id}', headers=auth_headers).get_json()['job']
+
+    assert job['status'] == 'failed'
+    assert job['errors'] == ['playlist not found']
+    assert job['finished_at']
+    # Progress written before the failure is rolled back with it
+    assert job['videos_inserted'] == 0
+
+def test_quota_exhausted_eager_job_fails(client, channel, auth_headers, monkeypatch, fake_sync):
+    monkeypatch.setattr(tasks, 'get_quota_ledger', lambda: FakeQuotaLedger(available=False))
+
+    job_id = client.post(f'/api/channels/{channel.id}/index', headers=auth_headers).get_json()['job_id']
+    job = client.get(f'/api/jobs/{job_id}', headers=auth_headers).get_json()['job']
+
+    # Eager tasks cannot wait for the quota reset, so they fail instead of spinning
+    assert job['status'] == 'failed'
+    assert 'quota' in job['errors'][0]
+    assert fake_sync.calls == []
+
+def test_defer_job_retries_after_quota_reset(channel, user):
+    job = Job(user_id=user.id, channel_id=channel.id, job_type='sync', status='running')
+    db.session.add(job)
+    db.session.commit()
+
+    retries = []
+    def retry(countdown, max_retries):
+        retries.append((countdown, max_retries))
+        return Retry('deferred', when=countdown)
+    task = SimpleNamespace(request=SimpleNamespace(is_eager=False), retry=retry)
+
+    with pytest.raises(Retry):
+        tasks._defer_job(task, job, QuotaExceededError('Daily quota spent', retry_after=1800))
+
+    db.session.expire_all()
+    job = db.session.get(Job, job.id)
+    assert job.status == 'deferred'
+    assert job.finished_at is None
+    assert job.to_dict()['errors'] == ['Daily quota spent']
+    assert retries == [(1800, None)]
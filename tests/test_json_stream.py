@@ -0,0 +1,55 @@
+import json
+import pytest
+from services.json_stream import JsonFieldStream
+
+def feed_in_pieces(text, size):
+    parser = JsonFieldStream()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+def test_streams_partial_values():
+    parser = JsonFieldStream()
+
+    assert parser.feed('{"title": "Ho') == [('title', 'Ho')]
+    assert parser.feed('w to", "content": "') == [('title', 'w to')]
+    assert parser.feed('Step one') == [('content', 'Step one')]
+    assert parser.feed('"}') == []
+    assert parser.fields == {'title': 'How to', 'content': 'Step one'}
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7])
+@pytest.mark.parametrize('document', [
+    {'title': 'Quotes \" and \\ backslashes', 'content': 'Line one\nLine two\ttabbed /slash'},
+    {'title': 'Café — naïve', 'content': 'Emoji \U0001F600 and \U0001F680 here'},
+    {'title': 'Keys with escapes', 'ex\"cerpt': 'ok'},
+])
+def test_escapes_split_across_pieces(document, size):
+    # ensure_ascii writes \\uXXXX escapes, including surrogate pairs for emoji
+    text = json.dumps(document, ensure_ascii=True)
+
+    parser, events = feed_in_pieces(text, size)
+
+    assert parser.fields == document
+    for field, value in document.items():
+        assert ''.join(delta for name, delta in events if name == field) == value
+
+def test_surrogate_pair_split_between_escapes():
+    parser = JsonFieldStream()
+
+    assert parser.feed('{"title": "A \\ud83d') == [('title', 'A ')]
+    assert parser.feed('\\ude00 B"}') == [('title', '\U0001F600 B')]
+
+def test_skips_nested_and_non_string_values():
+    text = ('{"meta": {"note": "has } and ] inside", "list": [1, {"a": "]"}]}, '
+            '"tags": ["a,b", "c\\"d"], "count": 3, "draft": false, "title": "Kept"}')
+
+    parser, events = feed_in_pieces(text, 1)
+
+    assert parser.fields == {'title': 'Kept'}
+    assert events == [('title', char) for char in 'Kept']
+
+def test_ignores_code_fence_around_object():
+    parser, _ = feed_in_pieces('```json\n{"title": "T", "content": "Body"}\n```', 4)
+
+    assert parser.fields == {'title': 'T', 'content': 'Body'}
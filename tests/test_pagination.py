@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+import pytest
+from models import db, Video
+from services.pagination import encode_cursor, MAX_PER_PAGE
+from services.search_service import SearchService
+from services.similarity_service import SimilarityService
+
+@pytest.fixture
+def videos(channel):
+    start = datetime(2024, 1, 1)
+    rows = [
+        Video(channel_id=channel.id, video_id=f'vid{i}', title=f'Video {i}',
+              # Every fourth video has no publish date
+              published_at=None if i % 4 == 0 else start + timedelta(days=i // 2))
+        for i in range(30)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+def walk(client, auth_headers, per_page):
+    ids, cursor, pages = [], '', 0
+    while True:
+        response = client.get(f'/api/videos/?cursor={cursor}&per_page={per_page}&fields=id', headers=auth_headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        ids.extend(video['id'] for video in body['videos'])
+        pages += 1
+        if not body['pagination']['has_next']:
+            return ids, pages
+        cursor = body['pagination']['next_cursor']
+
+def test_cursor_walk_includes_undated_videos(client, auth_headers, videos):
+    ids, pages = walk(client, auth_headers, per_page=7)
+
+    dated = sorted((video for video in videos if video.published_at),
+                   key=lambda video: (video.published_at, video.id), reverse=True)
+    undated = sorted((video for video in videos if not video.published_at),
+                     key=lambda video: video.id, reverse=True)
+    assert ids == [video.id for video in dated + undated]
+    assert pages == 5
+
+def test_per_page_is_clamped(client, auth_headers, videos):
+    response = client.get('/api/videos/?cursor=&per_page=0', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['pagination']['per_page'] == 1
+    assert len(response.get_json()['videos']) == 1
+
+    response = client.get('/api/videos/?cursor=&per_page=100000', headers=auth_headers)
+    assert response.get_json()['pagination']['per_page'] == MAX_PER_PAGE
+
+def test_transcript_search_and_related_limits_are_clamped(client, auth_headers, videos, monkeypatch):
+    limits = []
+    monkeypatch.setattr(SearchService, 'search_transcripts',
+                        lambda self, user_id, query_text, limit, fields: limits.append(limit) or [])
+    monkeypatch.setattr(SimilarityService, 'similar_videos',
+                        lambda self, user_id, video, limit, fields: limits.append(limit) or [])
+
+    assert client.get('/api/videos/transcripts/search?q=hello&limit=100000', headers=auth_headers).status_code == 200
+    assert client.get('/api/videos/transcripts/search?q=hello&limit=-3', headers=auth_headers).status_code == 200
+    assert client.get(f'/api/videos/{videos[0].id}?related=100000', headers=auth_headers).status_code == 200
+    assert client.get(f'/api/videos/{videos[0].id}?related=0', headers=auth_headers).status_code == 200
+
+    assert limits == [MAX_PER_PAGE, 1, MAX_PER_PAGE]
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor(), encode_cursor('2024-01-01', 'x'),
+                                    encode_cursor(5, 1), encode_cursor('2024-01-01')])
+def test_invalid_list_cursor(client, auth_headers, videos, cursor):
+    response = client.get(f'/api/videos/?cursor={cursor}', headers=auth_headers)
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', encode_cursor(), encode_cursor('x'), encode_cursor(-5),
+                                    encode_cursor(1, 2)])
+def test_invalid_search_cursor(client, auth_headers, videos, cursor):
+    response = client.get(f'/api/videos/search?q=video&cursor={cursor}', headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from models import db, QuotaUsage
+from services.quota_service import QuotaLedger, QuotaExceededError, TOTAL_METHOD
+
+def test_charge_refuses_past_priority_share(session):
+    ledger = QuotaLedger(daily_quota=100)
+
+    for _ in range(70):
+        ledger.charge('youtube.videos.list', priority='low')
+    with pytest.raises(QuotaExceededError) as refused:
+        ledger.charge('youtube.videos.list', priority='low')
+
+    assert refused.value.retry_after > 0
+    assert ledger.used() == 70
+    # Interactive calls may still use the reserve
+    ledger.charge('youtube.channels.list', priority='interactive')
+    assert ledger.used() == 71
+
+def test_concurrent_charges_never_overspend(app, session):
+    ledger = QuotaLedger(daily_quota=25)
+
+    def charge(_):
+        with app.app_context():
+            try:
+                return ledger.charge('youtube.playlistItems.list', priority='interactive')
+            except QuotaExceededError:
+                return 0
+
+    with ThreadPoolExecutor(8) as executor:
+        charged = sum(executor.map(charge, range(60)))
+
+    assert charged == 25
+    assert ledger.used() == 25
+    per_method = db.session.query(db.func.sum(QuotaUsage.units)).filter(QuotaUsage.method != TOTAL_METHOD).scalar()
+    assert per_method == 25
+
+def test_total_seeded_from_existing_rows(session):
+    ledger = QuotaLedger(daily_quota=100)
+    db.session.add(QuotaUsage(day=ledger._today(), method='youtube.videos.list', units=40))
+    db.session.commit()
+
+    assert ledger.used() == 40
+    ledger.charge('youtube.videos.list')
+    assert ledger.used() == 41
+
+def test_mark_exhausted(session):
+    ledger = QuotaLedger(daily_quota=100)
+    ledger.charge('youtube.videos.list')
+
+    ledger.mark_exhausted()
+
+    assert ledger.remaining() == 0
+    with pytest.raises(QuotaExceededError):
+        ledger.charge('youtube.videos.list', priority='interactive')
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+import pytest
+import tasks
+import services.similarity_service as similarity_service
+from services.similarity_service import SimilarityService
+from models import db, Video, VideoVector
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(similarity_service, '_indexes', similarity_service.OrderedDict())
+    monkeypatch.setattr(similarity_service, 'SIMILARITY_REFRESH_SECONDS', 0)
+
+@pytest.fixture
+def queued(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks.vectorize_missing_task, 'delay', calls.append)
+    return calls
+
+def add_videos(channel, titles):
+    videos = [Video(channel_id=channel.id, video_id=f'yt{i}', title=title) for i, title in enumerate(titles)]
+    db.session.add_all(videos)
+    db.session.commit()
+    return videos
+
+def test_first_load_queues_backfill_instead_of_vectorizing(channel, user, queued):
+    add_videos(channel, ['baking sourdough bread', 'sourdough starter care'])
+
+    index = SimilarityService().index(user.id)
+
+    assert queued == [user.id]
+    assert len(index) == 0
+    assert VideoVector.query.count() == 0
+
+def test_backfill_task_vectorizes_missing_videos(channel, user, queued):
+    videos = add_videos(channel, ['baking sourdough bread', 'sourdough starter care', 'fixing a bike chain'])
+    service = SimilarityService()
+    service.index(user.id)
+
+    tasks.vectorize_missing_task(user.id)
+
+    assert VideoVector.query.count() == 3
+    results = service.search(user.id, 'sourdough')
+    assert {video.id for video, _ in results} == {videos[0].id, videos[1].id}
+
+    # Nothing left to backfill, so a fresh process does not queue it again
+    similarity_service._indexes.clear()
+    service.index(user.id)
+    assert queued == [user.id]
+
+def test_refresh_picks_up_late_commits(channel, user, queued):
+    early, late, newest = add_videos(channel, ['knitting socks', 'growing tomatoes', 'repairing shoes'])
+    service = SimilarityService()
+    now = datetime.utcnow()
+
+    service.index_videos(user.id, [newest.id])
+    newest.vector.updated_at = now
+    db.session.commit()
+    index = service.index(user.id)
+    assert index.watermark == now
+
+    # Written by another process before the newest vector, but committed
+    # after this one loaded it
+    similarity_service._indexes.clear()
+    service.index_videos(user.id, [late.id])
+    late.vector.updated_at = now - timedelta(seconds=5)
+    db.session.commit()
+    similarity_service._indexes[user.id] = index
+    assert late.id not in index.pending
+
+    service.index(user.id)
+
+    assert [video.id for video, _ in service.search(user.id, 'tomatoes')] == [late.id]
+    assert early.id not in index.row_of and early.id not in index.pending
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+import pytest
+import services.youtube_service as youtube_service
+from services.youtube_service import YouTubeService
+from services.sync_service import SyncService
+from models import Video
+
+class FakeRequest:
+    def __init__(self, method_id, response):
+        self.methodId = method_id
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+class FakeResource:
+    def __init__(self, method_id, handler):
+        self.method_id = method_id
+        self.handler = handler
+
+    def list(self, **params):
+        return FakeRequest(self.method_id, self.handler(**params))
+
+class FakeUploads:
+    """A YouTube client over one uploads playlist, newest first, 50 items per page"""
+
+    def __init__(self):
+        self.uploads = []
+        self.start = datetime(2024, 1, 1)
+
+    def upload(self, count):
+        for _ in range(count):
+            number = len(self.uploads)
+            self.uploads.insert(0, {
+                'id': f'v{number}',
+                'published_at': (self.start + timedelta(hours=number)).isoformat() + 'Z'
+            })
+
+    def playlistItems(self):
+        def page(part, playlistId, maxResults, pageToken=None):
+            offset = int(pageToken or 0)
+            items = self.uploads[offset:offset + maxResults]
+            response = {'items': [
+                {
+                    'snippet': {'resourceId': {'videoId': item['id']}, 'publishedAt': item['published_at']},
+                    'contentDetails': {'videoPublishedAt': item['published_at']}
+                } for item in items
+            ]}
+            if offset + maxResults < len(self.uploads):
+                response['nextPageToken'] = str(offset + maxResults)
+            return response
+        return FakeResource('youtube.playlistItems.list', page)
+
+    def videos(self):
+        published = {item['id']: item['published_at'] for item in self.uploads}
+        def details(part, id):
+            return {'items': [
+                {'id': video_id, 'snippet': {'title': video_id, 'publishedAt': published[video_id]}}
+                for video_id in id.split(',')
+            ]}
+        return FakeResource('youtube.videos.list', details)
+
+@pytest.fixture
+def uploads(monkeypatch):
+    fake = FakeUploads()
+    monkeypatch.setenv('YOUTUBE_API_KEY', 'test-key')
+    monkeypatch.setattr(youtube_service, 'get_youtube_client', lambda api_key: fake)
+    monkeypatch.setattr(YouTubeService, '_execute', lambda self, request: request.execute())
+    return fake
+
+def stored_ids(channel):
+    return {video_id for (video_id,) in Video.query.with_entities(Video.video_id).filter_by(channel_id=channel.id)}
+
+def test_index_fetches_every_upload_past_the_watermark(uploads, channel, user):
+    uploads.upload(10)
+    SyncService().index_channel(channel)
+    assert channel.last_video_id == 'v9'
+
+    # More new uploads than one playlist page
+    uploads.upload(110)
+    new_videos = SyncService().index_channel(channel)
+
+    assert len(new_videos) == 110
+    assert stored_ids(channel) == {f'v{number}' for number in range(120)}
+    assert channel.last_video_id == 'v119'
+
+def test_full_index_is_not_capped(uploads, channel):
+    uploads.upload(120)
+
+    SyncService().index_channel(channel, full=True)
+
+    assert len(stored_ids(channel)) == 120
+
+def test_sync_fetches_every_upload_past_the_watermark(uploads, channel, user):
+    uploads.upload(10)
+    SyncService().index_channel(channel)
+
+    uploads.upload(75)
+    new_videos, _ = SyncService().sync_channel(channel, user)
+
+    assert len(new_videos) == 75
+    assert len(stored_ids(channel)) == 85
+    assert channel.last_video_id == 'v84'
@@ -0,0 +1,166 @@
+import time
+from xmlrpc.client import Fault
+import pytest
+from wordpress_xmlrpc import WordPressPost
+from wordpress_xmlrpc.methods import posts
+import services.blog_service as blog_service
+import services.wordpress_client as wordpress_client
+from benchmarks import fake_wordpress_server
+from benchmarks.fake_wordpress_server import USERNAME, PASSWORD
+from services.blog_service import BlogService
+from services.wordpress_client import WordPressClientPool, multicall_batches
+from models import db, BlogPost, Video
+
+@pytest.fixture(scope='module')
+def wordpress_server():
+    server = fake_wordpress_server.start(connect_delay=0, request_delay=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def server(wordpress_server):
+    wordpress_server.posts.clear()
+    wordpress_server.reset_counts()
+    return wordpress_server
+
+@pytest.fixture
+def pool():
+    pool = WordPressClientPool(pool_size=2, idle_timeout=60)
+    yield pool
+    pool.close()
+
+def new_post(title):
+    post = WordPressPost()
+    post.title = title
+    post.content = f'{title} body'
+    return posts.NewPost(post)
+
+def test_pool_reuses_clients_and_connections(server, pool):
+    for title in ('one', 'two', 'three'):
+        with pool.client(server.url, USERNAME, PASSWORD) as client:
+            client.call(new_post(title))
+
+    assert pool.stats() == {'sites': 1, 'idle_clients': 1, 'created': 1, 'reused': 2}
+    # One keep-alive connection for mt.supportedMethods and all three posts
+    assert server.counts == {'connections': 1, 'requests': 4}
+
+def test_pool_closes_idle_clients(server):
+    pool = WordPressClientPool(idle_timeout=0.05)
+    with pool.client(server.url, USERNAME, PASSWORD):
+        pass
+    time.sleep(0.1)
+
+    with pool.client(server.url, USERNAME, PASSWORD):
+        pass
+
+    assert pool.stats()['created'] == 2
+    assert pool.stats()['reused'] == 0
+    pool.close()
+
+def test_pool_drops_broken_clients_but_keeps_faulted_ones(server, pool):
+    with pytest.raises(Fault):
+        with pool.client(server.url, USERNAME, PASSWORD) as client:
+            client.call(new_post('reject'))
+    # WordPress answered; the connection is still good
+    assert pool.stats()['idle_clients'] == 1
+
+    with pytest.raises(ConnectionResetError):
+        with pool.client(server.url, USERNAME, PASSWORD):
+            raise ConnectionResetError('connection reset by peer')
+    assert pool.stats()['idle_clients'] == 0
+
+def test_multicall_batches_return_faults_per_method(server, pool):
+    methods = [new_post(title) for title in ('a', 'reject', 'b', 'c', 'reject')]
+
+    with pool.client(server.url, USERNAME, PASSWORD) as client:
+        server.reset_counts()
+        batches = list(multicall_batches(client, methods, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert server.counts['requests'] == 3
+    results = [result for batch in batches for result in batch]
+    assert [isinstance(result, Fault) for result in results] == [False, True, False, False, True]
+    assert sorted(server.posts[result]['post_title'] for result in results if not isinstance(result, Fault)) == \
+        ['a', 'b', 'c']
+
+@pytest.fixture
+def publisher(server, user, monkeypatch):
+    user.wordpress_url = server.url.replace('/xmlrpc.php', '')
+    user.wordpress_username = USERNAME
+    user.wordpress_password = PASSWORD
+    db.session.commit()
+    pool = WordPressClientPool()
+    monkeypatch.setattr(blog_service, 'get_wordpress_pool', lambda: pool)
+    monkeypatch.setattr(wordpress_client, 'WORDPRESS_MULTICALL_SIZE', 2)
+    yield BlogService()
+    pool.close()
+
+def add_posts(channel, titles):
+    videos = [Video(channel_id=channel.id, video_id=f'yt-{i}', title=title) for i, title in enumerate(titles)]
+    db.session.add_all(videos)
+    db.session.flush()
+    blog_posts = [
+        BlogPost(user_id=channel.user_id, video_id=video.id, title=video.title, content=f'{video.title} body')
+        for video in videos
+    ]
+    db.session.add_all(blog_posts)
+    db.session.commit()
+    return blog_posts
+
+def test_publish_many_records_each_post(server, user, channel, publisher):
+    blog_posts = add_posts(channel, ['one', 'reject', 'three', 'four', 'five'])
+
+    results = publisher.publish_many_to_wordpress(blog_posts, user)
+
+    assert [isinstance(result, Fault) for _, result in results] == [False, True, False, False, False]
+    db.session.expire_all()
+    for blog_post in blog_posts:
+        if blog_post.title == 'reject':
+            assert blog_post.status == 'draft'
+            assert blog_post.wordpress_post_id is None
+        else:
+            assert blog_post.status == 'published'
+            assert blog_post.published_at is not None
+            assert server.posts[str(blog_post.wordpress_post_id)]['post_title'] == blog_post.title
+    assert len(server.posts) == 4
+
+def test_publish_many_retry_does_not_duplicate_posts(server, user, channel, publisher, monkeypatch):
+    blog_posts = add_posts(channel, ['one', 'two', 'three', 'four'])
+
+    def first_batch_then_reset(client, methods, batch_size=None):
+        batches = multicall_batches(client, methods, batch_size)
+        yield next(batches)
+        raise ConnectionResetError('connection reset by peer')
+
+    monkeypatch.setattr(blog_service, 'multicall_batches', first_batch_then_reset)
+    results = publisher.publish_many_to_wordpress(blog_posts, user)
+
+    # The batch that went through is kept; the rest get the error
+    assert [type(result) for _, result in results][2:] == [ConnectionResetError, ConnectionResetError]
+    db.session.expire_all()
+    assert [blog_post.status for blog_post in blog_posts] == ['published', 'published', 'draft', 'draft']
+    assert len(server.posts) == 2
+
+    monkeypatch.setattr(blog_service, 'multicall_batches', multicall_batches)
+    results = publisher.publish_many_to_wordpress(blog_posts, user)
+
+    assert not any(isinstance(result, Exception) for _, result in results)
+    db.session.expire_all()
+    assert all(blog_post.status == 'published' for blog_post in blog_posts)
+    # The first two were edited in place, not posted again
+    assert sorted(post['post_title'] for post in server.posts.values()) == ['four', 'one', 'three', 'two']
+
+def test_publish_route_reports_per_post_results(client, auth_headers, channel, publisher):
+    blog_posts = add_posts(channel, ['one', 'reject'])
+
+    response = client.post('/api/blog/posts/publish', json={'post_ids': [post.id for post in blog_posts]},
+                           headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['message'] == 'Published 1 of 2 blog posts'
+    ok, rejected = body['results']
+    assert ok['success'] and ok['wordpress_post_id']
+    assert not rejected['success']
+    assert 'not allowed to publish' in rejected['error']